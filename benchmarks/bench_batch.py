@@ -0,0 +1,268 @@
+"""Benchmark the batch orchestrator and ledger without spending tokens.
+
+Puts a stub `claude` (benchmarks/stub_claude.sh) on PATH and, for each
+batch size, measures:
+
+- ledger: create_ledger, load_ledger, buffered LedgerSession transitions
+  and their final compaction, and unbuffered update_item_status appends
+- run_batch: wall time, items/s and per-item orchestration overhead
+  (wall time beyond what the stub's latency accounts for at the given
+  parallelism)
+- resume_batch: the same for a batch that is already half done
+
+Process peak RSS is recorded after each phase, and the cost of starting
+the stub on its own is reported as a baseline. Results are written as
+JSON so runs can be compared over time.
+
+Usage:
+    python benchmarks/bench_batch.py --sizes 10,1000,10000 --parallel 16 \\
+        --latency 0.05 --out benchmarks/results/batch.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+
+from claude_cli.batch.ledger import (
+    LedgerSession,
+    create_ledger,
+    load_ledger,
+    update_item_status,
+)
+from claude_cli.batch.orchestrator import resume_batch, run_batch
+from claude_cli.batch.resources import usage_metrics
+from claude_cli.batch.retry import RetryPolicy
+
+STUB_SOURCE = Path(__file__).with_name("stub_claude.sh")
+# Unbuffered update_item_status calls timed per size (each one is a file append)
+UNBUFFERED_SAMPLES = 1000
+# Serial stub launches timed for the baseline
+BASELINE_SAMPLES = 20
+STUB_SETTINGS = (
+    "STUB_CLAUDE_LATENCY",
+    "STUB_CLAUDE_JITTER",
+    "STUB_CLAUDE_FAIL_RATE",
+    "STUB_CLAUDE_EXIT",
+    "STUB_CLAUDE_OUTPUT_BYTES",
+)
+
+
+@contextmanager
+def install_stub(bin_dir: Path) -> Iterator[Path]:
+    """Write an executable `claude` stub into bin_dir and put it first on PATH.
+
+    The orchestrator resolves `claude` and passes its environment on to
+    workers, so PATH and the STUB_CLAUDE_* settings are changed in this
+    process; both are restored when the block exits.
+    """
+    bin_dir.mkdir(parents=True, exist_ok=True)
+    stub = bin_dir / "claude"
+    shutil.copyfile(STUB_SOURCE, stub)
+    stub.chmod(0o755)
+    names = ["PATH", *STUB_SETTINGS]
+    saved = {name: os.environ.get(name) for name in names}
+    os.environ["PATH"] = f"{bin_dir}{os.pathsep}{os.environ.get('PATH', '')}"
+    try:
+        yield stub
+    finally:
+        for name, value in saved.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+
+
+def configure_stub(
+    latency: float, jitter: float, fail_rate: float, output_bytes: int, fail_exit: int = 1
+) -> None:
+    """Set the stub's behaviour for subsequently spawned workers."""
+    os.environ["STUB_CLAUDE_LATENCY"] = str(latency)
+    os.environ["STUB_CLAUDE_JITTER"] = str(jitter)
+    os.environ["STUB_CLAUDE_FAIL_RATE"] = str(fail_rate)
+    os.environ["STUB_CLAUDE_EXIT"] = str(fail_exit)
+    os.environ["STUB_CLAUDE_OUTPUT_BYTES"] = str(output_bytes)
+
+
+def stub_baseline(stub: Path, samples: int = BASELINE_SAMPLES) -> float:
+    """Mean milliseconds to run the stub once, serially, outside the orchestrator."""
+    start = time.perf_counter()
+    for i in range(samples):
+        subprocess.run(
+            [str(stub), "-p", f"baseline {i}", "--output-format", "json"],
+            stdout=subprocess.DEVNULL,
+            check=False,
+        )
+    return (time.perf_counter() - start) / samples * 1000
+
+
+def bench_ledger(workdir: Path, n: int) -> dict:
+    """Time ledger creation, loading and status transitions for n items."""
+    items = _item_names(n)
+    batch_dir = workdir / ".claude" / "batch" / f"ledger-{n}"
+
+    start = time.perf_counter()
+    ledger_path = create_ledger(f"ledger-{n}", items, "Check $item", {}, batch_dir)
+    create_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    load_ledger(ledger_path)
+    load_s = time.perf_counter() - start
+
+    session = LedgerSession(ledger_path)
+    start = time.perf_counter()
+    for i, item in enumerate(items):
+        session.update_item_status(item, "active", pid=i + 1, attempts=1)
+        session.update_item_status(
+            item, "done", result_summary="ok", exit_code=0, metrics={"duration_ms": 1}
+        )
+    transitions_s = time.perf_counter() - start
+    start = time.perf_counter()
+    session.close()
+    close_s = time.perf_counter() - start
+
+    samples = items[: min(n, UNBUFFERED_SAMPLES)]
+    start = time.perf_counter()
+    for item in samples:
+        update_item_status(ledger_path, item, "pending")
+    unbuffered_s = time.perf_counter() - start
+
+    return {
+        "create_s": round(create_s, 6),
+        "load_s": round(load_s, 6),
+        "session_transition_us": round(transitions_s / (2 * n) * 1e6, 3),
+        "session_close_s": round(close_s, 6),
+        "unbuffered_update_us": round(unbuffered_s / len(samples) * 1e6, 3),
+        "snapshot_bytes": ledger_path.stat().st_size,
+        "peak_rss_kib": _peak_rss_kib(),
+    }
+
+
+def bench_run(workdir: Path, n: int, parallel: int, latency: float, resume: bool) -> dict:
+    """Time run_batch (or resume_batch on a half-done batch) over n stub workers."""
+    name = f"{'resume' if resume else 'run'}-{n}"
+    batch_dir = workdir / ".claude" / "batch" / name
+    items = _item_names(n)
+    create_ledger(name, items, "Check $item", {"parallel": parallel, "schedule": "fifo"}, batch_dir)
+
+    to_run = n
+    if resume:
+        with LedgerSession(batch_dir / "ledger.yaml") as session:
+            for item in items[: n // 2]:
+                session.update_item_status(item, "done", result_summary="ok", exit_code=0)
+        to_run = n - n // 2
+
+    runner = resume_batch if resume else run_batch
+    start = time.perf_counter()
+    summary = runner(batch_dir, parallel, retry=RetryPolicy(max_attempts=1))
+    wall_s = time.perf_counter() - start
+
+    ideal_s = to_run * latency / parallel
+    return {
+        "items_run": to_run,
+        "wall_s": round(wall_s, 4),
+        "items_per_s": round(to_run / wall_s, 2) if wall_s else None,
+        "overhead_ms_per_item": round(max(0.0, wall_s - ideal_s) / max(1, to_run) * 1000, 3),
+        "done": summary.get("done", 0),
+        "failed": summary.get("failed", 0),
+        "peak_rss_kib": _peak_rss_kib(),
+    }
+
+
+def run_benchmarks(
+    sizes: list[int],
+    parallel: int,
+    latency: float,
+    jitter: float = 0.0,
+    fail_rate: float = 0.0,
+    output_bytes: int = 256,
+    workdir: Path | None = None,
+    fail_exit: int = 1,
+) -> dict:
+    """Run every benchmark at each size and return the JSON-ready report."""
+    with tempfile.TemporaryDirectory(prefix="caf-bench-") as tmp:
+        root = workdir or Path(tmp)
+        with install_stub(root / "bin") as stub:
+            configure_stub(latency, jitter, fail_rate, output_bytes, fail_exit)
+            baseline_ms = stub_baseline(stub)
+
+            results = []
+            for n in sizes:
+                results.append({
+                    "items": n,
+                    "ledger": bench_ledger(root, n),
+                    "run_batch": bench_run(root, n, parallel, latency, resume=False),
+                    "resume_batch": bench_run(root, n, parallel, latency, resume=True),
+                })
+
+    return {
+        "generated_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "config": {
+            "parallel": parallel,
+            "latency_s": latency,
+            "jitter_s": jitter,
+            "fail_rate": fail_rate,
+            "fail_exit": fail_exit,
+            "output_bytes": output_bytes,
+        },
+        "stub_exec_ms": round(baseline_ms, 3),
+        "results": results,
+    }
+
+
+def _item_names(n: int) -> list[str]:
+    return [f"src/pkg{i % 100:02d}/module_{i:06d}.py" for i in range(n)]
+
+
+def _peak_rss_kib() -> int:
+    """Process high-water RSS so far, in KiB."""
+    return usage_metrics(resource.getrusage(resource.RUSAGE_SELF))["peak_rss_kib"]
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="10,1000,10000", help="Comma-separated item counts")
+    parser.add_argument("--parallel", type=int, default=16)
+    parser.add_argument("--latency", type=float, default=0.0, help="Stub seconds per item")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Extra random stub seconds")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="Fraction of items failing")
+    parser.add_argument("--fail-exit", type=int, default=1, help="Exit code of failing items")
+    parser.add_argument("--output-bytes", type=int, default=256, help="Stub result size")
+    parser.add_argument("--out", type=Path, help="Write JSON here (default: stdout)")
+    args = parser.parse_args(argv)
+
+    report = run_benchmarks(
+        [int(size) for size in args.sizes.split(",") if size],
+        args.parallel,
+        args.latency,
+        args.jitter,
+        args.fail_rate,
+        args.output_bytes,
+        fail_exit=args.fail_exit,
+    )
+    text = json.dumps(report, indent=2)
+    if args.out:
+        args.out.parent.mkdir(parents=True, exist_ok=True)
+        args.out.write_text(text + "\n")
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,52 @@
+#!/bin/sh
+# Stand-in for `claude -p` used by the batch benchmarks.
+#
+# Accepts the arguments build_command produces, spends no tokens, and
+# prints a result shaped like the real CLI's. Written in sh rather than
+# Python so that starting it costs little next to the orchestrator work
+# being measured. Behaviour is controlled by environment variables:
+#
+#   STUB_CLAUDE_LATENCY       Seconds to sleep before answering (default 0).
+#   STUB_CLAUDE_JITTER        Extra uniform random sleep, 0..N seconds (default 0).
+#   STUB_CLAUDE_FAIL_RATE     Fraction of prompts that fail (default 0). The
+#                             choice hashes the prompt, so it is repeatable.
+#   STUB_CLAUDE_EXIT          Exit code for failing prompts (default 1).
+#   STUB_CLAUDE_OUTPUT_BYTES  Size of the result text (default 256).
+
+prompt=""
+format="text"
+while [ $# -gt 0 ]; do
+    case "$1" in
+        -p) prompt="$2"; shift ;;
+        --output-format) format="$2"; shift ;;
+    esac
+    shift
+done
+
+latency="${STUB_CLAUDE_LATENCY:-0}"
+jitter="${STUB_CLAUDE_JITTER:-0}"
+fail_rate="${STUB_CLAUDE_FAIL_RATE:-0}"
+fail_exit="${STUB_CLAUDE_EXIT:-1}"
+size="${STUB_CLAUDE_OUTPUT_BYTES:-256}"
+
+hash=$(printf '%s' "$prompt" | cksum | cut -d' ' -f1)
+set -- $(awk -v h="$hash" -v r="$fail_rate" -v l="$latency" -v j="$jitter" -v s="$$" \
+    'BEGIN { srand(s); printf "%d %.3f\n", (h % 1000000) < r * 1000000, l + rand() * j }')
+failed=$1
+delay=$2
+
+[ "$delay" != "0.000" ] && sleep "$delay"
+
+if [ "$failed" = 1 ]; then
+    subtype="error_during_execution"; is_error=true; text="stub failure"; code=$fail_exit
+else
+    subtype="success"; is_error=false; text="stub ok"; code=0
+fi
+padding=$(head -c "$size" /dev/zero | tr '\0' x)
+
+if [ "$format" = "stream-json" ]; then
+    printf '%s\n' '{"type": "assistant", "message": {"content": [{"type": "tool_use", "name": "Read", "input": {}}]}}'
+fi
+printf '{"type": "result", "subtype": "%s", "is_error": %s, "result": "%s %s", "num_turns": 1, "usage": {"input_tokens": 100, "output_tokens": %d}}\n' \
+    "$subtype" "$is_error" "$text" "$padding" $((size / 4 + 1))
+exit "$code"
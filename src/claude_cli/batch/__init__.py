@@ -8,11 +8,16 @@ by an independent headless Claude instance. Results are written to disk
 from claude_cli.batch.broker import (
     collect_summaries,
     generate_report,
+    index_result,
+    load_index,
+    read_index,
     read_result,
     sanitize_item_name,
     write_result,
 )
 from claude_cli.batch.ledger import (
+    LedgerSession,
+    compact_ledger,
     create_ledger,
     generate_batch_id,
     get_ledger_summary,
@@ -23,13 +28,18 @@ from claude_cli.batch.ledger import (
 )
 
 __all__ = [
+    "LedgerSession",
     "collect_summaries",
+    "compact_ledger",
     "create_ledger",
     "generate_batch_id",
     "generate_report",
     "get_ledger_summary",
     "get_resumable_items",
+    "index_result",
+    "load_index",
     "load_ledger",
+    "read_index",
     "read_result",
     "reset_stale_active",
     "sanitize_item_name",
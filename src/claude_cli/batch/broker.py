@@ -3,16 +3,26 @@
 Manages result file I/O, summary extraction, and report generation.
 Sub-agents write full results to disk; the broker collects summaries
 so the parent context only sees compact data.
+
+Alongside the result files, results/index.jsonl holds one small record
+per written result (item, summary, exit code, completion time, result
+size, plus run metrics when the orchestrator wrote it). Readers take the
+last record per result file, so collecting summaries never has to parse
+the results themselves; records carry their byte offset in the index so
+a reader can resume from where it stopped.
 """
 
 from __future__ import annotations
 
 import json
+import os
 from datetime import datetime, timezone
 from pathlib import Path
 
 from claude_cli.batch.ledger import load_ledger
 
+INDEX_FILENAME = "index.jsonl"
+
 
 def sanitize_item_name(item: str) -> str:
     """Convert item path to a safe filename (without extension).
@@ -50,10 +60,83 @@ def write_result(
         **result,
     }
 
-    result_path.write_text(json.dumps(result_with_meta, indent=2, default=str))
+    data = json.dumps(result_with_meta, indent=2, default=str)
+    result_path.write_text(data)
+    index_result(results_dir, {
+        "item": item_name,
+        "file": result_path.name,
+        "summary": result.get("summary"),
+        "exit_code": result.get("exit_code"),
+        "completed_at": result.get("completed_at"),
+        "size": len(data.encode()),
+    })
     return result_path
 
 
+def index_result(results_dir: Path, entry: dict) -> int:
+    """Append a record to the results index in a single write.
+
+    Args:
+        results_dir: Directory for result files.
+        entry: Record with at least ``item`` and ``file`` (the result
+            file's name); later records for the same file supersede it.
+
+    Returns:
+        Byte offset of the record within the index.
+    """
+    results_dir.mkdir(parents=True, exist_ok=True)
+    line = json.dumps(entry, default=str) + "\n"
+    fd = os.open(results_dir / INDEX_FILENAME, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+    try:
+        os.write(fd, line.encode())
+        return os.fstat(fd).st_size - len(line.encode())
+    finally:
+        os.close(fd)
+
+
+def read_index(results_dir: Path, offset: int = 0) -> tuple[list[dict], int]:
+    """Read index records appended after a byte offset.
+
+    A torn trailing line (a writer still mid-append) is left for the
+    next read.
+
+    Args:
+        results_dir: Directory containing result files.
+        offset: Byte offset to start from (0 for the whole index).
+
+    Returns:
+        (records, offset to pass on the next call). Each record gains an
+        ``offset`` key with its position in the index.
+    """
+    index_path = results_dir / INDEX_FILENAME
+    records: list[dict] = []
+    try:
+        f = open(index_path, "rb")
+    except FileNotFoundError:
+        return records, offset
+    with f:
+        f.seek(offset)
+        for line in f:
+            if not line.endswith(b"\n"):
+                break
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                offset += len(line)
+                continue
+            if isinstance(record, dict):
+                record["offset"] = offset
+                records.append(record)
+            offset += len(line)
+    return records, offset
+
+
+def load_index(results_dir: Path) -> dict[str, dict]:
+    """Return the latest index record per result file name."""
+    records, _ = read_index(results_dir)
+    return {record["file"]: record for record in records if "file" in record}
+
+
 def read_result(results_dir: Path, item_name: str) -> dict | None:
     """Read a single result file.
 
@@ -77,48 +160,82 @@ def read_result(results_dir: Path, item_name: str) -> dict | None:
 
 
 def collect_summaries(results_dir: Path) -> list[dict]:
-    """Read all result files and extract compact summaries.
+    """Extract compact summaries for all result files.
 
     Returns a list of dicts with: item, summary, exit_code, completed_at.
     This is what the parent context should read instead of full results.
+
+    Summaries come from the results index. Only files missing from it, or
+    whose size no longer matches their record, are parsed; they are then
+    added to the index so the next call skips them.
     """
     summaries = []
     if not results_dir.exists():
         return summaries
 
+    index = load_index(results_dir)
     for result_file in sorted(results_dir.glob("*.json")):
+        record = index.get(result_file.name)
         try:
-            data = json.loads(result_file.read_text())
-            summaries.append({
-                "item": data.get("item", result_file.stem),
-                "summary": data.get("summary", "No summary"),
-                "exit_code": data.get("exit_code"),
-                "completed_at": data.get("completed_at"),
-            })
-        except (json.JSONDecodeError, OSError):
-            summaries.append({
-                "item": result_file.stem,
-                "summary": "Error reading result file",
-                "exit_code": None,
-                "completed_at": None,
-            })
+            size = result_file.stat().st_size
+        except OSError:
+            size = None
+        if record is None or record.get("size") != size:
+            record = _index_result_file(result_file, size)
+
+        summaries.append({
+            "item": record.get("item", result_file.stem),
+            "summary": record.get("summary") or "No summary",
+            "exit_code": record.get("exit_code"),
+            "completed_at": record.get("completed_at"),
+        })
 
     return summaries
 
 
-def generate_report(batch_dir: Path) -> str:
+def _index_result_file(result_file: Path, size: int | None) -> dict:
+    """Parse an unindexed result file and record it in the index."""
+    try:
+        data = json.loads(result_file.read_text())
+    except (json.JSONDecodeError, OSError):
+        return {
+            "item": result_file.stem,
+            "summary": "Error reading result file",
+            "exit_code": None,
+            "completed_at": None,
+        }
+    if not isinstance(data, dict):
+        data = {}
+
+    record = {
+        "item": data.get("item", result_file.stem),
+        "file": result_file.name,
+        "summary": data.get("summary"),
+        "exit_code": data.get("exit_code"),
+        "completed_at": data.get("completed_at"),
+        "size": size,
+    }
+    try:
+        index_result(result_file.parent, record)
+    except OSError:
+        pass  # read-only results directory; parse again next time
+    return record
+
+
+def generate_report(batch_dir: Path, ledger: dict | None = None) -> str:
     """Produce a markdown summary report from ledger + results.
 
     Args:
         batch_dir: Root directory of the batch (contains ledger.yaml and results/).
+        ledger: Already loaded ledger (default: read ledger.yaml).
 
     Returns:
         Markdown-formatted report string.
     """
-    ledger_path = batch_dir / "ledger.yaml"
     results_dir = batch_dir / "results"
 
-    ledger = load_ledger(ledger_path)
+    if ledger is None:
+        ledger = load_ledger(batch_dir / "ledger.yaml")
     config = ledger.get("config", {})
     summary = ledger.get("summary", {})
     items = ledger.get("items", [])
@@ -143,6 +260,22 @@ def generate_report(batch_dir: Path) -> str:
         "",
     ]
 
+    # Result cache statistics (only items processed with caching enabled)
+    cache_flags = [i["cache_hit"] for i in items if i.get("cache_hit") is not None]
+    if cache_flags:
+        hits = sum(1 for flag in cache_flags if flag)
+        misses = len(cache_flags) - hits
+        lines.extend([
+            "## Cache",
+            "",
+            f"- Hits: {hits}",
+            f"- Misses: {misses}",
+            f"- Hit rate: {hits / len(cache_flags):.0%}",
+            "",
+        ])
+
+    lines.extend(_resource_section(items, config.get("parallel")))
+
     # Done items
     done_items = [i for i in items if i.get("status") == "done"]
     if done_items:
@@ -158,7 +291,12 @@ def generate_report(batch_dir: Path) -> str:
         lines.append("## Failed Items")
         lines.append("")
         for item in failed_items:
-            lines.append(f"- **{item['name']}**: {item.get('summary', 'Unknown error')}")
+            detail = ""
+            if item.get("last_error_class"):
+                detail = f" ({item['last_error_class']}, {item.get('attempts') or 0} attempts)"
+            lines.append(
+                f"- **{item['name']}**{detail}: {item.get('summary', 'Unknown error')}"
+            )
         lines.append("")
 
     # Pending items (not yet processed)
@@ -171,3 +309,46 @@ def generate_report(batch_dir: Path) -> str:
         lines.append("")
 
     return "\n".join(lines)
+
+
+def _resource_section(items: list[dict], parallel: int | None) -> list[str]:
+    """Report lines summarising worker CPU, memory and I/O; empty if none recorded."""
+    measured = [i for i in items if i.get("cpu_user_ms") is not None and not i.get("cache_hit")]
+    if not measured:
+        return []
+
+    cpu_ms = [(i.get("cpu_user_ms") or 0) + (i.get("cpu_sys_ms") or 0) for i in measured]
+    wall_ms = sum(i.get("duration_ms") or 0 for i in measured)
+    rss = sorted(i.get("peak_rss_kib") or 0 for i in measured)
+    cores = sum(cpu_ms) / wall_ms if wall_ms else None
+
+    lines = [
+        "## Resources",
+        "",
+        f"- Workers measured: {len(measured)}",
+        f"- CPU time: {sum(cpu_ms) / 1000:.1f}s total, {sum(cpu_ms) / len(cpu_ms):.0f}ms per item",
+    ]
+    if cores is not None:
+        lines.append(f"- CPU per running worker: {cores:.2f} cores")
+    lines.extend([
+        f"- Peak RSS per worker: {_format_bytes(rss[len(rss) // 2] * 1024)} median, "
+        f"{_format_bytes(rss[-1] * 1024)} max",
+        f"- Storage I/O: {_format_bytes(sum(i.get('io_read_bytes') or 0 for i in measured))} "
+        f"read, {_format_bytes(sum(i.get('io_write_bytes') or 0 for i in measured))} written",
+    ])
+    if parallel and cores is not None:
+        lines.append(
+            f"- At --parallel {parallel}: ~{parallel * cores:.1f} cores, "
+            f"up to {_format_bytes(parallel * rss[-1] * 1024)} RSS"
+        )
+    lines.append("")
+    return lines
+
+
+def _format_bytes(size: float) -> str:
+    """Render a byte count with a binary unit, e.g. "1.5 MiB"."""
+    for unit in ("B", "KiB", "MiB", "GiB"):
+        if size < 1024 or unit == "GiB":
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GiB"
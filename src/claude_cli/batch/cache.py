@@ -0,0 +1,138 @@
+"""Content-addressed cache of batch results.
+
+An item's cache key hashes the item file's content together with the
+exact `claude -p` command (rendered prompt, allowed tools, max turns,
+output format). Re-running an unchanged item with the same command is
+then a cache hit: its previous result file is linked into the new batch
+and no worker is spawned.
+
+Entries live under {project}/.claude/batch/cache/{key[:2]}/ as a result
+file plus a small .meta.json. Eviction is least-recently-used by the
+meta file's mtime, which a hit refreshes, down to a byte cap.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from pathlib import Path
+
+DEFAULT_CACHE_MAX_BYTES = 256 * 1024 * 1024
+
+_HASH_CHUNK = 1024 * 1024
+
+
+def cache_key(project_root: Path, item: str, cmd: list[str]) -> str:
+    """Hash an item's file content and the command that would process it.
+
+    Args:
+        project_root: Directory items are relative to.
+        item: Item path/name.
+        cmd: Command from build_command for this item.
+
+    Returns:
+        Hex SHA-256 digest.
+    """
+    h = hashlib.sha256()
+    h.update(json.dumps(cmd).encode())
+    h.update(b"\0")
+    path = project_root / item
+    if path.is_file():
+        with open(path, "rb") as f:
+            while chunk := f.read(_HASH_CHUNK):
+                h.update(chunk)
+    else:
+        h.update(b"\0no-file\0")
+    return h.hexdigest()
+
+
+class ResultCache:
+    """LRU-evicted store of successful result files keyed by cache_key."""
+
+    def __init__(self, cache_dir: Path, max_bytes: int = DEFAULT_CACHE_MAX_BYTES) -> None:
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+
+    def lookup(self, key: str) -> dict | None:
+        """Return the entry's metadata on a hit (refreshing its LRU time), else None."""
+        meta_path, result_path = self._paths(key)
+        if not result_path.exists():
+            return None
+        try:
+            meta = json.loads(meta_path.read_text())
+        except (OSError, json.JSONDecodeError):
+            return None
+        os.utime(meta_path)
+        return meta
+
+    def materialize(self, key: str, dest: Path) -> None:
+        """Place a cached result at dest, hard-linking when possible.
+
+        Result files are always replaced rather than rewritten in place, so a
+        shared inode is never truncated under the cache.
+        """
+        _, result_path = self._paths(key)
+        dest.unlink(missing_ok=True)
+        try:
+            os.link(result_path, dest)
+        except OSError:
+            shutil.copyfile(result_path, dest)
+
+    def store(self, key: str, result_path: Path, meta: dict) -> None:
+        """Copy a successful result into the cache with its metadata."""
+        meta_path, cached_path = self._paths(key)
+        cached_path.parent.mkdir(parents=True, exist_ok=True)
+        _atomic_copy(result_path, cached_path)
+        fd, tmp = tempfile.mkstemp(dir=meta_path.parent, prefix=".meta_", suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump(meta, f)
+        os.replace(tmp, meta_path)
+
+    def evict(self) -> int:
+        """Drop least-recently-used entries until the cache fits max_bytes.
+
+        Returns:
+            Number of entries removed.
+        """
+        if not self.cache_dir.exists():
+            return 0
+
+        entries = []
+        total = 0
+        for meta_path in self.cache_dir.glob("*/*.meta.json"):
+            result_path = meta_path.with_name(meta_path.name.replace(".meta.json", ".json"))
+            try:
+                size = meta_path.stat().st_size + result_path.stat().st_size
+                used = meta_path.stat().st_mtime
+            except OSError:
+                continue
+            entries.append((used, size, meta_path, result_path))
+            total += size
+
+        removed = 0
+        for _, size, meta_path, result_path in sorted(entries, key=lambda e: e[0]):
+            if total <= self.max_bytes:
+                break
+            meta_path.unlink(missing_ok=True)
+            result_path.unlink(missing_ok=True)
+            total -= size
+            removed += 1
+        return removed
+
+    def _paths(self, key: str) -> tuple[Path, Path]:
+        shard = self.cache_dir / key[:2]
+        return shard / f"{key}.meta.json", shard / f"{key}.json"
+
+
+def _atomic_copy(src: Path, dest: Path) -> None:
+    fd, tmp = tempfile.mkstemp(dir=dest.parent, prefix=".result_", suffix=".tmp")
+    os.close(fd)
+    try:
+        shutil.copyfile(src, tmp)
+        os.replace(tmp, dest)
+    except Exception:
+        Path(tmp).unlink(missing_ok=True)
+        raise
@@ -0,0 +1,174 @@
+"""Streaming capture of headless worker output.
+
+Workers write to a pipe; a reader thread tees each chunk to the item's
+result file and feeds it to a StreamCapture, which extracts the summary,
+token usage and tool-use count as lines arrive. The output is read once
+and never held in memory beyond a bounded head buffer.
+
+Both `--output-format json` (one result object) and `stream-json` (one
+event per line, with assistant messages carrying tool_use blocks) are
+understood.
+"""
+
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import BinaryIO
+
+SUMMARY_CHARS = 200
+CHUNK_SIZE = 64 * 1024
+# Largest single line / whole document we will try to JSON-parse
+MAX_PARSE_BYTES = 1024 * 1024
+
+_USAGE_KEYS = (
+    "input_tokens",
+    "output_tokens",
+    "cache_creation_input_tokens",
+    "cache_read_input_tokens",
+)
+
+
+class StreamCapture:
+    """Incremental parser for `claude -p` output."""
+
+    def __init__(self, max_parse_bytes: int = MAX_PARSE_BYTES) -> None:
+        self.max_parse_bytes = max_parse_bytes
+        self.summary: str | None = None
+        self.total_tokens: int | None = None
+        self.num_turns: int | None = None
+        self.result_subtype: str | None = None
+        self.tool_uses = 0
+        self.bytes_seen = 0
+        self._first_line: str | None = None
+        self._partial = b""
+        self._skipping = False  # inside a line too long to parse
+        self._head = bytearray()
+        self._parsed_lines = 0
+
+    def feed(self, chunk: bytes) -> None:
+        """Process the next chunk of output."""
+        self.bytes_seen += len(chunk)
+        if len(self._head) <= self.max_parse_bytes:
+            self._head.extend(chunk[: self.max_parse_bytes + 1 - len(self._head)])
+
+        *lines, self._partial = (self._partial + chunk).split(b"\n")
+        for line in lines:
+            if self._skipping:
+                self._skipping = False
+                continue
+            self._process_line(line)
+
+        if len(self._partial) > self.max_parse_bytes:
+            if not self._skipping:
+                self._note_first_line(self._partial[:SUMMARY_CHARS * 4])
+            self._partial = b""
+            self._skipping = True
+
+    def close(self) -> None:
+        """Process any trailing partial line and whole-document JSON."""
+        if self._partial and not self._skipping:
+            self._process_line(self._partial)
+        self._partial = b""
+
+        # Pretty-printed JSON spans lines; parse the document if it was small
+        if (
+            self._parsed_lines == 0
+            and self._head
+            and len(self._head) <= self.max_parse_bytes
+        ):
+            try:
+                self._apply(json.loads(self._head.decode("utf-8", "replace")))
+            except json.JSONDecodeError:
+                pass
+        self._head = bytearray()
+
+    def summary_text(self) -> str:
+        """One-line summary: the result text, else the first non-empty line."""
+        if self.summary is not None:
+            return self.summary
+        if self._first_line is not None:
+            return self._first_line
+        return "No summary available"
+
+    def metrics(self) -> dict:
+        """Token and tool-use counts extracted so far (known values only)."""
+        metrics: dict = {"tool_uses": self.tool_uses}
+        if self.total_tokens is not None:
+            metrics["total_tokens"] = self.total_tokens
+        if self.num_turns is not None:
+            metrics["num_turns"] = self.num_turns
+        return metrics
+
+    def _process_line(self, line: bytes) -> None:
+        text = line.decode("utf-8", "replace").strip()
+        if not text:
+            return
+        self._note_first_line(line)
+        if not text.startswith("{"):
+            return
+        try:
+            event = json.loads(text)
+        except json.JSONDecodeError:
+            return
+        self._parsed_lines += 1
+        self._apply(event)
+
+    def _apply(self, event: object) -> None:
+        if not isinstance(event, dict):
+            return
+
+        kind = event.get("type")
+        if kind == "assistant":
+            content = (event.get("message") or {}).get("content") or []
+            if isinstance(content, list):
+                self.tool_uses += sum(
+                    1 for block in content
+                    if isinstance(block, dict) and block.get("type") == "tool_use"
+                )
+            return
+
+        if kind == "result" and isinstance(event.get("subtype"), str):
+            self.result_subtype = event["subtype"]
+
+        # Claude --output-format json wraps result
+        if "result" in event:
+            self.summary = str(event["result"])[:SUMMARY_CHARS]
+        elif "content" in event and kind not in ("user", "system"):
+            self.summary = str(event["content"])[:SUMMARY_CHARS]
+
+        usage = event.get("usage")
+        if isinstance(usage, dict):
+            self.total_tokens = sum(
+                int(usage.get(key) or 0) for key in _USAGE_KEYS
+            )
+        if isinstance(event.get("num_turns"), int):
+            self.num_turns = event["num_turns"]
+
+    def _note_first_line(self, line: bytes) -> None:
+        if self._first_line is None:
+            stripped = line.decode("utf-8", "replace").strip()
+            if stripped:
+                self._first_line = stripped[:SUMMARY_CHARS]
+
+
+def tee_stream(stream: BinaryIO, output_path: Path, capture: StreamCapture) -> None:
+    """Copy a worker's output to its result file while feeding the capture.
+
+    Returns when the stream reaches EOF.
+    """
+    with open(output_path, "wb") as out:
+        while chunk := stream.read1(CHUNK_SIZE):
+            out.write(chunk)
+            capture.feed(chunk)
+    capture.close()
+
+
+def capture_file(path: Path) -> StreamCapture:
+    """Run a StreamCapture over an existing result file, reading it once."""
+    capture = StreamCapture()
+    with open(path, "rb") as f:
+        while chunk := f.read(CHUNK_SIZE):
+            capture.feed(chunk)
+    capture.close()
+    return capture
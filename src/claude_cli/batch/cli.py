@@ -3,12 +3,15 @@
 from __future__ import annotations
 
 from pathlib import Path
-from typing import Optional
+from typing import TYPE_CHECKING, Iterator, Optional
 
 import typer
 from rich.console import Console
 from rich.table import Table
 
+if TYPE_CHECKING:
+    from claude_cli.batch.progress import Progress
+
 app = typer.Typer(help="Batch processing with parallel headless agents")
 console = Console()
 
@@ -38,20 +41,71 @@ def init_batch(
     allowed_tools: Optional[str] = typer.Option(
         None, "--allowed-tools", help="Comma-separated tool list"
     ),
+    timeout: Optional[float] = typer.Option(
+        None, "--timeout", help="Per-item wall-clock limit in seconds"
+    ),
+    max_attempts: int = typer.Option(3, "--max-attempts", help="Attempts per item before giving up"),
+    stream: bool = typer.Option(
+        False, "--stream", help="Use stream-json output (records tool-use counts)"
+    ),
+    cache: bool = typer.Option(
+        False, "--cache", help="Reuse results for unchanged items from earlier batches"
+    ),
+    priority: Optional[list[str]] = typer.Option(
+        None, "--priority", help="PATTERN=N; matching items run first (repeatable)"
+    ),
+    schedule: str = typer.Option(
+        "lpt", "--schedule", help="lpt (longest expected first) or fifo (glob order)"
+    ),
+    exclude: Optional[list[str]] = typer.Option(
+        None, "--exclude", "-x", help="Glob to skip, .gitignore syntax (repeatable)"
+    ),
+    gitignore: bool = typer.Option(
+        True, "--gitignore/--no-gitignore", help="Skip paths ignored by .gitignore files"
+    ),
+    shard: Optional[str] = typer.Option(
+        None, "--shard", help="i/N; keep only this machine's share of the items"
+    ),
+    sample_interval: Optional[float] = typer.Option(
+        None, "--sample-interval", help="Seconds between /proc samples of running workers"
+    ),
 ) -> None:
     """Initialize a new batch from a glob pattern and prompt template."""
+    import functools
+    import itertools
+
+    from claude_cli.batch.discovery import iter_items, parse_shard
     from claude_cli.batch.ledger import create_ledger, generate_batch_id
-    from claude_cli.batch.orchestrator import discover_items
+    from claude_cli.batch.scheduler import SCHEDULES, parse_priorities, priority_for
+
+    if schedule not in SCHEDULES:
+        console.print(f"[red]Unknown schedule: {schedule} (use {', '.join(SCHEDULES)})[/red]")
+        raise typer.Exit(1)
+    try:
+        priority_rules = parse_priorities(priority or [])
+        shard_spec = parse_shard(shard) if shard else None
+    except ValueError as e:
+        console.print(f"[red]{e}[/red]")
+        raise typer.Exit(1)
 
     project_root = _find_project_root()
     if project_root is None:
         console.print("[red]No .claude/manifest.yaml found in parent directories[/red]")
         raise typer.Exit(1)
 
-    items = discover_items(pattern, project_root)
-    if not items:
+    # Stream discovery straight into the ledger; only the first match is peeked
+    found = iter_items(pattern, project_root, exclude or [], gitignore, shard_spec)
+    first = next(found, None)
+    if first is None:
         console.print(f"[yellow]No items match pattern: {pattern}[/yellow]")
         raise typer.Exit(1)
+    total = 0
+
+    def counted() -> Iterator[str]:
+        nonlocal total
+        for item in itertools.chain([first], found):
+            total += 1
+            yield item
 
     batch_id = generate_batch_id()
     batch_dir = _get_batch_dir(project_root, batch_id)
@@ -63,12 +117,21 @@ def init_batch(
         "parallel": parallel,
         "max_turns": max_turns,
         "allowed_tools": tools,
+        "timeout": timeout,
+        "max_attempts": max_attempts,
+        "output_format": "stream-json" if stream else "json",
+        "cache": cache,
+        "schedule": schedule,
+        "exclude": exclude or [],
+        "shard": shard,
+        "sample_interval": sample_interval,
     }
 
-    ledger_path = create_ledger(batch_id, items, prompt, config, batch_dir)
+    priorities = functools.partial(priority_for, rules=priority_rules)
+    ledger_path = create_ledger(batch_id, counted(), prompt, config, batch_dir, priorities)
 
     console.print(f"\n[green]Batch initialized:[/green] {batch_id}")
-    console.print(f"  Items: {len(items)}")
+    console.print(f"  Items: {total}")
     console.print(f"  Parallel: {parallel}")
     console.print(f"  Ledger: {ledger_path}")
     console.print(f"\nRun with: [bold]caf batch run --batch-id {batch_id}[/bold]\n")
@@ -79,9 +142,36 @@ def run(
     batch_id: str = typer.Option(..., "--batch-id", "-b", help="Batch ID to run"),
     parallel: Optional[int] = typer.Option(None, "--parallel", "-n", help="Override parallel limit"),
     resume: bool = typer.Option(False, "--resume", "-r", help="Resume from ledger state"),
+    adaptive: bool = typer.Option(
+        False, "--adaptive", help="Adjust concurrency up to the parallel limit (AIMD)"
+    ),
+    timeout: Optional[float] = typer.Option(
+        None, "--timeout", help="Override per-item wall-clock limit in seconds"
+    ),
+    cache: Optional[bool] = typer.Option(
+        None, "--cache/--no-cache", help="Override the batch's result cache setting"
+    ),
+    worker: bool = typer.Option(
+        False, "--worker", help="Claim items from the shared work queue (multi-node)"
+    ),
+    worker_id: Optional[str] = typer.Option(
+        None, "--worker-id", help="Name for this worker (default host:pid)"
+    ),
+    lease: float = typer.Option(
+        60.0, "--lease", help="Seconds a claimed item survives without a heartbeat"
+    ),
 ) -> None:
-    """Execute (or resume) a batch of headless jobs."""
-    from claude_cli.batch.orchestrator import find_claude_binary, resume_batch, run_batch
+    """Execute (or resume) a batch of headless jobs.
+
+    With --worker, start the same command on each machine sharing the
+    project directory; the workers split the batch between them.
+    """
+    from claude_cli.batch.orchestrator import (
+        find_claude_binary,
+        resume_batch,
+        run_batch,
+        run_worker,
+    )
 
     project_root = _find_project_root()
     if project_root is None:
@@ -109,12 +199,25 @@ def run(
         status_icon = "[green]done[/green]" if exit_code == 0 else "[red]FAIL[/red]"
         console.print(f"  {status_icon} {item}")
 
-    console.print(f"\n[bold]Running batch: {batch_id}[/bold] (parallel={parallel})")
+    mode = "adaptive, max" if adaptive else "parallel"
+    console.print(f"\n[bold]Running batch: {batch_id}[/bold] ({mode}={parallel})")
 
-    if resume:
-        summary = resume_batch(batch_dir, parallel, on_complete)
+    if worker:
+        summary = run_worker(
+            batch_dir, parallel, on_complete,
+            worker_id=worker_id, lease_seconds=lease,
+            adaptive=adaptive, timeout=timeout, use_cache=cache,
+        )
     else:
-        summary = run_batch(batch_dir, parallel, on_complete)
+        runner = resume_batch if resume else run_batch
+        try:
+            summary = runner(
+                batch_dir, parallel, on_complete,
+                adaptive=adaptive, timeout=timeout, use_cache=cache,
+            )
+        except RuntimeError as e:
+            console.print(f"[red]{e}[/red]")
+            raise typer.Exit(1)
 
     console.print(f"\n[bold]Complete:[/bold] {summary.get('done', 0)} done, "
                   f"{summary.get('failed', 0)} failed, "
@@ -124,9 +227,13 @@ def run(
 @app.command("status")
 def status(
     batch_id: str = typer.Option(..., "--batch-id", "-b", help="Batch ID to check"),
+    follow: bool = typer.Option(
+        False, "--follow", "-f", help="Live throughput, durations and ETA until the batch ends"
+    ),
+    interval: float = typer.Option(2.0, "--interval", help="Seconds between --follow refreshes"),
 ) -> None:
     """Show current ledger status for a batch."""
-    from claude_cli.batch.ledger import get_ledger_summary, load_ledger
+    from claude_cli.batch.workqueue import read_ledger
 
     project_root = _find_project_root()
     if project_root is None:
@@ -140,7 +247,11 @@ def status(
         console.print(f"[red]Batch not found: {batch_id}[/red]")
         raise typer.Exit(1)
 
-    ledger = load_ledger(ledger_path)
+    if follow:
+        _follow_status(batch_id, ledger_path, interval)
+        return
+
+    ledger = read_ledger(batch_dir)
     summary = ledger.get("summary", {})
 
     console.print(f"\n[bold]Batch: {batch_id}[/bold]")
@@ -183,12 +294,59 @@ def status(
     console.print()
 
 
+def _follow_status(batch_id: str, ledger_path: Path, interval: float) -> None:
+    """Redraw a progress table from the ledger journal until the batch ends."""
+    import time
+
+    from rich.live import Live
+
+    from claude_cli.batch.progress import ProgressTracker
+
+    tracker = ProgressTracker(ledger_path)
+    try:
+        progress = tracker.poll()
+        with Live(_progress_table(batch_id, progress), console=console) as live:
+            while not progress.finished:
+                time.sleep(interval)
+                progress = tracker.poll()
+                live.update(_progress_table(batch_id, progress))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        tracker.close()
+
+
+def _progress_table(batch_id: str, progress: Progress) -> Table:
+    """Render a Progress snapshot."""
+    from claude_cli.batch.progress import format_duration
+
+    def _ms(value: float | None) -> str:
+        return format_duration(value / 1000) if value is not None else "-"
+
+    rate = progress.items_per_min
+    table = Table(title=f"Batch: {batch_id}", show_header=False)
+    table.add_column("Metric", style="bold")
+    table.add_column("Value", justify="right")
+    table.add_row("Done", f"{progress.done} / {progress.total}", style="green")
+    failed = str(progress.failed)
+    if progress.retrying:
+        failed += f" ({progress.retrying} retrying)"
+    table.add_row("Failed", failed, style="red")
+    table.add_row("Active workers", str(progress.active), style="blue")
+    table.add_row("Pending", str(progress.pending))
+    table.add_row("Throughput", f"{rate:.1f} items/min" if rate is not None else "-")
+    table.add_row("Duration p50 / p95", f"{_ms(progress.p50_ms)} / {_ms(progress.p95_ms)}")
+    table.add_row("ETA", "done" if progress.finished else format_duration(progress.eta_s))
+    return table
+
+
 @app.command("report")
 def report(
     batch_id: str = typer.Option(..., "--batch-id", "-b", help="Batch ID to report on"),
 ) -> None:
     """Generate a summary report for a batch."""
     from claude_cli.batch.broker import generate_report
+    from claude_cli.batch.workqueue import read_ledger
 
     project_root = _find_project_root()
     if project_root is None:
@@ -200,7 +358,7 @@ def report(
         console.print(f"[red]Batch not found: {batch_id}[/red]")
         raise typer.Exit(1)
 
-    report_text = generate_report(batch_dir)
+    report_text = generate_report(batch_dir, read_ledger(batch_dir))
     console.print(report_text)
 
     # Also write to file
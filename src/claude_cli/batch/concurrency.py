@@ -0,0 +1,158 @@
+"""Adaptive concurrency control for batch runs.
+
+An AIMD (additive-increase, multiplicative-decrease) controller decides
+how many `claude -p` workers may be active at once. The limit grows by
+one after each full window of healthy completions and is halved on a
+failure, a timeout, or host pressure (load average, available memory).
+The configured parallel value is the ceiling.
+"""
+
+from __future__ import annotations
+
+import os
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable
+
+
+@dataclass
+class Adjustment:
+    """A single change to the concurrency limit."""
+
+    previous: int
+    limit: int
+    reason: str
+
+    def to_dict(self) -> dict:
+        """Serialize for the ledger's concurrency_log."""
+        return {"from": self.previous, "to": self.limit, "reason": self.reason}
+
+
+def system_pressure(
+    max_load_per_cpu: float = 1.5,
+    min_available_memory: float = 0.1,
+) -> str | None:
+    """Return a reason string if the host is overloaded, else None.
+
+    Args:
+        max_load_per_cpu: 1-minute load average per CPU considered overloaded.
+        min_available_memory: Fraction of RAM that must remain available.
+    """
+    cpus = os.cpu_count() or 1
+    try:
+        load1 = os.getloadavg()[0]
+    except (AttributeError, OSError):
+        load1 = None
+    if load1 is not None and load1 / cpus > max_load_per_cpu:
+        return f"load average {load1:.2f} on {cpus} CPUs"
+
+    available = _available_memory_fraction()
+    if available is not None and available < min_available_memory:
+        return f"available memory {available:.0%}"
+
+    return None
+
+
+class ConcurrencyController:
+    """AIMD controller for the number of active batch workers.
+
+    Failures are only acted on if the worker started after the most recent
+    decrease, so one burst of failures launched under the old limit causes
+    a single cut rather than collapsing the limit to the floor.
+    """
+
+    def __init__(
+        self,
+        ceiling: int,
+        initial: int | None = None,
+        floor: int = 1,
+        decrease_factor: float = 0.5,
+        slow_factor: float = 3.0,
+        pressure_check: Callable[[], str | None] = system_pressure,
+        pressure_cooldown: float = 30.0,
+    ) -> None:
+        self.ceiling = max(1, ceiling)
+        self.floor = max(1, min(floor, self.ceiling))
+        default_initial = max(self.floor, (self.ceiling + 1) // 2)
+        self.limit = min(self.ceiling, max(self.floor, initial or default_initial))
+        self.decrease_factor = decrease_factor
+        self.slow_factor = slow_factor
+        self.pressure_cooldown = pressure_cooldown
+        self._pressure_check = pressure_check
+        self._healthy_streak = 0
+        self._baseline_s: float | None = None
+        self._last_decrease = float("-inf")
+
+    def on_complete(self, exit_code: int, duration_s: float, started_at: float) -> Adjustment | None:
+        """Feed a worker completion into the controller.
+
+        Args:
+            exit_code: Process exit code.
+            duration_s: Wall-clock duration of the worker.
+            started_at: time.monotonic() when the worker was spawned.
+
+        Returns:
+            The adjustment made, or None if the limit is unchanged.
+        """
+        if exit_code != 0:
+            return self._decrease(f"exit code {exit_code}", started_at)
+
+        slow = self._baseline_s is not None and duration_s > self.slow_factor * self._baseline_s
+        self._baseline_s = (
+            duration_s if self._baseline_s is None else 0.8 * self._baseline_s + 0.2 * duration_s
+        )
+        if slow:
+            # Not a failure, but no evidence there is headroom either
+            self._healthy_streak = 0
+            return None
+
+        self._healthy_streak += 1
+        if self._healthy_streak >= self.limit and self.limit < self.ceiling:
+            return self._set(self.limit + 1, "healthy window")
+        return None
+
+    def on_timeout(self, started_at: float) -> Adjustment | None:
+        """Feed a worker that was killed for exceeding its timeout."""
+        return self._decrease("timeout", started_at)
+
+    def check_pressure(self) -> Adjustment | None:
+        """Back off if the host reports load or memory pressure."""
+        reason = self._pressure_check()
+        if reason is None:
+            return None
+        return self._decrease(reason, time.monotonic() - self.pressure_cooldown)
+
+    def _decrease(self, reason: str, started_at: float) -> Adjustment | None:
+        self._healthy_streak = 0
+        if started_at < self._last_decrease:
+            return None
+        target = max(self.floor, int(self.limit * self.decrease_factor))
+        if target == self.limit:
+            return None
+        self._last_decrease = time.monotonic()
+        return self._set(target, reason)
+
+    def _set(self, limit: int, reason: str) -> Adjustment:
+        adjustment = Adjustment(previous=self.limit, limit=limit, reason=reason)
+        self.limit = limit
+        self._healthy_streak = 0
+        return adjustment
+
+
+def _available_memory_fraction() -> float | None:
+    """Read MemAvailable/MemTotal from /proc/meminfo (Linux only)."""
+    meminfo = Path("/proc/meminfo")
+    if not meminfo.exists():
+        return None
+    values: dict[str, int] = {}
+    try:
+        for line in meminfo.read_text().splitlines():
+            key, _, rest = line.partition(":")
+            if key in ("MemTotal", "MemAvailable"):
+                values[key] = int(rest.split()[0])
+    except (OSError, ValueError, IndexError):
+        return None
+    if not values.get("MemTotal") or "MemAvailable" not in values:
+        return None
+    return values["MemAvailable"] / values["MemTotal"]
@@ -0,0 +1,229 @@
+"""Streaming discovery of batch items.
+
+Walks the project once, depth-first with each directory's entries in
+sorted order, and yields matching paths as it finds them rather than
+collecting and sorting the whole tree. Directories are pruned before
+they are entered when they cannot contain a match for the pattern, are
+ignored by a .gitignore (nested files apply below their directory), or
+match an exclude glob; .git is never entered.
+
+Glob semantics follow glob.glob(recursive=True): ``*`` and ``?`` stay
+within a path component, ``**`` spans directories, and hidden entries
+only match a pattern component that itself starts with a dot. Symlinked
+directories are not followed.
+
+Items can be split across machines with a shard: an item belongs to
+shard i/N by a hash of its path, so the split is stable no matter how
+the tree is walked or which other files exist.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import re
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, Iterator
+
+GITIGNORE = ".gitignore"
+
+
+@dataclass(frozen=True)
+class _Rule:
+    """One compiled .gitignore line (or exclude glob)."""
+
+    base: str  # directory the rule applies below, "" or ending in "/"
+    regex: re.Pattern[str]
+    negate: bool
+    dir_only: bool
+
+
+def parse_shard(spec: str) -> tuple[int, int]:
+    """Parse a ``i/N`` shard spec (1-based).
+
+    Raises:
+        ValueError: If the spec is malformed or i is outside 1..N.
+    """
+    index, sep, count = spec.partition("/")
+    try:
+        i, n = int(index), int(count)
+    except ValueError:
+        raise ValueError(f"Shard must be i/N, got: {spec}") from None
+    if not sep or n < 1 or not 1 <= i <= n:
+        raise ValueError(f"Shard must be i/N with 1 <= i <= N, got: {spec}")
+    return i, n
+
+
+def in_shard(item: str, shard: tuple[int, int]) -> bool:
+    """True if an item belongs to the given (i, N) shard."""
+    index, count = shard
+    digest = hashlib.blake2b(item.encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big") % count == index - 1
+
+
+def iter_items(
+    pattern: str,
+    base_dir: Path,
+    exclude: Iterable[str] = (),
+    gitignore: bool = True,
+    shard: tuple[int, int] | None = None,
+) -> Iterator[str]:
+    """Yield paths under base_dir matching a glob pattern, as they are found.
+
+    Args:
+        pattern: Glob pattern relative to base_dir (e.g. "src/**/*.py").
+        base_dir: Directory to search.
+        exclude: Extra globs, with .gitignore syntax, to leave out.
+        gitignore: Honour .gitignore files found in the walked tree.
+        shard: Only yield items of this (i, N) shard.
+
+    Yields:
+        Matching paths relative to base_dir, with "/" separators.
+    """
+    parts = [part for part in pattern.split("/") if part not in ("", ".")]
+    if not parts:
+        return
+    matcher = _PatternMatcher(parts)
+    rules = tuple(_compile_rule(line, "") for line in exclude)
+    rules = tuple(rule for rule in rules if rule is not None)
+
+    for path in _walk(base_dir, "", rules, matcher, gitignore):
+        if shard is None or in_shard(path, shard):
+            yield path
+
+
+class _PatternMatcher:
+    """Whole-path and per-directory matching for a split glob pattern."""
+
+    def __init__(self, parts: list[str]) -> None:
+        self.parts = parts
+        self.regex = re.compile(_glob_to_regex("/".join(parts)))
+        self.part_regexes = [
+            None if part == "**" else re.compile(_glob_to_regex(part)) for part in parts
+        ]
+        self.include_hidden = any(part.startswith(".") for part in parts)
+
+    def matches(self, path: str) -> bool:
+        return self.regex.match(path) is not None
+
+    def may_contain(self, dir_path: str) -> bool:
+        """False if nothing below this directory can match the pattern."""
+        for depth, name in enumerate(dir_path.split("/")):
+            if depth >= len(self.parts) - 1:
+                return self.parts[-1] == "**"
+            part_regex = self.part_regexes[depth]
+            if part_regex is None:
+                return True
+            if not part_regex.match(name):
+                return False
+        return True
+
+
+def _walk(
+    root: Path,
+    rel: str,
+    rules: tuple[_Rule, ...],
+    matcher: _PatternMatcher,
+    gitignore: bool,
+) -> Iterator[str]:
+    directory = root / rel if rel else root
+    if gitignore:
+        rules = rules + _load_gitignore(directory / GITIGNORE, rel)
+
+    try:
+        with os.scandir(directory) as it:
+            entries = [(entry.name, entry.is_dir(follow_symlinks=False)) for entry in it]
+    except OSError:
+        return
+
+    # Sorting directories as "name/" yields paths in plain string order
+    entries.sort(key=lambda entry: entry[0] + "/" if entry[1] else entry[0])
+    for name, is_dir in entries:
+        if name == ".git" or (name.startswith(".") and not matcher.include_hidden):
+            continue
+        path = rel + name
+        if _ignored(rules, path, is_dir):
+            continue
+        if matcher.matches(path):
+            yield path
+        if is_dir and matcher.may_contain(path):
+            yield from _walk(root, path + "/", rules, matcher, gitignore)
+
+
+def _ignored(rules: tuple[_Rule, ...], path: str, is_dir: bool) -> bool:
+    """Apply rules in order; the last matching rule decides."""
+    ignored = False
+    for rule in rules:
+        if rule.dir_only and not is_dir:
+            continue
+        if not path.startswith(rule.base):
+            continue
+        if rule.regex.match(path[len(rule.base):]):
+            ignored = not rule.negate
+    return ignored
+
+
+def _load_gitignore(path: Path, base: str) -> tuple[_Rule, ...]:
+    try:
+        lines = path.read_text(errors="replace").splitlines()
+    except OSError:
+        return ()
+    rules = (_compile_rule(line, base) for line in lines)
+    return tuple(rule for rule in rules if rule is not None)
+
+
+def _compile_rule(line: str, base: str) -> _Rule | None:
+    """Compile a .gitignore line; None for blanks and comments."""
+    line = line.rstrip()
+    if not line or line.startswith("#"):
+        return None
+    negate = line.startswith("!")
+    if negate:
+        line = line[1:]
+    elif line.startswith("\\"):
+        line = line[1:]  # escaped leading "#" or "!"
+    dir_only = line.endswith("/")
+    line = line.rstrip("/")
+    if not line:
+        return None
+    # A slash anywhere but the end anchors the pattern to its directory
+    if "/" in line:
+        line = line.lstrip("/")
+    else:
+        line = "**/" + line
+    return _Rule(base, re.compile(_glob_to_regex(line)), negate, dir_only)
+
+
+def _glob_to_regex(pattern: str) -> str:
+    """Translate a glob with ``**`` support into an anchored regex."""
+    out = []
+    i, n = 0, len(pattern)
+    while i < n:
+        if pattern.startswith("**/", i):
+            out.append("(?:.*/)?")
+            i += 3
+            continue
+        if pattern.startswith("**", i):
+            out.append(".*")
+            i += 2
+            continue
+        c = pattern[i]
+        i += 1
+        if c == "*":
+            out.append("[^/]*")
+        elif c == "?":
+            out.append("[^/]")
+        elif c == "[":
+            end = pattern.find("]", i + 1 if pattern[i:i + 1] in ("!", "]") else i)
+            if end == -1:
+                out.append(re.escape(c))
+                continue
+            body = pattern[i:end].replace("\\", "\\\\")
+            if body.startswith("!"):
+                body = "^" + body[1:]
+            out.append(f"[{body}]")
+            i = end + 1
+        else:
+            out.append(re.escape(c))
+    return "(?s:" + "".join(out) + r")\Z"
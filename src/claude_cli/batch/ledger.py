@@ -3,19 +3,44 @@
 Provides YAML-based ledger CRUD with atomic writes and resume support.
 Each batch gets a directory under {project}/.claude/batch/{batch_id}/
 containing a ledger.yaml and results/ subdirectory.
+
+Status transitions are appended to ledger.journal.jsonl next to the
+snapshot rather than rewriting the YAML, so each update is O(1).
+Readers replay the journal on top of the snapshot; once the journal
+grows past COMPACT_THRESHOLD_BYTES it is folded back into ledger.yaml.
+During a run the orchestrator holds a LedgerSession, which keeps the
+ledger in memory and batches journal appends.
 """
 
 from __future__ import annotations
 
+import json
 import os
+import signal
+import socket
 import tempfile
+import threading
+import time
+from contextlib import contextmanager
 from datetime import datetime, timezone
 from pathlib import Path
+from typing import IO, Callable, Iterable, Iterator
 
 import yaml
 
+from claude_cli.batch.retry import DEFAULT_MAX_ATTEMPTS, RetryPolicy
+
+# libyaml bindings are several times faster on large ledgers when available
+_YamlLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+_YamlDumper = getattr(yaml, "CSafeDumper", yaml.SafeDumper)
 
 SCHEMA_VERSION = "1.0"
+JOURNAL_SUFFIX = ".journal.jsonl"
+COMPACT_THRESHOLD_BYTES = 256 * 1024
+DEFAULT_FLUSH_INTERVAL = 5.0
+DEFAULT_FLUSH_EVERY = 50
+# Items serialized per YAML dump call when creating a ledger
+_CREATE_CHUNK = 1000
 
 
 def generate_batch_id() -> str:
@@ -25,19 +50,28 @@ def generate_batch_id() -> str:
 
 def create_ledger(
     batch_id: str,
-    items: list[str],
+    items: Iterable[str],
     prompt_template: str,
     config: dict,
     batch_dir: Path,
+    priorities: dict[str, int] | Callable[[str], int] | None = None,
 ) -> Path:
     """Create a new batch ledger YAML file.
 
+    Items are written in chunks as they are consumed, so ``items`` may be
+    a generator (e.g. from streaming discovery) and is never held in
+    memory as a whole.
+
     Args:
         batch_id: Unique batch identifier.
-        items: List of item paths/names to process.
+        items: Item paths/names to process.
         prompt_template: Prompt template with $item placeholder.
-        config: Batch configuration (parallel, max_turns, allowed_tools).
+        config: Batch configuration (parallel, max_turns, allowed_tools,
+            max_attempts, timeout, output_format, cache, schedule,
+            exclude, shard).
         batch_dir: Directory for this batch (created if needed).
+        priorities: Optional item -> priority mapping or function; higher
+            runs first (default 0).
 
     Returns:
         Path to the created ledger.yaml file.
@@ -45,8 +79,13 @@ def create_ledger(
     batch_dir.mkdir(parents=True, exist_ok=True)
     (batch_dir / "results").mkdir(exist_ok=True)
 
+    mapping = {} if callable(priorities) else (priorities or {})
+
+    def priority_of(item: str) -> int:
+        return priorities(item) if callable(priorities) else mapping.get(item, 0)
+
     now = datetime.now(timezone.utc).isoformat()
-    ledger = {
+    header = {
         "schema_version": SCHEMA_VERSION,
         "batch_id": batch_id,
         "created_at": now,
@@ -57,49 +96,84 @@ def create_ledger(
             "parallel": config.get("parallel", 5),
             "max_turns": config.get("max_turns", 20),
             "allowed_tools": config.get("allowed_tools", []),
+            "max_attempts": config.get("max_attempts", DEFAULT_MAX_ATTEMPTS),
+            "timeout": config.get("timeout"),
+            "output_format": config.get("output_format", "json"),
+            "cache": config.get("cache", False),
+            "schedule": config.get("schedule", "lpt"),
+            "exclude": config.get("exclude", []),
+            "shard": config.get("shard"),
+            "sample_interval": config.get("sample_interval"),
         },
-        "summary": {
-            "total": len(items),
-            "pending": len(items),
-            "active": 0,
-            "done": 0,
-            "failed": 0,
-        },
-        "items": [
-            {
-                "name": item,
-                "status": "pending",
-                "started_at": None,
-                "completed_at": None,
-                "pid": None,
-                "result_file": f"results/{_sanitize_name(item)}.json",
-                "summary": None,
-                "exit_code": None,
-            }
-            for item in items
-        ],
     }
 
     ledger_path = batch_dir / "ledger.yaml"
-    _atomic_write(ledger_path, ledger)
+    fd, tmp_path = tempfile.mkstemp(dir=batch_dir, suffix=".tmp", prefix=".ledger_")
+    try:
+        with os.fdopen(fd, "w") as f:
+            _dump_yaml(header, f)
+            f.write("items:")
+            total = 0
+            chunk: list[dict] = []
+            for item in items:
+                chunk.append({
+                    "name": item,
+                    "status": "pending",
+                    "started_at": None,
+                    "completed_at": None,
+                    "pid": None,
+                    "result_file": f"results/{_sanitize_name(item)}.json",
+                    "summary": None,
+                    "exit_code": None,
+                    "attempts": 0,
+                    "last_error_class": None,
+                    "priority": priority_of(item),
+                })
+                if len(chunk) >= _CREATE_CHUNK:
+                    _dump_items(chunk, f, first=total == 0)
+                    total += len(chunk)
+                    chunk = []
+            if chunk:
+                _dump_items(chunk, f, first=total == 0)
+                total += len(chunk)
+            elif total == 0:
+                f.write(" []\n")
+            summary = {"total": total, "pending": total, "active": 0, "done": 0, "failed": 0}
+            _dump_yaml({"summary": summary}, f)
+        os.rename(tmp_path, ledger_path)
+    except BaseException:
+        Path(tmp_path).unlink(missing_ok=True)
+        raise
+
+    journal_path_for(ledger_path).unlink(missing_ok=True)
     return ledger_path
 
 
-def load_ledger(ledger_path: Path) -> dict:
-    """Load ledger from YAML file.
+def journal_path_for(ledger_path: Path) -> Path:
+    """Return the journal file that accompanies a ledger snapshot."""
+    return ledger_path.with_suffix(JOURNAL_SUFFIX)
+
+
+def load_ledger(ledger_path: Path, replay: bool = True) -> dict:
+    """Load ledger from YAML snapshot plus any journaled transitions.
 
     Args:
         ledger_path: Path to ledger.yaml.
+        replay: Apply the journal on top of the snapshot. Readers that
+            tail the journal themselves pass False.
 
     Returns:
-        Parsed ledger dictionary.
+        Parsed ledger dictionary with the journal replayed on top.
 
     Raises:
         FileNotFoundError: If ledger file does not exist.
     """
     if not ledger_path.exists():
         raise FileNotFoundError(f"Ledger not found: {ledger_path}")
-    return yaml.safe_load(ledger_path.read_text()) or {}
+    ledger = yaml.load(ledger_path.read_text(), Loader=_YamlLoader) or {}
+    if replay:
+        _replay_journal(ledger, journal_path_for(ledger_path))
+    return ledger
 
 
 def update_item_status(
@@ -109,9 +183,15 @@ def update_item_status(
     result_summary: str | None = None,
     pid: int | None = None,
     exit_code: int | None = None,
+    attempts: int | None = None,
+    error_class: str | None = None,
+    metrics: dict | None = None,
 ) -> None:
     """Update a single item's status in the ledger.
 
+    The transition is appended to the journal; the YAML snapshot is only
+    rewritten on compaction.
+
     Args:
         ledger_path: Path to ledger.yaml.
         item_name: Name of the item to update.
@@ -119,46 +199,245 @@ def update_item_status(
         result_summary: One-line summary of the result.
         pid: OS process ID (set when status becomes active).
         exit_code: Process exit code (set when status becomes done/failed).
+        attempts: Number of attempts made so far (set when status becomes active).
+        error_class: Failure class (transient, permanent, timeout) for failed.
+        metrics: Extra per-attempt fields to store on the item, e.g.
+            duration_ms, total_tokens, tool_uses.
     """
-    ledger = load_ledger(ledger_path)
     now = datetime.now(timezone.utc).isoformat()
+    fields = transition_fields(
+        status, now, result_summary, pid, exit_code, attempts, error_class, metrics
+    )
+    append_journal(ledger_path, {"ts": now, "item": item_name, "set": fields})
 
-    for item in ledger.get("items", []):
-        if item["name"] == item_name:
-            item["status"] = status
-            if status == "active":
-                item["started_at"] = now
-                if pid is not None:
-                    item["pid"] = pid
-            elif status in ("done", "failed"):
-                item["completed_at"] = now
-                if exit_code is not None:
-                    item["exit_code"] = exit_code
-            if result_summary is not None:
-                item["summary"] = result_summary
-            break
-
-    # Recompute summary counts
-    ledger["summary"] = _compute_summary(ledger["items"])
-    ledger["updated_at"] = now
-    _atomic_write(ledger_path, ledger)
+
+def append_journal(ledger_path: Path, event: dict) -> None:
+    """Append one event to the ledger journal, compacting when it grows large.
+
+    Item events carry ``item`` and a ``set`` mapping of fields to overwrite,
+    plus ``from``, the item's previous status, when the writer knows it.
+    Ledger-level events carry ``append``, a mapping of top-level list keys
+    to one entry each (e.g. ``concurrency_log``). Replay applies events in
+    order and skips entries already present, so replaying twice is harmless.
+
+    Args:
+        ledger_path: Path to ledger.yaml.
+        event: Journal event (must include ``ts``).
+    """
+    if _append_events(ledger_path, [event]) >= COMPACT_THRESHOLD_BYTES:
+        compact_ledger(ledger_path)
+
+
+def compact_ledger(ledger_path: Path) -> dict:
+    """Fold the journal into the YAML snapshot and truncate the journal.
+
+    Args:
+        ledger_path: Path to ledger.yaml.
+
+    Returns:
+        The compacted ledger dictionary.
+    """
+    ledger = load_ledger(ledger_path)
+    _write_snapshot(ledger_path, ledger)
+    return ledger
+
+
+class LedgerSession:
+    """In-memory ledger handle for the single writer of a batch run.
+
+    Loads the ledger once, keeps a name -> item index and incremental
+    summary counts, and buffers journal events. Buffered events are
+    appended to the journal in one write every ``flush_every`` transitions
+    or ``flush_interval`` seconds; closing the session compacts the
+    journal into the snapshot.
+
+    Usage:
+        with LedgerSession(ledger_path) as session, session.flush_on_signals():
+            session.update_item_status("src/a.py", "active", pid=123)
+    """
+
+    def __init__(
+        self,
+        ledger_path: Path,
+        flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+        flush_every: int = DEFAULT_FLUSH_EVERY,
+    ) -> None:
+        self.ledger_path = ledger_path
+        self.flush_interval = flush_interval
+        self.flush_every = flush_every
+        self.ledger = load_ledger(ledger_path)
+        self.ledger["summary"] = _compute_summary(self.ledger.get("items", []))
+        self._index = {item["name"]: item for item in self.ledger.get("items", [])}
+        self._buffer: list[dict] = []
+        self._last_flush = time.monotonic()
+
+    def __enter__(self) -> LedgerSession:
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    @property
+    def summary(self) -> dict:
+        """Current status counts (maintained incrementally)."""
+        return self.ledger["summary"]
+
+    @property
+    def config(self) -> dict:
+        """Batch configuration from the ledger."""
+        return self.ledger.get("config", {})
+
+    def get_item(self, item_name: str) -> dict | None:
+        """Return the in-memory item dict for a name, or None."""
+        return self._index.get(item_name)
+
+    def get_resumable_items(self) -> list[str]:
+        """Return item names that are pending, or failed with retry budget left."""
+        return _resumable_names(self.ledger)
+
+    def update_item_status(
+        self,
+        item_name: str,
+        status: str,
+        result_summary: str | None = None,
+        pid: int | None = None,
+        exit_code: int | None = None,
+        attempts: int | None = None,
+        error_class: str | None = None,
+        metrics: dict | None = None,
+    ) -> None:
+        """Apply a status transition in memory and buffer its journal event.
+
+        Same semantics as the module-level update_item_status.
+        """
+        now = datetime.now(timezone.utc).isoformat()
+        fields = transition_fields(
+            status, now, result_summary, pid, exit_code, attempts, error_class, metrics
+        )
+        self._apply(item_name, fields, now)
+        self.maybe_flush()
+
+    def record_event(self, key: str, entry: dict) -> None:
+        """Append an entry to a top-level ledger log (e.g. concurrency_log).
+
+        The entry is timestamped with ``at`` and journaled like a transition.
+        """
+        now = datetime.now(timezone.utc).isoformat()
+        entry = {"at": now, **entry}
+        self.ledger.setdefault(key, []).append(entry)
+        self.ledger["updated_at"] = now
+        self._buffer.append({"ts": now, "append": {key: entry}})
+        self.maybe_flush()
+
+    def apply_fields(self, item_name: str, fields: dict) -> None:
+        """Apply already-built item fields (e.g. folded in from a work queue)."""
+        self._apply(item_name, fields, datetime.now(timezone.utc).isoformat())
+        self.maybe_flush()
+
+    def reset_stale_active(self) -> list[str]:
+        """Reset items stuck in 'active' with dead PIDs back to 'pending'.
+
+        Items claimed by a worker on another host are left alone; their
+        lease in the work queue decides whether they are stale.
+
+        Returns:
+            List of item names that were reset.
+        """
+        now = datetime.now(timezone.utc).isoformat()
+        reset_items = []
+        for item in self.ledger.get("items", []):
+            if _is_stale(item):
+                fields = {"status": "pending", "pid": None, "started_at": None}
+                self._apply(item["name"], fields, now)
+                reset_items.append(item["name"])
+
+        if reset_items:
+            self.flush()
+        return reset_items
+
+    def maybe_flush(self) -> None:
+        """Flush if the transition count or time threshold has been reached."""
+        if not self._buffer:
+            return
+        elapsed = time.monotonic() - self._last_flush
+        if len(self._buffer) >= self.flush_every or elapsed >= self.flush_interval:
+            self.flush()
+
+    def flush(self) -> None:
+        """Append all buffered events to the journal in a single write."""
+        events, self._buffer = self._buffer, []
+        self._last_flush = time.monotonic()
+        if events and _append_events(self.ledger_path, events) >= COMPACT_THRESHOLD_BYTES:
+            self.compact()
+
+    def compact(self) -> None:
+        """Write the in-memory ledger as the snapshot and drop the journal."""
+        self._buffer = []
+        self._last_flush = time.monotonic()
+        _write_snapshot(self.ledger_path, self.ledger)
+
+    def close(self) -> None:
+        """Flush outstanding transitions and compact the journal."""
+        self.compact()
+
+    @contextmanager
+    def flush_on_signals(self) -> Iterator[None]:
+        """Flush the buffer before SIGINT/SIGTERM interrupt the run.
+
+        SIGINT still raises KeyboardInterrupt and SIGTERM raises SystemExit,
+        so callers unwind normally. Handlers can only be installed from the
+        main thread; elsewhere this is a no-op.
+        """
+        if threading.current_thread() is not threading.main_thread():
+            yield
+            return
+
+        def _handler(signum: int, frame: object) -> None:
+            self.flush()
+            if signum == signal.SIGINT:
+                raise KeyboardInterrupt
+            raise SystemExit(128 + signum)
+
+        previous = {
+            sig: signal.signal(sig, _handler) for sig in (signal.SIGINT, signal.SIGTERM)
+        }
+        try:
+            yield
+        finally:
+            for sig, handler in previous.items():
+                signal.signal(sig, handler)
+
+    def _apply(self, item_name: str, fields: dict, now: str) -> None:
+        event = {"ts": now, "item": item_name, "set": fields}
+        item = self._index.get(item_name)
+        if item is not None:
+            counts = self.ledger["summary"]
+            old_status = item.get("status", "pending")
+            new_status = fields.get("status", old_status)
+            if old_status in counts:
+                counts[old_status] -= 1
+            if new_status in counts:
+                counts[new_status] += 1
+            item.update(fields)
+            # Lets journal readers keep counts without tracking every item
+            event["from"] = old_status
+        self.ledger["updated_at"] = now
+        self._buffer.append(event)
 
 
 def get_resumable_items(ledger_path: Path) -> list[str]:
     """Return item names that are pending or failed (eligible for retry).
 
+    Failed items are only returned while they have attempts left under the
+    ledger's ``config.max_attempts`` and were not classified permanent.
+
     Args:
         ledger_path: Path to ledger.yaml.
 
     Returns:
-        List of item names with status pending or failed.
+        List of item names with status pending or retryable failed.
     """
-    ledger = load_ledger(ledger_path)
-    return [
-        item["name"]
-        for item in ledger.get("items", [])
-        if item.get("status") in ("pending", "failed")
-    ]
+    return _resumable_names(load_ledger(ledger_path))
 
 
 def get_active_items(ledger_path: Path) -> list[dict]:
@@ -193,6 +472,8 @@ def reset_stale_active(ledger_path: Path) -> list[str]:
     """Reset items stuck in 'active' with dead PIDs back to 'pending'.
 
     Checks if the PID is still running. If not, resets to pending.
+    Items recorded with another ``host`` (multi-node workers) are skipped,
+    since their PID means nothing here.
 
     Returns:
         List of item names that were reset.
@@ -201,21 +482,111 @@ def reset_stale_active(ledger_path: Path) -> list[str]:
     reset_items = []
 
     for item in ledger.get("items", []):
-        if item.get("status") == "active" and item.get("pid"):
-            if not _is_process_alive(item["pid"]):
-                item["status"] = "pending"
-                item["pid"] = None
-                item["started_at"] = None
-                reset_items.append(item["name"])
+        if _is_stale(item):
+            item["status"] = "pending"
+            item["pid"] = None
+            item["started_at"] = None
+            reset_items.append(item["name"])
 
     if reset_items:
         ledger["summary"] = _compute_summary(ledger["items"])
         ledger["updated_at"] = datetime.now(timezone.utc).isoformat()
-        _atomic_write(ledger_path, ledger)
+        _write_snapshot(ledger_path, ledger)
 
     return reset_items
 
 
+def transition_fields(
+    status: str,
+    now: str,
+    result_summary: str | None,
+    pid: int | None,
+    exit_code: int | None,
+    attempts: int | None = None,
+    error_class: str | None = None,
+    metrics: dict | None = None,
+) -> dict:
+    """Build the item fields written by a status transition.
+
+    Shared by the ledger writers and the multi-node work queue so both
+    record identical fields for the same transition.
+    """
+    fields: dict = {"status": status, **(metrics or {})}
+    if attempts is not None:
+        fields["attempts"] = attempts
+    if status == "done":
+        fields["last_error_class"] = None
+    elif error_class is not None:
+        fields["last_error_class"] = error_class
+    if status == "active":
+        fields["started_at"] = now
+        if pid is not None:
+            fields["pid"] = pid
+    elif status in ("done", "failed"):
+        fields["completed_at"] = now
+        if exit_code is not None:
+            fields["exit_code"] = exit_code
+    if result_summary is not None:
+        fields["summary"] = result_summary
+    return fields
+
+
+def _append_events(ledger_path: Path, events: list[dict]) -> int:
+    """Append events to the journal in one write; return the journal size."""
+    journal = journal_path_for(ledger_path)
+    data = "".join(json.dumps(event, default=str) + "\n" for event in events)
+    fd = os.open(journal, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+    try:
+        os.write(fd, data.encode())
+        return os.fstat(fd).st_size
+    finally:
+        os.close(fd)
+
+
+def _resumable_names(ledger: dict) -> list[str]:
+    """Names of pending items plus failed items with retry budget left."""
+    policy = RetryPolicy(
+        max_attempts=ledger.get("config", {}).get("max_attempts", DEFAULT_MAX_ATTEMPTS)
+    )
+    names = []
+    for item in ledger.get("items", []):
+        status = item.get("status")
+        if status == "pending" or (
+            status == "failed"
+            and policy.should_retry(item.get("attempts") or 0, item.get("last_error_class"))
+        ):
+            names.append(item["name"])
+    return names
+
+
+def _replay_journal(ledger: dict, journal: Path) -> None:
+    """Apply journaled item events to a snapshot in place."""
+    if not journal.exists():
+        return
+
+    index = {item["name"]: item for item in ledger.get("items", [])}
+    last_ts = None
+    with journal.open() as f:
+        for line in f:
+            try:
+                event = json.loads(line)
+            except json.JSONDecodeError:
+                # Torn trailing write from a crash; everything before it is valid
+                break
+            item = index.get(event.get("item"))
+            if item is not None:
+                item.update(event.get("set", {}))
+            for key, entry in event.get("append", {}).items():
+                log = ledger.setdefault(key, [])
+                if entry not in log:
+                    log.append(entry)
+            last_ts = event.get("ts", last_ts)
+
+    if last_ts is not None:
+        ledger["summary"] = _compute_summary(ledger.get("items", []))
+        ledger["updated_at"] = last_ts
+
+
 def _compute_summary(items: list[dict]) -> dict:
     """Compute status counts from item list."""
     counts = {"total": len(items), "pending": 0, "active": 0, "done": 0, "failed": 0}
@@ -234,6 +605,30 @@ def _sanitize_name(item: str) -> str:
     return item.replace("/", "_").replace("\\", "_").replace(".", "_").rstrip("_")
 
 
+def _write_snapshot(ledger_path: Path, ledger: dict) -> None:
+    """Atomically replace the snapshot, then discard the folded-in journal.
+
+    A crash between the two steps leaves events that are already in the
+    snapshot; replaying them again is idempotent.
+    """
+    _atomic_write(ledger_path, ledger)
+    try:
+        os.unlink(journal_path_for(ledger_path))
+    except FileNotFoundError:
+        pass
+
+
+def _dump_yaml(data: object, stream: IO[str]) -> None:
+    yaml.dump(data, stream, Dumper=_YamlDumper, default_flow_style=False, sort_keys=False)
+
+
+def _dump_items(chunk: list[dict], stream: IO[str], first: bool) -> None:
+    """Append a chunk of items to an open ``items:`` block sequence."""
+    if first:
+        stream.write("\n")
+    _dump_yaml(chunk, stream)
+
+
 def _atomic_write(path: Path, data: dict) -> None:
     """Write YAML atomically via temp file + rename."""
     fd, tmp_path = tempfile.mkstemp(
@@ -241,7 +636,7 @@ def _atomic_write(path: Path, data: dict) -> None:
     )
     try:
         with os.fdopen(fd, "w") as f:
-            yaml.dump(data, f, default_flow_style=False, sort_keys=False)
+            _dump_yaml(data, f)
         os.rename(tmp_path, path)
     except Exception:
         # Clean up temp file on failure
@@ -252,6 +647,16 @@ def _atomic_write(path: Path, data: dict) -> None:
         raise
 
 
+def _is_stale(item: dict) -> bool:
+    """True if an active item's worker process on this host has died."""
+    if item.get("status") != "active" or not item.get("pid"):
+        return False
+    host = item.get("host")
+    if host is not None and host != socket.gethostname():
+        return False
+    return not _is_process_alive(item["pid"])
+
+
 def _is_process_alive(pid: int) -> bool:
     """Check if a process with given PID is still running."""
     try:
@@ -2,39 +2,92 @@
 
 Discovers items via glob, spawns `claude -p` processes with controlled
 parallelism, and tracks completion via the ledger.
+
+Completion is event-driven: each child gets a waiter thread blocked in
+wait4() that posts to a queue the moment the child exits, so a freed
+slot is refilled immediately instead of on the next poll tick. The
+child's rusage from wait4() is recorded on its item (see resources).
+
+Items come from a source: the ledger's resumable items in schedule order
+for a single-host run, or claims on a shared WorkQueue for a worker of a
+multi-node run (see run_worker).
 """
 
 from __future__ import annotations
 
-import glob as globmod
+import heapq
+import os
+import queue
 import shutil
+import signal
 import subprocess
+import threading
 import time
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
 from typing import Callable
 
-from claude_cli.batch.broker import sanitize_item_name
+from claude_cli.batch.broker import index_result, sanitize_item_name
+from claude_cli.batch.cache import DEFAULT_CACHE_MAX_BYTES, ResultCache, cache_key
+from claude_cli.batch.capture import StreamCapture, capture_file, tee_stream
+from claude_cli.batch.concurrency import Adjustment, ConcurrencyController
+from claude_cli.batch.discovery import iter_items
 from claude_cli.batch.ledger import (
-    get_resumable_items,
-    load_ledger,
-    reset_stale_active,
-    update_item_status,
+    DEFAULT_FLUSH_EVERY,
+    DEFAULT_FLUSH_INTERVAL,
+    LedgerSession,
+)
+from claude_cli.batch.resources import merge_peaks, sample_proc, wait_with_usage
+from claude_cli.batch.retry import (
+    DEFAULT_MAX_ATTEMPTS,
+    EXIT_NOT_EXECUTABLE,
+    EXIT_NOT_FOUND,
+    PERMANENT,
+    RetryPolicy,
+    classify_failure,
+)
+from claude_cli.batch.scheduler import load_duration_history, order_items
+from claude_cli.batch.workqueue import (
+    DEFAULT_LEASE_SECONDS,
+    QueueSession,
+    QueueSource,
+    WorkQueue,
+    default_worker_id,
+    queue_path_for,
+    retire_queue,
+    sync_ledger,
 )
 
+# Seconds between SIGTERM and SIGKILL for a worker that overran its timeout
+TIMEOUT_KILL_GRACE = 10.0
+# Seconds to wait for buffered output after a worker exits
+OUTPUT_DRAIN_TIMEOUT = 5.0
 
-def discover_items(pattern: str, base_dir: Path | None = None) -> list[str]:
+
+def discover_items(
+    pattern: str,
+    base_dir: Path | None = None,
+    exclude: list[str] | None = None,
+    gitignore: bool = True,
+    shard: tuple[int, int] | None = None,
+) -> list[str]:
     """Glob-expand a pattern to find items.
 
     Args:
         pattern: Glob pattern (e.g., "src/**/*.py").
         base_dir: Base directory for the glob (defaults to cwd).
+        exclude: Extra globs (.gitignore syntax) to leave out.
+        gitignore: Honour .gitignore files under base_dir.
+        shard: Only return items of this (i, N) shard.
 
     Returns:
-        Sorted list of matching file paths (relative to base_dir).
+        Sorted list of matching file paths (relative to base_dir). Use
+        discovery.iter_items to stream them instead.
     """
     base = base_dir or Path.cwd()
-    matches = sorted(globmod.glob(pattern, root_dir=str(base), recursive=True))
-    return matches
+    return list(iter_items(pattern, base, exclude or (), gitignore, shard))
 
 
 def build_command(
@@ -43,6 +96,7 @@ def build_command(
     allowed_tools: list[str] | None = None,
     max_turns: int = 20,
     output_file: Path | None = None,
+    output_format: str = "json",
 ) -> list[str]:
     """Build the `claude -p` command for a single item.
 
@@ -52,12 +106,17 @@ def build_command(
         allowed_tools: List of tools to pre-approve.
         max_turns: Maximum conversation turns.
         output_file: Path for JSON output (used for shell redirection, not in command).
+        output_format: "json" for a single result object, or "stream-json"
+            for per-event lines (adds --verbose, enables tool-use counts).
 
     Returns:
         Command as list of strings for subprocess.Popen.
     """
     prompt = prompt_template.replace("$item", item)
-    cmd = ["claude", "-p", prompt, "--output-format", "json"]
+    cmd = ["claude", "-p", prompt, "--output-format", output_format]
+    if output_format == "stream-json":
+        # Headless stream-json output requires --verbose
+        cmd.append("--verbose")
 
     if allowed_tools:
         cmd.extend(["--allowedTools", ",".join(allowed_tools)])
@@ -72,118 +131,585 @@ def find_claude_binary() -> str | None:
     return shutil.which("claude")
 
 
+@dataclass
+class _Worker:
+    """A running `claude -p` attempt for one item."""
+
+    proc: subprocess.Popen
+    output_path: Path
+    started: float  # time.monotonic() at spawn
+    attempt: int
+    capture: StreamCapture
+    terminated_at: float | None = None  # set when killed for its timeout
+    sampled: dict = field(default_factory=dict)  # peaks seen by /proc sampling
+
+
 def run_batch(
     batch_dir: Path,
     parallel: int = 5,
     on_complete: Callable[[str, int], None] | None = None,
     poll_interval: float = 2.0,
+    flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+    flush_every: int = DEFAULT_FLUSH_EVERY,
+    adaptive: bool = False,
+    timeout: float | None = None,
+    retry: RetryPolicy | None = None,
+    use_cache: bool | None = None,
 ) -> dict:
     """Spawn and manage parallel headless instances.
 
     Args:
         batch_dir: Batch directory containing ledger.yaml.
-        parallel: Maximum concurrent processes.
+        parallel: Maximum concurrent processes (the ceiling when adaptive).
         on_complete: Callback(item_name, exit_code) called per completion.
-        poll_interval: Seconds between polling cycles.
+        poll_interval: Maximum seconds the loop blocks waiting for a
+            completion before running a housekeeping pass. Exits are
+            delivered immediately regardless of this value.
+        flush_interval: Maximum seconds ledger transitions stay buffered.
+        flush_every: Flush the ledger after this many buffered transitions.
+        adaptive: Let an AIMD controller vary the number of active workers
+            between 1 and ``parallel``; adjustments go to the ledger's
+            concurrency_log.
+        timeout: Per-item wall-clock limit in seconds; overrides the
+            ledger's ``config.timeout``. None means no limit.
+        retry: Retry policy for failed attempts; defaults to the ledger's
+            ``config.max_attempts`` with exponential backoff.
+        use_cache: Reuse results of unchanged items from earlier batches;
+            overrides the ledger's ``config.cache``.
 
     Returns:
         Final ledger summary dict.
+
+    Raises:
+        RuntimeError: Multi-node workers still hold leases on the batch.
     """
     ledger_path = batch_dir / "ledger.yaml"
-    results_dir = batch_dir / "results"
-    results_dir.mkdir(exist_ok=True)
+    retire_queue(batch_dir)
+    with LedgerSession(ledger_path, flush_interval, flush_every) as session:
+        with session.flush_on_signals():
+            controller = ConcurrencyController(parallel) if adaptive else None
+            source = _LocalSource(_dispatch_order(batch_dir, session))
+            return _execute(
+                batch_dir, session, source, parallel, on_complete, poll_interval,
+                controller, timeout, retry, use_cache,
+            )
 
-    ledger = load_ledger(ledger_path)
-    config = ledger.get("config", {})
-    prompt_template = config.get("prompt_template", "")
-    allowed_tools = config.get("allowed_tools")
-    max_turns = config.get("max_turns", 20)
 
-    # Get items to process
-    pending = get_resumable_items(ledger_path)
-    if not pending:
-        return ledger.get("summary", {})
+def resume_batch(
+    batch_dir: Path,
+    parallel: int = 5,
+    on_complete: Callable[[str, int], None] | None = None,
+    poll_interval: float = 2.0,
+    flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+    flush_every: int = DEFAULT_FLUSH_EVERY,
+    adaptive: bool = False,
+    timeout: float | None = None,
+    retry: RetryPolicy | None = None,
+    use_cache: bool | None = None,
+) -> dict:
+    """Resume a batch from its ledger, skipping completed items.
+
+    Detects stale 'active' items (dead PIDs) and resets them to pending.
+    Failed items are retried only while they have attempts left.
 
-    # Active process pool: {item_name: (Popen, output_path)}
-    active: dict[str, tuple[subprocess.Popen, Path]] = {}
-    remaining = list(pending)
+    Args:
+        batch_dir: Batch directory containing ledger.yaml.
+        parallel: Maximum concurrent processes.
+        on_complete: Callback per item completion.
+        poll_interval: See run_batch.
+        flush_interval: See run_batch.
+        flush_every: See run_batch.
+        adaptive: See run_batch.
+        timeout: See run_batch.
+        retry: See run_batch.
+        use_cache: See run_batch.
 
-    while remaining or active:
-        # Spawn new processes up to parallel limit
-        while remaining and len(active) < parallel:
-            item = remaining.pop(0)
-            safe_name = sanitize_item_name(item)
-            output_path = results_dir / f"{safe_name}.json"
+    Returns:
+        Final ledger summary dict.
 
-            cmd = build_command(
-                item, prompt_template, allowed_tools, max_turns, output_path
+    Raises:
+        RuntimeError: Multi-node workers still hold leases on the batch.
+    """
+    ledger_path = batch_dir / "ledger.yaml"
+    retire_queue(batch_dir)
+    with LedgerSession(ledger_path, flush_interval, flush_every) as session:
+        with session.flush_on_signals():
+            # Reset stale active items
+            session.reset_stale_active()
+            controller = ConcurrencyController(parallel) if adaptive else None
+            source = _LocalSource(_dispatch_order(batch_dir, session))
+            return _execute(
+                batch_dir, session, source, parallel, on_complete, poll_interval,
+                controller, timeout, retry, use_cache,
             )
 
-            output_fh = open(output_path, "w")
-            proc = subprocess.Popen(
-                cmd,
-                stdout=output_fh,
-                stderr=subprocess.STDOUT,
-                cwd=str(batch_dir.parent.parent.parent),  # project root
+
+def run_worker(
+    batch_dir: Path,
+    parallel: int = 5,
+    on_complete: Callable[[str, int], None] | None = None,
+    poll_interval: float = 2.0,
+    worker_id: str | None = None,
+    lease_seconds: float = DEFAULT_LEASE_SECONDS,
+    adaptive: bool = False,
+    timeout: float | None = None,
+    retry: RetryPolicy | None = None,
+    use_cache: bool | None = None,
+) -> dict:
+    """Process a batch as one of several cooperating workers.
+
+    Items are claimed from the batch's shared WorkQueue (seeded from the
+    ledger by whichever worker gets there first) under leases this worker
+    renews while they run; items of a worker that stops heartbeating are
+    picked up by the others once its leases expire. Returns when no item
+    is pending or leased anywhere, after folding the queue into the ledger.
+
+    Args:
+        batch_dir: Batch directory containing ledger.yaml, on storage
+            shared by all workers.
+        parallel: Maximum concurrent processes on this worker.
+        on_complete: Callback per item completion.
+        poll_interval: See run_batch; also how often an idle worker
+            checks the queue for claimable items.
+        worker_id: Unique name for this worker (default ``host:pid``).
+        lease_seconds: How long a claim survives without a heartbeat.
+        adaptive: See run_batch.
+        timeout: See run_batch.
+        retry: See run_batch.
+        use_cache: See run_batch.
+
+    Returns:
+        Ledger summary dict after syncing.
+    """
+    ledger_path = batch_dir / "ledger.yaml"
+    worker_id = worker_id or default_worker_id()
+    work_queue = WorkQueue(queue_path_for(batch_dir), lease_seconds)
+    try:
+        session = QueueSession(ledger_path, work_queue, worker_id)
+        work_queue.seed(_dispatch_order(batch_dir, session))
+        controller = ConcurrencyController(parallel) if adaptive else None
+        source = QueueSource(work_queue, worker_id, poll_interval)
+        try:
+            _execute(
+                batch_dir, session, source, parallel, on_complete, poll_interval,
+                controller, timeout, retry, use_cache,
             )
+        finally:
+            summary = sync_ledger(ledger_path, work_queue)
+        return summary
+    finally:
+        work_queue.close()
 
-            active[item] = (proc, output_path)
-            update_item_status(ledger_path, item, "active", pid=proc.pid)
 
-        # Poll for completions
-        completed = []
-        for item, (proc, output_path) in active.items():
-            retcode = proc.poll()
-            if retcode is not None:
-                completed.append(item)
-                status = "done" if retcode == 0 else "failed"
-                summary = _extract_summary(output_path)
+class _LocalSource:
+    """Dispatch order for a single-host run: a deque plus a retry backoff heap."""
 
-                update_item_status(
-                    ledger_path,
-                    item,
-                    status,
-                    result_summary=summary,
-                    exit_code=retcode,
-                )
+    def __init__(self, items: list[str]) -> None:
+        self.remaining = deque(items)
+        # Failed items waiting out their backoff: heap of (ready_at, item)
+        self.backoff: list[tuple[float, str]] = []
 
-                if on_complete:
-                    on_complete(item, retcode)
+    def take(self) -> str | None:
+        now = time.monotonic()
+        while self.backoff and self.backoff[0][0] <= now:
+            self.remaining.append(heapq.heappop(self.backoff)[1])
+        return self.remaining.popleft() if self.remaining else None
 
-        for item in completed:
-            # Close the file handle
-            proc, output_path = active.pop(item)
-            # stdout file handle was already closed by Popen when process ended
+    def retry_later(self, item: str, delay: float) -> None:
+        heapq.heappush(self.backoff, (time.monotonic() + delay, item))
 
-        if active and not completed:
-            time.sleep(poll_interval)
+    def has_more(self) -> bool:
+        return bool(self.remaining or self.backoff)
 
-    return load_ledger(ledger_path).get("summary", {})
+    def heartbeat(self) -> None:
+        pass
 
+    def wakeup_in(self) -> float | None:
+        if not self.backoff:
+            return None
+        return self.backoff[0][0] - time.monotonic()
 
-def resume_batch(
+
+def _dispatch_order(batch_dir: Path, session: LedgerSession | QueueSession) -> list[str]:
+    """Resumable items of a session in the batch's configured schedule."""
+    pending = session.get_resumable_items()
+    if pending and session.config.get("schedule", "lpt") == "lpt":
+        project_root = batch_dir.parent.parent.parent
+        history = load_duration_history(batch_dir.parent, exclude=batch_dir)
+        pending = order_items(pending, session.ledger, project_root, history)
+    return pending
+
+
+def _execute(
     batch_dir: Path,
-    parallel: int = 5,
-    on_complete: Callable[[str, int], None] | None = None,
+    session: LedgerSession | QueueSession,
+    source: _LocalSource | QueueSource,
+    parallel: int,
+    on_complete: Callable[[str, int], None] | None,
+    poll_interval: float,
+    controller: ConcurrencyController | None = None,
+    timeout: float | None = None,
+    retry: RetryPolicy | None = None,
+    use_cache: bool | None = None,
 ) -> dict:
-    """Resume a batch from its ledger, skipping completed items.
+    """Run items from a source to completion, recording transitions in the session."""
+    project_root = batch_dir.parent.parent.parent
+    results_dir = batch_dir / "results"
+    results_dir.mkdir(exist_ok=True)
 
-    Detects stale 'active' items (dead PIDs) and resets them to pending.
+    config = session.config
+    prompt_template = config.get("prompt_template", "")
+    allowed_tools = config.get("allowed_tools")
+    max_turns = config.get("max_turns", 20)
+    output_format = config.get("output_format", "json")
+    if timeout is None:
+        timeout = config.get("timeout")
+    if retry is None:
+        retry = RetryPolicy(max_attempts=config.get("max_attempts", DEFAULT_MAX_ATTEMPTS))
+    if use_cache is None:
+        use_cache = bool(config.get("cache"))
+    sample_interval = config.get("sample_interval")
+    next_sample = time.monotonic()
+    cache = None
+    if use_cache:
+        max_bytes = config.get("cache_max_bytes") or DEFAULT_CACHE_MAX_BYTES
+        cache = ResultCache(batch_dir.parent / "cache", max_bytes)
+    cache_keys: dict[str, str] = {}
+
+    if not source.has_more():
+        return session.summary
+
+    active: dict[str, _Worker] = {}
+    completions: queue.Queue[tuple[str, int, dict]] = queue.Queue()
+
+    if controller is not None:
+        _record_adjustment(session, Adjustment(0, controller.limit, "start"))
 
-    Args:
-        batch_dir: Batch directory containing ledger.yaml.
-        parallel: Maximum concurrent processes.
-        on_complete: Callback per item completion.
+    try:
+        while source.has_more() or active:
+            limit = controller.limit if controller is not None else parallel
+
+            # Spawn new processes up to the concurrency limit
+            while len(active) < limit:
+                item = source.take()
+                if item is None:
+                    break
+                safe_name = sanitize_item_name(item)
+                output_path = results_dir / f"{safe_name}.json"
+
+                cmd = build_command(
+                    item, prompt_template, allowed_tools, max_turns, output_path, output_format
+                )
 
-    Returns:
-        Final ledger summary dict.
-    """
-    ledger_path = batch_dir / "ledger.yaml"
+                if cache is not None:
+                    if item not in cache_keys:
+                        cache_keys[item] = cache_key(project_root, item, cmd)
+                    meta = cache.lookup(cache_keys[item])
+                    if meta is not None:
+                        cache.materialize(cache_keys[item], output_path)
+                        session.update_item_status(
+                            item,
+                            "done",
+                            result_summary=meta.get("summary"),
+                            exit_code=0,
+                            metrics={"cache_hit": True},
+                        )
+                        _index_completion(
+                            output_path, item, "done", meta.get("summary"), 0, {"cache_hit": True}
+                        )
+                        if on_complete:
+                            on_complete(item, 0)
+                        continue
+
+                # Replace rather than truncate: the old file may be a cache hard link
+                output_path.unlink(missing_ok=True)
+                attempt = ((session.get_item(item) or {}).get("attempts") or 0) + 1
+                try:
+                    proc = subprocess.Popen(
+                        cmd,
+                        stdout=subprocess.PIPE,
+                        stderr=subprocess.STDOUT,
+                        cwd=str(project_root),
+                        # Own process group so timeouts reach the worker's children too
+                        start_new_session=True,
+                    )
+                except (FileNotFoundError, PermissionError) as exc:
+                    _record_spawn_failure(session, item, attempt, exc, output_path)
+                    if on_complete:
+                        on_complete(item, _spawn_exit_code(exc))
+                    continue
+
+                capture = StreamCapture()
+                active[item] = _Worker(proc, output_path, time.monotonic(), attempt, capture)
+                session.update_item_status(item, "active", pid=proc.pid, attempts=attempt)
+                _start_waiter(item, proc, output_path, capture, completions)
+
+            source.heartbeat()
+            _enforce_timeouts(active, timeout)
+            wakeup = _next_wakeup(active, source.wakeup_in(), timeout, poll_interval)
+            if sample_interval:
+                now = time.monotonic()
+                if now >= next_sample:
+                    _sample_workers(active)
+                    next_sample = now + sample_interval
+                wakeup = max(0.0, min(wakeup, next_sample - now))
+
+            # Block until a child exits, a deadline passes, or a backoff expires
+            try:
+                item, retcode, usage = completions.get(timeout=wakeup)
+            except queue.Empty:
+                if controller is not None:
+                    _record_adjustment(session, controller.check_pressure())
+                session.maybe_flush()
+                continue
+
+            worker = active.pop(item)
+            duration = time.monotonic() - worker.started
+            summary = worker.capture.summary_text()
+            metrics = {
+                "duration_ms": int(duration * 1000),
+                **worker.capture.metrics(),
+                **merge_peaks(usage, worker.sampled),
+            }
+            if cache is not None:
+                metrics["cache_hit"] = False
+            timed_out = worker.terminated_at is not None
+            error_class = None
+
+            if retcode == 0 and not timed_out:
+                session.update_item_status(
+                    item, "done", result_summary=summary, exit_code=retcode, metrics=metrics
+                )
+                if cache is not None:
+                    meta = {"item": item, "summary": summary}
+                    cache.store(cache_keys[item], worker.output_path, meta)
+            else:
+                error_class = classify_failure(
+                    retcode, worker.capture.result_subtype, timed_out
+                )
+                session.update_item_status(
+                    item,
+                    "failed",
+                    result_summary=summary,
+                    exit_code=retcode,
+                    error_class=error_class,
+                    metrics=metrics,
+                )
+                if retry.should_retry(worker.attempt, error_class):
+                    source.retry_later(item, retry.delay(worker.attempt))
 
-    # Reset stale active items
-    reset_items = reset_stale_active(ledger_path)
+            _index_completion(
+                worker.output_path, item, "failed" if error_class else "done",
+                summary, retcode, {**metrics, "attempts": worker.attempt},
+            )
 
-    return run_batch(batch_dir, parallel, on_complete)
+            if controller is not None:
+                if timed_out:
+                    _record_adjustment(session, controller.on_timeout(worker.started))
+                elif error_class != PERMANENT:
+                    # A poisoned item says nothing about upstream capacity
+                    _record_adjustment(
+                        session, controller.on_complete(retcode, duration, worker.started)
+                    )
+                _record_adjustment(session, controller.check_pressure())
+
+            if on_complete:
+                on_complete(item, retcode)
+
+    finally:
+        # Workers run in their own sessions, so a Ctrl-C or SIGTERM aimed at
+        # the orchestrator does not reach them; stop them on the way out
+        if active:
+            _stop_workers(session, active, completions)
+
+    if cache is not None:
+        cache.evict()
+
+    return session.summary
+
+
+def _stop_workers(
+    session: LedgerSession | QueueSession,
+    active: dict[str, _Worker],
+    completions: queue.Queue[tuple[str, int, dict]],
+) -> None:
+    """Terminate every running worker and return its item to pending.
+
+    Each worker's process group gets SIGTERM, then SIGKILL once
+    TIMEOUT_KILL_GRACE passes. The interrupted attempt is not counted, so
+    a resumed run (or another worker) picks the item up with its budget
+    intact.
+    """
+    for worker in active.values():
+        _signal_group(worker.proc, signal.SIGTERM)
+    running = set(active)
+    deadline = time.monotonic() + TIMEOUT_KILL_GRACE
+    killed = False
+    while running:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            if killed:
+                break
+            for item in running:
+                _signal_group(active[item].proc, signal.SIGKILL)
+            killed = True
+            deadline = time.monotonic() + OUTPUT_DRAIN_TIMEOUT
+            continue
+        try:
+            item, _, _ = completions.get(timeout=remaining)
+        except queue.Empty:
+            continue
+        running.discard(item)
+
+    for item, worker in active.items():
+        session.update_item_status(item, "pending", attempts=worker.attempt - 1)
+    active.clear()
+
+
+def _enforce_timeouts(active: dict[str, _Worker], timeout: float | None) -> None:
+    """Terminate workers past their deadline; escalate to SIGKILL after a grace period."""
+    if not timeout:
+        return
+    now = time.monotonic()
+    for worker in active.values():
+        if worker.terminated_at is None:
+            if now - worker.started >= timeout:
+                worker.terminated_at = now
+                _signal_group(worker.proc, signal.SIGTERM)
+        elif now - worker.terminated_at >= TIMEOUT_KILL_GRACE:
+            _signal_group(worker.proc, signal.SIGKILL)
+
+
+def _sample_workers(active: dict[str, _Worker]) -> None:
+    """Raise each running worker's recorded peaks from /proc."""
+    for worker in active.values():
+        # Once reaped, the pid may already belong to another process
+        if worker.proc.returncode is None:
+            worker.sampled = merge_peaks(worker.sampled, sample_proc(worker.proc.pid))
+
+
+def _next_wakeup(
+    active: dict[str, _Worker],
+    source_wakeup: float | None,
+    timeout: float | None,
+    poll_interval: float,
+) -> float:
+    """Seconds until the loop must wake even if no child exits."""
+    now = time.monotonic()
+    wakeups = [poll_interval]
+    if source_wakeup is not None:
+        wakeups.append(source_wakeup)
+    if timeout:
+        for worker in active.values():
+            if worker.terminated_at is None:
+                wakeups.append(worker.started + timeout - now)
+            else:
+                wakeups.append(worker.terminated_at + TIMEOUT_KILL_GRACE - now)
+    return max(0.0, min(wakeups))
+
+
+def _index_completion(
+    output_path: Path,
+    item: str,
+    status: str,
+    summary: str | None,
+    exit_code: int,
+    metrics: dict,
+) -> None:
+    """Record a finished attempt in the results index."""
+    try:
+        size = output_path.stat().st_size
+    except OSError:
+        size = None
+    completed = datetime.now(timezone.utc)
+    started = completed - timedelta(milliseconds=metrics.get("duration_ms") or 0)
+    index_result(output_path.parent, {
+        "item": item,
+        "file": output_path.name,
+        "status": status,
+        "summary": summary,
+        "exit_code": exit_code,
+        "started_at": started.isoformat(),
+        "completed_at": completed.isoformat(),
+        "size": size,
+        **metrics,
+    })
+
+
+def _record_adjustment(session: LedgerSession, adjustment: Adjustment | None) -> None:
+    """Log a concurrency change to the ledger's concurrency_log."""
+    if adjustment is not None:
+        session.record_event("concurrency_log", adjustment.to_dict())
+
+
+def _start_waiter(
+    item: str,
+    proc: subprocess.Popen,
+    output_path: Path,
+    capture: StreamCapture,
+    completions: queue.Queue[tuple[str, int, dict]],
+) -> threading.Thread:
+    """Drain and reap a child on daemon threads; post (item, exit_code, usage) when done.
+
+    A reader thread tees stdout to the result file through the capture. The
+    completion is posted only after the reader has hit EOF, so the summary
+    and metrics are final when the main loop sees it.
+    """
+    reader = threading.Thread(
+        target=tee_stream,
+        args=(proc.stdout, output_path, capture),
+        name=f"batch-read-{proc.pid}",
+        daemon=True,
+    )
+    reader.start()
+
+    def _wait() -> None:
+        retcode, usage = wait_with_usage(proc)
+        reader.join(OUTPUT_DRAIN_TIMEOUT)
+        if reader.is_alive():
+            # An orphaned grandchild still holds the pipe open
+            _signal_group(proc, signal.SIGKILL)
+            reader.join()
+        completions.put((item, retcode, usage))
+
+    thread = threading.Thread(target=_wait, name=f"batch-wait-{proc.pid}", daemon=True)
+    thread.start()
+    return thread
+
+
+def _spawn_exit_code(exc: OSError) -> int:
+    """Shell-style exit code for a worker that could not be started."""
+    return EXIT_NOT_EXECUTABLE if isinstance(exc, PermissionError) else EXIT_NOT_FOUND
+
+
+def _record_spawn_failure(
+    session: LedgerSession | QueueSession,
+    item: str,
+    attempt: int,
+    exc: OSError,
+    output_path: Path,
+) -> None:
+    """Fail an item whose worker binary is missing or not executable."""
+    exit_code = _spawn_exit_code(exc)
+    summary = f"Could not start worker: {exc}"
+    error_class = classify_failure(exit_code)
+    session.update_item_status(
+        item,
+        "failed",
+        result_summary=summary,
+        exit_code=exit_code,
+        attempts=attempt,
+        error_class=error_class,
+    )
+    _index_completion(output_path, item, "failed", summary, exit_code, {"attempts": attempt})
+
+
+def _signal_group(proc: subprocess.Popen, sig: int) -> None:
+    """Send a signal to a worker's whole process group."""
+    try:
+        os.killpg(proc.pid, sig)
+    except (ProcessLookupError, PermissionError):
+        pass
 
 
 def _extract_summary(output_path: Path) -> str:
@@ -194,28 +720,7 @@ def _extract_summary(output_path: Path) -> str:
     """
     if not output_path.exists():
         return "No output"
-
-    try:
-        import json
-        data = json.loads(output_path.read_text())
-        # Claude --output-format json wraps result
-        if isinstance(data, dict):
-            if "result" in data:
-                result_text = str(data["result"])
-                return result_text[:200] if len(result_text) > 200 else result_text
-            if "content" in data:
-                content = str(data["content"])
-                return content[:200] if len(content) > 200 else content
-    except (json.JSONDecodeError, OSError, KeyError):
-        pass
-
-    # Fallback: first non-empty line
     try:
-        for line in output_path.read_text().splitlines():
-            stripped = line.strip()
-            if stripped:
-                return stripped[:200]
+        return capture_file(output_path).summary_text()
     except OSError:
-        pass
-
-    return "No summary available"
+        return "No summary available"
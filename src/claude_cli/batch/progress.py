@@ -0,0 +1,266 @@
+"""Live progress of a running batch.
+
+A ProgressTracker parses the ledger snapshot, then tails the ledger
+journal: each refresh reads only the bytes appended since the last one.
+The snapshot is parsed again only when the writer replaces it, i.e. on
+compaction (every COMPACT_THRESHOLD_BYTES of journal, and at the end of
+a run), since compaction can fold in events that never reached the
+journal.
+
+The tracker keeps status counters, the attempt number of each active
+item and fixed-size windows of recent completion times and durations.
+Journal events carry the item's previous status, so no per-item state
+is needed for the rest; memory does not grow with the number of items,
+the length of the run or the number of refreshes.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import BinaryIO
+
+from claude_cli.batch.ledger import journal_path_for, load_ledger
+from claude_cli.batch.retry import DEFAULT_MAX_ATTEMPTS, RetryPolicy
+
+# Completions older than this do not count towards throughput
+RATE_WINDOW_S = 600.0
+# Most recent item durations kept for the percentiles
+DURATION_SAMPLES = 1000
+_MAX_COMPLETIONS = 10000
+
+_STATUSES = ("pending", "active", "done", "failed")
+
+
+@dataclass
+class Progress:
+    """Point-in-time view of a batch run."""
+
+    total: int
+    pending: int
+    active: int
+    done: int
+    failed: int
+    retrying: int
+    items_per_min: float | None
+    p50_ms: float | None
+    p95_ms: float | None
+    eta_s: float | None
+
+    @property
+    def finished(self) -> bool:
+        """True once nothing is pending, active or waiting to be retried."""
+        return self.pending == 0 and self.active == 0 and self.retrying == 0
+
+
+class ProgressTracker:
+    """Incrementally follows a batch ledger's journal.
+
+    Usage:
+        tracker = ProgressTracker(ledger_path)
+        try:
+            while not (progress := tracker.poll()).finished:
+                ...
+        finally:
+            tracker.close()
+    """
+
+    def __init__(
+        self,
+        ledger_path: Path,
+        window_s: float = RATE_WINDOW_S,
+        samples: int = DURATION_SAMPLES,
+    ) -> None:
+        self.ledger_path = ledger_path
+        self.journal_path = journal_path_for(ledger_path)
+        self.window_s = window_s
+        self.samples = samples
+        self._fh: BinaryIO | None = None
+        self._journal_inode: int | None = None
+        self._snapshot_inode: int | None = None
+        self._partial = b""
+        self._load_snapshot()
+
+    def poll(self) -> Progress:
+        """Apply journal events appended since the last poll."""
+        if self._inode(self.ledger_path) != self._snapshot_inode:
+            self._load_snapshot()
+        if self._fh is None:
+            self._open_journal()
+        if self._fh is not None:
+            self._consume(self._fh.read())
+            if self._inode(self.journal_path) != self._journal_inode:
+                # Compacted: the new snapshot holds the rest; reload it next poll
+                self._close_journal()
+        return self._progress()
+
+    def close(self) -> None:
+        """Release the journal handle."""
+        self._close_journal()
+
+    def _load_snapshot(self) -> None:
+        # Open the journal before reading the snapshot so no event falls
+        # between them; events already in the snapshot replay harmlessly
+        self._close_journal()
+        self._open_journal()
+        self._snapshot_inode = self._inode(self.ledger_path)
+        ledger = load_ledger(self.ledger_path, replay=False)
+        # Counters cannot absorb an event twice, so skip those already folded in
+        self._folded_until = _timestamp(ledger.get("updated_at"))
+
+        self._retry = RetryPolicy(
+            max_attempts=ledger.get("config", {}).get("max_attempts", DEFAULT_MAX_ATTEMPTS)
+        )
+        # Attempt number of each active item, to tell whether its failure is retried
+        self._active: dict[str, int] = {}
+        self._total = 0
+        self._retrying = 0
+        self._counts = dict.fromkeys(_STATUSES, 0)
+        self._durations: deque[int] = deque(maxlen=self.samples)
+        self._completions: deque[float] = deque(maxlen=_MAX_COMPLETIONS)
+        completed = []
+        for item in ledger.get("items", []):
+            status = item.get("status", "pending")
+            self._total += 1
+            self._counts[status] = self._counts.get(status, 0) + 1
+            if status == "active":
+                self._active[item["name"]] = item.get("attempts") or 1
+            elif status == "failed" and self._retry.should_retry(
+                item.get("attempts") or 0, item.get("last_error_class")
+            ):
+                self._retrying += 1
+            if status == "done" and item.get("duration_ms") and not item.get("cache_hit"):
+                self._durations.append(int(item["duration_ms"]))
+            if status in ("done", "failed"):
+                stamp = _timestamp(item.get("completed_at"))
+                if stamp is not None:
+                    completed.append(stamp)
+        self._completions.extend(sorted(completed))
+
+    def _progress(self) -> Progress:
+        now = datetime.now(timezone.utc).timestamp()
+        while self._completions and self._completions[0] < now - self.window_s:
+            self._completions.popleft()
+
+        rate = None
+        if len(self._completions) >= 2:
+            span = now - self._completions[0]
+            if span > 0:
+                rate = len(self._completions) / span * 60
+
+        durations = sorted(self._durations)
+        remaining = self._counts["pending"] + self._counts["active"] + self._retrying
+        return Progress(
+            total=self._total,
+            pending=self._counts["pending"],
+            active=self._counts["active"],
+            done=self._counts["done"],
+            failed=self._counts["failed"],
+            retrying=self._retrying,
+            items_per_min=rate,
+            p50_ms=_percentile(durations, 0.50),
+            p95_ms=_percentile(durations, 0.95),
+            eta_s=remaining / rate * 60 if rate else None,
+        )
+
+    def _consume(self, data: bytes) -> None:
+        *lines, self._partial = (self._partial + data).split(b"\n")
+        for line in lines:
+            try:
+                event = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if not isinstance(event, dict):
+                continue
+            if self._folded_until is not None:
+                stamp = _timestamp(event.get("ts"))
+                if stamp is not None and stamp <= self._folded_until:
+                    continue
+                self._folded_until = None
+            if "item" in event:
+                self._apply(event["item"], event.get("set") or {}, event)
+
+    def _apply(self, name: str, fields: dict, event: dict) -> None:
+        new = fields.get("status")
+        # Events written without a session do not say where the item came from
+        old = "active" if name in self._active else event.get("from", "pending")
+        if new is None or new == old:
+            return
+        self._counts[old] = self._counts.get(old, 0) - 1
+        self._counts[new] = self._counts.get(new, 0) + 1
+        attempts = self._active.pop(name, None)
+        if old == "failed":
+            # Only failures with retry budget left are picked up again
+            self._retrying = max(0, self._retrying - 1)
+        if new == "active":
+            self._active[name] = fields.get("attempts") or 1
+        elif new == "failed" and self._retry.should_retry(
+            attempts or 0, fields.get("last_error_class")
+        ):
+            self._retrying += 1
+        if new in ("done", "failed"):
+            stamp = _timestamp(fields.get("completed_at") or event.get("ts"))
+            if stamp is not None:
+                self._completions.append(stamp)
+            if new == "done" and fields.get("duration_ms") and not fields.get("cache_hit"):
+                self._durations.append(int(fields["duration_ms"]))
+
+    def _open_journal(self) -> None:
+        try:
+            self._fh = open(self.journal_path, "rb")
+        except FileNotFoundError:
+            return
+        self._journal_inode = os.fstat(self._fh.fileno()).st_ino
+        self._partial = b""
+
+    def _close_journal(self) -> None:
+        if self._fh is not None:
+            self._fh.close()
+        self._fh = None
+        self._journal_inode = None
+
+    @staticmethod
+    def _inode(path: Path) -> int | None:
+        try:
+            return os.stat(path).st_ino
+        except FileNotFoundError:
+            return None
+
+
+def format_duration(seconds: float | None) -> str:
+    """Render seconds as a short human string, e.g. "1h 05m" or "42s"."""
+    if seconds is None:
+        return "-"
+    seconds = int(round(seconds))
+    hours, rest = divmod(seconds, 3600)
+    minutes, secs = divmod(rest, 60)
+    if hours:
+        return f"{hours}h {minutes:02d}m"
+    if minutes:
+        return f"{minutes}m {secs:02d}s"
+    return f"{secs}s"
+
+
+def _timestamp(when: str | None) -> float | None:
+    """Epoch seconds of an ISO timestamp (naive means UTC), or None."""
+    if not when:
+        return None
+    try:
+        stamp = datetime.fromisoformat(when)
+    except (TypeError, ValueError):
+        return None
+    if stamp.tzinfo is None:
+        stamp = stamp.replace(tzinfo=timezone.utc)
+    return stamp.timestamp()
+
+
+def _percentile(sorted_values: list[int], q: float) -> float | None:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    rank = max(0, min(len(sorted_values) - 1, round(q * len(sorted_values)) - 1))
+    return float(sorted_values[rank])
@@ -0,0 +1,92 @@
+"""Per-worker resource accounting.
+
+Workers are reaped with os.wait4, whose rusage gives the CPU time, peak
+RSS and block I/O of the worker plus any descendants it waited for.
+Where /proc exists the orchestrator can also sample running workers
+(``sample_interval`` in the batch config); samples only ever raise the
+recorded peaks, so they matter for workers whose children are not
+waited for or that are killed at their timeout.
+
+Fields recorded on the ledger item:
+
+- cpu_user_ms, cpu_sys_ms: CPU time in milliseconds
+- peak_rss_kib: peak resident set size in KiB
+- io_read_bytes, io_write_bytes: bytes read from / written to storage
+"""
+
+from __future__ import annotations
+
+import os
+import resource
+import subprocess
+import sys
+from pathlib import Path
+
+PROC_ROOT = Path("/proc")
+# rusage block counts are in 512-byte units
+BLOCK_SIZE = 512
+
+RESOURCE_KEYS = ("cpu_user_ms", "cpu_sys_ms", "peak_rss_kib", "io_read_bytes", "io_write_bytes")
+
+
+def wait_with_usage(proc: subprocess.Popen) -> tuple[int, dict]:
+    """Reap a child with os.wait4 and return (exit code, resource metrics).
+
+    Sets proc.returncode so later Popen calls see the child as finished.
+    If the child was already reaped elsewhere, no metrics are returned.
+    """
+    try:
+        _, status, usage = os.wait4(proc.pid, 0)
+    except ChildProcessError:
+        return proc.wait(), {}
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    return proc.returncode, usage_metrics(usage)
+
+
+def usage_metrics(usage: resource.struct_rusage) -> dict:
+    """Convert an rusage struct to ledger resource fields."""
+    # ru_maxrss is KiB on Linux but bytes on macOS
+    rss_kib = usage.ru_maxrss // 1024 if sys.platform == "darwin" else usage.ru_maxrss
+    return {
+        "cpu_user_ms": int(usage.ru_utime * 1000),
+        "cpu_sys_ms": int(usage.ru_stime * 1000),
+        "peak_rss_kib": int(rss_kib),
+        "io_read_bytes": usage.ru_inblock * BLOCK_SIZE,
+        "io_write_bytes": usage.ru_oublock * BLOCK_SIZE,
+    }
+
+
+def sample_proc(pid: int, proc_root: Path = PROC_ROOT) -> dict:
+    """Read a running process's peak RSS and storage I/O from /proc.
+
+    Returns an empty dict where /proc is unavailable or the process has
+    gone; fields that cannot be read are left out.
+    """
+    sample: dict = {}
+    base = proc_root / str(pid)
+    try:
+        for line in (base / "status").read_text().splitlines():
+            if line.startswith("VmHWM:"):
+                sample["peak_rss_kib"] = int(line.split()[1])
+                break
+    except (OSError, ValueError, IndexError):
+        return sample
+    try:
+        for line in (base / "io").read_text().splitlines():
+            key, _, value = line.partition(":")
+            if key == "read_bytes":
+                sample["io_read_bytes"] = int(value)
+            elif key == "write_bytes":
+                sample["io_write_bytes"] = int(value)
+    except (OSError, ValueError):
+        pass
+    return sample
+
+
+def merge_peaks(current: dict, sample: dict) -> dict:
+    """Combine two sets of resource fields, keeping the larger of each."""
+    merged = dict(current)
+    for key, value in sample.items():
+        if value is not None and (merged.get(key) is None or value > merged[key]):
+            merged[key] = value
+    return merged
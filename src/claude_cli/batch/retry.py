@@ -0,0 +1,96 @@
+"""Failure classification and retry policy for batch items.
+
+Each failed attempt is sorted into one of three classes:
+
+- ``transient``: non-zero exit, SIGTERM from outside, or anything
+  unrecognised. Worth retrying after a backoff.
+- ``timeout``: the worker exceeded its wall-clock budget, or was
+  SIGKILLed by an external watchdog. Retried, but counts against the
+  attempt budget like any other failure.
+- ``permanent``: the item itself is the problem (max turns exhausted,
+  binary missing or not executable). Never retried automatically.
+
+Only structured signals are used: the exit code or killing signal, and
+the ``subtype`` of the worker's result JSON. Free-text output is never
+matched, since it quotes whatever the agent happened to read.
+"""
+
+from __future__ import annotations
+
+import random
+import signal
+from dataclasses import dataclass
+
+TRANSIENT = "transient"
+PERMANENT = "permanent"
+TIMEOUT = "timeout"
+
+DEFAULT_MAX_ATTEMPTS = 3
+
+# Shell conventions for "found but not executable" and "not found"; the
+# orchestrator reports spawn-time PermissionError/FileNotFoundError the same way
+EXIT_NOT_EXECUTABLE = 126
+EXIT_NOT_FOUND = 127
+_PERMANENT_EXIT_CODES = {EXIT_NOT_EXECUTABLE, EXIT_NOT_FOUND}
+# `timeout(1)`, and a shell wrapper reporting a SIGKILLed child as 128 + 9
+_TIMEOUT_EXIT_CODES = {124, 128 + signal.SIGKILL}
+# Popen.returncode is -N when the child died from signal N
+_SIGNAL_CLASSES = {
+    signal.SIGKILL: TIMEOUT,
+    signal.SIGTERM: TRANSIENT,
+    signal.SIGINT: TRANSIENT,
+    signal.SIGHUP: TRANSIENT,
+}
+# Result JSON subtypes that another attempt would reproduce
+_PERMANENT_SUBTYPES = {"error_max_turns"}
+
+
+def classify_failure(
+    exit_code: int | None, result_subtype: str | None = None, timed_out: bool = False
+) -> str:
+    """Classify a failed attempt from its exit status and result subtype.
+
+    Args:
+        exit_code: Process exit code (negative when killed by a signal).
+        result_subtype: ``subtype`` of the result JSON, if the worker wrote one.
+        timed_out: True if the orchestrator killed the worker for its timeout.
+
+    Returns:
+        One of TRANSIENT, PERMANENT, TIMEOUT.
+    """
+    if timed_out or exit_code in _TIMEOUT_EXIT_CODES:
+        return TIMEOUT
+
+    if exit_code is not None and exit_code < 0:
+        return _SIGNAL_CLASSES.get(-exit_code, TRANSIENT)
+
+    if exit_code in _PERMANENT_EXIT_CODES or result_subtype in _PERMANENT_SUBTYPES:
+        return PERMANENT
+
+    # Rate limits, overload, network errors and anything unrecognised get
+    # the benefit of the doubt; max_attempts bounds the cost
+    return TRANSIENT
+
+
+@dataclass
+class RetryPolicy:
+    """Bounded retry budget with exponential backoff and jitter."""
+
+    max_attempts: int = DEFAULT_MAX_ATTEMPTS
+    base_delay: float = 5.0
+    max_delay: float = 300.0
+    jitter: bool = True
+
+    def should_retry(self, attempts: int, error_class: str | None) -> bool:
+        """Return True if an item with this history may be attempted again."""
+        if error_class == PERMANENT:
+            return False
+        return attempts < self.max_attempts
+
+    def delay(self, attempts: int) -> float:
+        """Seconds to wait before the next attempt, after ``attempts`` tries."""
+        delay = min(self.max_delay, self.base_delay * (2 ** max(0, attempts - 1)))
+        if self.jitter:
+            # Equal jitter: keep at least half the backoff, spread the rest
+            delay = delay / 2 + random.uniform(0, delay / 2)
+        return delay
@@ -0,0 +1,161 @@
+"""Priority and cost-aware ordering of batch items.
+
+Items are dispatched highest explicit priority first, then longest
+expected duration first (LPT), which keeps a long item from starting
+last and leaving one worker busy while the rest sit idle.
+
+Expected duration comes from the item's own ``duration_ms`` in earlier
+batches of the same project when available. Otherwise it is estimated
+from file size, scaled by the median ms-per-byte observed in that
+history; with no history at all, file size alone ranks the items.
+"""
+
+from __future__ import annotations
+
+import fnmatch
+import statistics
+from pathlib import Path
+
+import yaml
+
+from claude_cli.batch.ledger import load_ledger
+
+# Most recent sibling batches consulted for historical durations
+HISTORY_LEDGERS = 20
+
+SCHEDULES = ("lpt", "fifo")
+
+
+def parse_priorities(specs: list[str]) -> list[tuple[str, int]]:
+    """Parse ``PATTERN=N`` priority rules from the command line.
+
+    Args:
+        specs: Strings like ``"src/core/**=10"``.
+
+    Returns:
+        List of (glob pattern, priority) in the given order.
+
+    Raises:
+        ValueError: If a spec is not of the form PATTERN=INT.
+    """
+    rules = []
+    for spec in specs:
+        pattern, sep, value = spec.rpartition("=")
+        if not sep or not pattern:
+            raise ValueError(f"Priority must be PATTERN=N, got: {spec}")
+        try:
+            rules.append((pattern, int(value)))
+        except ValueError:
+            raise ValueError(f"Priority must be an integer, got: {spec}") from None
+    return rules
+
+
+def priority_for(item: str, rules: list[tuple[str, int]]) -> int:
+    """Priority of the first rule matching an item, else 0."""
+    for pattern, priority in rules:
+        if fnmatch.fnmatch(item, pattern):
+            return priority
+    return 0
+
+
+def load_duration_history(batch_root: Path, exclude: Path | None = None) -> dict[str, int]:
+    """Collect the latest successful duration_ms per item from sibling batches.
+
+    Args:
+        batch_root: The project's .claude/batch directory.
+        exclude: Batch directory to skip (usually the one being run).
+
+    Returns:
+        Mapping of item name to duration in milliseconds.
+    """
+    history: dict[str, int] = {}
+    if not batch_root.exists():
+        return history
+
+    ledgers = sorted(
+        (p for p in batch_root.glob("*/ledger.yaml") if p.parent != exclude),
+        reverse=True,
+    )[:HISTORY_LEDGERS]
+
+    # Oldest first so newer batches overwrite
+    for ledger_path in reversed(ledgers):
+        try:
+            ledger = load_ledger(ledger_path)
+        except (OSError, ValueError, yaml.YAMLError):
+            continue
+        for item in ledger.get("items", []):
+            duration = item.get("duration_ms")
+            if item.get("status") == "done" and duration and not item.get("cache_hit"):
+                history[item["name"]] = int(duration)
+    return history
+
+
+def estimate_costs(
+    items: list[str],
+    project_root: Path,
+    history: dict[str, int],
+) -> dict[str, float]:
+    """Estimate each item's relative cost (ms when history allows).
+
+    Args:
+        items: Item names.
+        project_root: Directory items are relative to.
+        history: Known durations from load_duration_history.
+
+    Returns:
+        Mapping of item name to estimated cost.
+    """
+    sizes = {item: _file_size(project_root / item) for item in items}
+
+    rates = [
+        history[item] / sizes[item]
+        for item in items
+        if item in history and sizes[item] > 0
+    ]
+    ms_per_byte = statistics.median(rates) if rates else 1.0
+
+    return {
+        item: float(history[item]) if item in history else sizes[item] * ms_per_byte
+        for item in items
+    }
+
+
+def order_items(
+    items: list[str],
+    ledger: dict,
+    project_root: Path,
+    history: dict[str, int],
+) -> list[str]:
+    """Order items by priority, then longest expected duration first.
+
+    Ties keep ledger order. Durations recorded on the current ledger's
+    items (from earlier attempts) take precedence over sibling history.
+
+    Args:
+        items: Item names to order.
+        ledger: The batch's ledger dict (for priorities and own durations).
+        project_root: Directory items are relative to.
+        history: Durations from load_duration_history.
+
+    Returns:
+        Items in dispatch order.
+    """
+    by_name = {item["name"]: item for item in ledger.get("items", [])}
+    known = dict(history)
+    for name in items:
+        duration = by_name.get(name, {}).get("duration_ms")
+        if duration:
+            known[name] = int(duration)
+
+    costs = estimate_costs(items, project_root, known)
+    return sorted(
+        items,
+        key=lambda name: (-(by_name.get(name, {}).get("priority") or 0), -costs[name]),
+    )
+
+
+def _file_size(path: Path) -> int:
+    try:
+        return path.stat().st_size if path.is_file() else 0
+    except OSError:
+        return 0
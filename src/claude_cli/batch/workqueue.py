@@ -0,0 +1,475 @@
+"""Shared lease-based work queue for multi-node batch runs.
+
+With ``caf batch run --worker`` several orchestrator processes, possibly
+on different hosts sharing the batch directory, cooperate on one batch.
+Each claims items from a SQLite queue (queue.sqlite next to the ledger)
+under a time-limited lease and renews its leases with heartbeats while
+the items run. A worker that dies stops heartbeating; once its leases
+expire the items are claimable again, so no host ever needs to judge
+another host's PIDs.
+
+Workers never write ledger.yaml concurrently. Item transitions are
+recorded in the queue and folded into the ledger by sync_ledger, which
+runs under the queue's write lock when a worker exits. Readers such as
+status and report overlay the queue on the ledger in memory instead
+(read_ledger), so they never block or rewrite a running batch. A later
+single-host run folds the queue in one last time and removes it
+(retire_queue), so its outdated state never shadows the ledger.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import socket
+import sqlite3
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Iterator
+
+from claude_cli.batch.ledger import (
+    LedgerSession,
+    _compute_summary,
+    _resumable_names,
+    load_ledger,
+    transition_fields,
+)
+
+QUEUE_FILENAME = "queue.sqlite"
+DEFAULT_LEASE_SECONDS = 60.0
+# Seconds a busy writer waits for the queue lock before giving up
+LOCK_TIMEOUT = 30.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS items (
+    name TEXT PRIMARY KEY,
+    seq INTEGER NOT NULL,
+    state TEXT NOT NULL DEFAULT 'pending',
+    owner TEXT,
+    lease_expires REAL,
+    available_at REAL NOT NULL DEFAULT 0,
+    fields TEXT NOT NULL DEFAULT '{}'
+);
+CREATE INDEX IF NOT EXISTS items_by_state ON items (state, seq);
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    key TEXT NOT NULL,
+    entry TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS workers (
+    worker_id TEXT PRIMARY KEY,
+    host TEXT NOT NULL,
+    pid INTEGER NOT NULL,
+    heartbeat REAL NOT NULL
+);
+"""
+
+# Queue states: pending (claimable once available_at passes), leased,
+# done, failed (terminal; retryable failures go back to pending).
+# A failed row's available_at holds off seed() while its worker decides
+# on a retry. A worker returning an interrupted item releases it as pending.
+_QUEUE_STATE = {"pending": "pending", "active": "leased", "done": "done", "failed": "failed"}
+
+
+def default_worker_id() -> str:
+    """Identify this orchestrator process as ``host:pid``."""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class WorkQueue:
+    """SQLite-backed queue of batch items with heartbeat-renewed leases.
+
+    Lease times are wall-clock seconds, so hosts sharing a queue need
+    roughly synchronised clocks (well within the lease length).
+    """
+
+    def __init__(
+        self, path: Path, lease_seconds: float = DEFAULT_LEASE_SECONDS, read_only: bool = False
+    ) -> None:
+        self.path = path
+        self.lease_seconds = lease_seconds
+        # Autocommit mode; write transactions are opened explicitly
+        if read_only:
+            self._conn = sqlite3.connect(
+                f"{path.resolve().as_uri()}?mode=ro", uri=True,
+                timeout=LOCK_TIMEOUT, isolation_level=None,
+            )
+        else:
+            self._conn = sqlite3.connect(str(path), timeout=LOCK_TIMEOUT, isolation_level=None)
+            self._conn.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        """Close the database connection."""
+        self._conn.close()
+
+    @contextmanager
+    def exclusive(self) -> Iterator[sqlite3.Connection]:
+        """Hold the queue's write lock for the duration of the block."""
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield self._conn
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+        self._conn.execute("COMMIT")
+
+    def seed(self, names: list[str]) -> None:
+        """Enqueue items in dispatch order.
+
+        Idempotent across workers: items already queued keep their state,
+        except terminal failures listed in ``names``, which are reopened
+        (the caller decided they still have retry budget). A failure whose
+        worker may still schedule a retry_later is left to that backoff.
+        """
+        now = time.time()
+        with self.exclusive() as conn:
+            (offset,) = conn.execute("SELECT COALESCE(MAX(seq) + 1, 0) FROM items").fetchone()
+            conn.executemany(
+                "INSERT INTO items (name, seq) VALUES (?, ?) "
+                "ON CONFLICT (name) DO UPDATE SET state = 'pending', available_at = 0 "
+                "WHERE items.state = 'failed' AND items.available_at <= ?",
+                [(name, offset + i, now) for i, name in enumerate(names)],
+            )
+
+    def claim(self, worker_id: str, limit: int = 1) -> list[str]:
+        """Lease up to ``limit`` claimable items to a worker.
+
+        Claimable means pending and past its retry backoff, or leased
+        under a lease that has expired.
+
+        Returns:
+            Claimed item names in dispatch order.
+        """
+        now = time.time()
+        with self.exclusive() as conn:
+            names = [
+                row[0]
+                for row in conn.execute(
+                    "SELECT name FROM items "
+                    "WHERE (state = 'pending' AND available_at <= ?) "
+                    "OR (state = 'leased' AND lease_expires < ?) "
+                    "ORDER BY seq LIMIT ?",
+                    (now, now, limit),
+                )
+            ]
+            conn.executemany(
+                "UPDATE items SET state = 'leased', owner = ?, lease_expires = ? WHERE name = ?",
+                [(worker_id, now + self.lease_seconds, name) for name in names],
+            )
+        return names
+
+    def heartbeat(self, worker_id: str) -> None:
+        """Renew every lease held by a worker and record that it is alive."""
+        now = time.time()
+        with self.exclusive() as conn:
+            conn.execute(
+                "UPDATE items SET lease_expires = ? WHERE owner = ? AND state = 'leased'",
+                (now + self.lease_seconds, worker_id),
+            )
+            conn.execute(
+                "INSERT INTO workers (worker_id, host, pid, heartbeat) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (worker_id) DO UPDATE SET heartbeat = excluded.heartbeat",
+                (worker_id, socket.gethostname(), os.getpid(), now),
+            )
+
+    def record(self, worker_id: str, name: str, fields: dict) -> bool:
+        """Merge a transition's ledger fields into an item the worker holds.
+
+        The queue state follows ``fields["status"]``. A failure is held
+        back from seed() for one lease length, the worker's window to call
+        retry_later. The write is dropped if the worker's lease was lost
+        (expired and re-claimed elsewhere).
+
+        Returns:
+            True if the transition was recorded.
+        """
+        with self.exclusive() as conn:
+            row = conn.execute(
+                "SELECT fields FROM items WHERE name = ? AND owner = ? AND state = 'leased'",
+                (name, worker_id),
+            ).fetchone()
+            if row is None:
+                return False
+            merged = {**json.loads(row[0]), **fields}
+            state = _QUEUE_STATE.get(fields.get("status"), "leased")
+            owner = worker_id if state == "leased" else None
+            hold = time.time() + self.lease_seconds if state == "failed" else 0
+            conn.execute(
+                "UPDATE items SET fields = ?, state = ?, owner = ?, available_at = ? "
+                "WHERE name = ?",
+                (json.dumps(merged, default=str), state, owner, hold, name),
+            )
+        return True
+
+    def retry_later(self, name: str, delay: float) -> None:
+        """Return a failed item to the queue, claimable after ``delay`` seconds."""
+        with self.exclusive() as conn:
+            conn.execute(
+                "UPDATE items SET state = 'pending', owner = NULL, lease_expires = NULL, "
+                "available_at = ? WHERE name = ? AND state = 'failed'",
+                (time.time() + delay, name),
+            )
+
+    def add_event(self, key: str, entry: dict) -> None:
+        """Queue an entry for a top-level ledger log (e.g. concurrency_log)."""
+        self._conn.execute(
+            "INSERT INTO events (key, entry) VALUES (?, ?)",
+            (key, json.dumps(entry, default=str)),
+        )
+
+    def has_open_items(self) -> bool:
+        """True while any item is pending or leased (by anyone)."""
+        row = self._conn.execute(
+            "SELECT 1 FROM items WHERE state IN ('pending', 'leased') LIMIT 1"
+        ).fetchone()
+        return row is not None
+
+    def has_live_leases(self) -> bool:
+        """True while some worker holds an unexpired lease."""
+        row = self._conn.execute(
+            "SELECT 1 FROM items WHERE state = 'leased' AND lease_expires >= ? LIMIT 1",
+            (time.time(),),
+        ).fetchone()
+        return row is not None
+
+    def counts(self) -> dict[str, int]:
+        """Number of items in each queue state."""
+        return dict(self._conn.execute("SELECT state, COUNT(*) FROM items GROUP BY state"))
+
+    def queued_names(self) -> set[str]:
+        """Names of every queued item, in any state."""
+        return {name for (name,) in self._conn.execute("SELECT name FROM items")}
+
+    def fields_of(self, name: str) -> dict:
+        """Recorded ledger fields of one item ({} if none)."""
+        row = self._conn.execute("SELECT fields FROM items WHERE name = ?", (name,)).fetchone()
+        return json.loads(row[0]) if row else {}
+
+    def item_fields(self) -> dict[str, dict]:
+        """Recorded ledger fields of every item that has had a transition."""
+        return {
+            name: json.loads(fields)
+            for name, fields in self._conn.execute(
+                "SELECT name, fields FROM items WHERE fields != '{}' ORDER BY seq"
+            )
+        }
+
+    def events(self) -> list[tuple[str, dict]]:
+        """Queued log entries in insertion order."""
+        return [
+            (key, json.loads(entry))
+            for key, entry in self._conn.execute("SELECT key, entry FROM events ORDER BY id")
+        ]
+
+
+class QueueSession:
+    """Ledger-session stand-in for one worker of a multi-node run.
+
+    Offers the subset of LedgerSession the orchestrator uses, but reads
+    the ledger once and records transitions in the shared WorkQueue.
+    """
+
+    def __init__(self, ledger_path: Path, work_queue: WorkQueue, worker_id: str) -> None:
+        self.ledger_path = ledger_path
+        self.queue = work_queue
+        self.worker_id = worker_id
+        self.ledger = load_ledger(ledger_path)
+        self._items = {item["name"]: item for item in self.ledger.get("items", [])}
+        self._host = socket.gethostname()
+
+    @property
+    def config(self) -> dict:
+        """Batch configuration from the ledger."""
+        return self.ledger.get("config", {})
+
+    @property
+    def summary(self) -> dict:
+        """Status counts: queue states for queued items, the ledger for the rest."""
+        counts = self.queue.counts()
+        queued = self.queue.queued_names()
+        summary = _compute_summary(
+            [item for name, item in self._items.items() if name not in queued]
+        )
+        summary["total"] = len(self._items)
+        for state, status in (
+            ("pending", "pending"), ("leased", "active"), ("done", "done"), ("failed", "failed")
+        ):
+            summary[status] += counts.get(state, 0)
+        return summary
+
+    def get_item(self, item_name: str) -> dict | None:
+        """Return the item as the ledger plus queued transitions describe it."""
+        item = self._items.get(item_name)
+        if item is None:
+            return None
+        return {**item, **self.queue.fields_of(item_name)}
+
+    def get_resumable_items(self) -> list[str]:
+        """Return item names that are pending, or failed with retry budget left."""
+        return _resumable_names({**self.ledger, "items": self._merged_items()})
+
+    def update_item_status(
+        self,
+        item_name: str,
+        status: str,
+        result_summary: str | None = None,
+        pid: int | None = None,
+        exit_code: int | None = None,
+        attempts: int | None = None,
+        error_class: str | None = None,
+        metrics: dict | None = None,
+    ) -> None:
+        """Record a status transition in the queue.
+
+        Same semantics as LedgerSession.update_item_status; active items
+        additionally carry the worker and host that claimed them.
+        """
+        now = datetime.now(timezone.utc).isoformat()
+        fields = transition_fields(
+            status, now, result_summary, pid, exit_code, attempts, error_class, metrics
+        )
+        if status == "active":
+            fields["worker"] = self.worker_id
+            fields["host"] = self._host
+        self.queue.record(self.worker_id, item_name, fields)
+
+    def record_event(self, key: str, entry: dict) -> None:
+        """Queue a timestamped ledger log entry tagged with this worker."""
+        now = datetime.now(timezone.utc).isoformat()
+        self.queue.add_event(key, {"at": now, "worker": self.worker_id, **entry})
+
+    def maybe_flush(self) -> None:
+        """No-op: transitions are committed to the queue as they happen."""
+
+    def _merged_items(self) -> list[dict]:
+        return _overlay_items(self.ledger, self.queue.item_fields())
+
+
+class QueueSource:
+    """Feeds the orchestrator items claimed from a WorkQueue.
+
+    Claims one item per free slot, renews this worker's leases every
+    third of the lease length, and backs off for ``claim_interval``
+    seconds after finding nothing claimable.
+    """
+
+    def __init__(self, work_queue: WorkQueue, worker_id: str, claim_interval: float = 2.0) -> None:
+        self.queue = work_queue
+        self.worker_id = worker_id
+        self.claim_interval = claim_interval
+        self._heartbeat_every = work_queue.lease_seconds / 3
+        self._next_heartbeat = 0.0
+        self._idle_until = 0.0
+
+    def take(self) -> str | None:
+        """Claim the next item, or None if nothing is claimable right now."""
+        now = time.monotonic()
+        if now < self._idle_until:
+            return None
+        claimed = self.queue.claim(self.worker_id)
+        if not claimed:
+            self._idle_until = now + self.claim_interval
+            return None
+        return claimed[0]
+
+    def retry_later(self, item: str, delay: float) -> None:
+        """Requeue a failed item for any worker after its backoff."""
+        self.queue.retry_later(item, delay)
+        self._idle_until = 0.0
+
+    def has_more(self) -> bool:
+        """True while any worker may still have to process an item."""
+        return self.queue.has_open_items()
+
+    def heartbeat(self) -> None:
+        """Renew this worker's leases when due."""
+        now = time.monotonic()
+        if now >= self._next_heartbeat:
+            self.queue.heartbeat(self.worker_id)
+            self._next_heartbeat = now + self._heartbeat_every
+
+    def wakeup_in(self) -> float | None:
+        """Seconds until the next claim attempt or heartbeat is due."""
+        now = time.monotonic()
+        due = self._next_heartbeat
+        if self._idle_until > now:
+            due = min(due, self._idle_until)
+        return max(0.0, due - now)
+
+
+def sync_ledger(ledger_path: Path, work_queue: WorkQueue) -> dict:
+    """Fold queued transitions and log entries into the ledger.
+
+    Runs under the queue's write lock so only one host rewrites the
+    ledger at a time. Idempotent: applying the same fields or entries
+    again leaves the ledger unchanged.
+
+    Returns:
+        The ledger summary after syncing.
+    """
+    with work_queue.exclusive():
+        with LedgerSession(ledger_path) as session:
+            for name, fields in work_queue.item_fields().items():
+                session.apply_fields(name, fields)
+            for key, entry in work_queue.events():
+                if entry not in session.ledger.get(key, []):
+                    session.record_event(key, entry)
+            return dict(session.summary)
+
+
+def retire_queue(batch_dir: Path) -> None:
+    """Fold a finished multi-node run's queue into the ledger and delete it.
+
+    Called before a single-host run takes the batch over, whose ledger
+    transitions would otherwise be shadowed by the queue in read_ledger.
+
+    Raises:
+        RuntimeError: A worker still holds an unexpired lease.
+    """
+    path = queue_path_for(batch_dir)
+    if not path.exists():
+        return
+    work_queue = WorkQueue(path)
+    try:
+        if work_queue.has_live_leases():
+            raise RuntimeError(
+                "Workers are still running this batch; join with --worker or wait for them"
+            )
+        sync_ledger(batch_dir / "ledger.yaml", work_queue)
+    finally:
+        work_queue.close()
+    for leftover in (path, path.with_name(path.name + "-journal")):
+        leftover.unlink(missing_ok=True)
+
+
+def read_ledger(batch_dir: Path) -> dict:
+    """Load a batch's ledger with any multi-node queue state overlaid in memory.
+
+    Read-only: neither the queue's write lock nor ledger.yaml is touched,
+    so this is safe while workers are running.
+    """
+    ledger = load_ledger(batch_dir / "ledger.yaml")
+    path = queue_path_for(batch_dir)
+    if not path.exists():
+        return ledger
+    work_queue = WorkQueue(path, read_only=True)
+    try:
+        items = _overlay_items(ledger, work_queue.item_fields())
+        logs: dict[str, list] = {}
+        for key, entry in work_queue.events():
+            if entry not in ledger.get(key, []):
+                logs.setdefault(key, list(ledger.get(key, []))).append(entry)
+    finally:
+        work_queue.close()
+    return {**ledger, **logs, "items": items, "summary": _compute_summary(items)}
+
+
+def _overlay_items(ledger: dict, fields: dict[str, dict]) -> list[dict]:
+    return [{**item, **fields.get(item["name"], {})} for item in ledger.get("items", [])]
+
+
+def queue_path_for(batch_dir: Path) -> Path:
+    """Path of a batch's work queue database."""
+    return batch_dir / QUEUE_FILENAME
@@ -1,6 +1,6 @@
 """Common utilities for Claude CLI."""
 
 from claude_cli.common.config import get_framework_paths, get_db_path
-from claude_cli.common.db import get_connection
+from claude_cli.common.db import ensure_schema, get_connection, shared_cursor
 
-__all__ = ["get_framework_paths", "get_db_path", "get_connection"]
+__all__ = ["get_framework_paths", "get_db_path", "get_connection", "shared_cursor", "ensure_schema"]
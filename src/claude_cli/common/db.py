@@ -1,15 +1,64 @@
-"""DuckDB connection management."""
+"""DuckDB connection management.
 
+get_connection opens a short-lived connection. Hot paths use the shared
+connections instead: one connection per database file per process,
+handed out as cursors, which DuckDB allows to be used concurrently from
+different threads (one thread per cursor). Nested and concurrent
+shared_cursor blocks reuse the open connection.
+
+A connection holds the database file's lock, which keeps every other
+process out, so the shared connection is closed as soon as its last
+cursor exits rather than kept until process exit. A forked child opens
+its own connection rather than reusing its parent's.
+
+duckdb itself is imported on first connection, so callers that answer
+from a cache never pay for loading it.
+
+Schemas are applied lazily: ensure_schema records a version per schema
+name in a schema_versions table, and the DDL only runs when the stored
+version is behind. The check itself runs once per file per process.
+"""
+
+from __future__ import annotations
+
+import os
+import threading
 from contextlib import contextmanager
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Generator
+from typing import TYPE_CHECKING, Generator
+
+if TYPE_CHECKING:
+    import duckdb
+
+SCHEMA_VERSIONS_SQL = """
+CREATE TABLE IF NOT EXISTS schema_versions (
+    name VARCHAR PRIMARY KEY,
+    version INTEGER NOT NULL
+)
+"""
 
-import duckdb
+
+
+@dataclass
+class _Shared:
+    """A process's open connection to one database file."""
+
+    pid: int
+    conn: duckdb.DuckDBPyConnection
+    users: int = 0
+
+
+_lock = threading.Lock()
+_connections: dict[str, _Shared] = {}
+_verified: set[tuple[str, str, int]] = set()
 
 
 @contextmanager
 def get_connection(db_path: Path) -> Generator[duckdb.DuckDBPyConnection, None, None]:
     """Get a DuckDB connection context manager."""
+    import duckdb
+
     conn = duckdb.connect(str(db_path))
     try:
         yield conn
@@ -22,3 +71,85 @@ def init_db(db_path: Path, schema_sql: str) -> None:
     with get_connection(db_path) as conn:
         conn.execute(schema_sql)
         conn.commit()
+
+
+@contextmanager
+def shared_cursor(db_path: Path) -> Generator[duckdb.DuckDBPyConnection, None, None]:
+    """Get a cursor on this process's shared connection to a database file.
+
+    The cursor must stay on the thread that opened it; it is closed on exit,
+    and the connection with it once no other cursor is open.
+    """
+    import duckdb
+
+    key = _key(db_path)
+    with _lock:
+        shared = _connections.get(key)
+        if shared is None or shared.pid != os.getpid():
+            # A connection inherited across fork() is not usable in the child
+            shared = _Shared(os.getpid(), duckdb.connect(key))
+            _connections[key] = shared
+        cursor = shared.conn.cursor()
+        shared.users += 1
+    try:
+        yield cursor
+    finally:
+        cursor.close()
+        with _lock:
+            shared.users -= 1
+            if shared.users == 0 and _connections.get(key) is shared:
+                del _connections[key]
+                shared.conn.close()
+
+
+def ensure_schema(db_path: Path, name: str, version: int, schema_sql: str) -> bool:
+    """Apply schema_sql unless the database already records this version.
+
+    Args:
+        db_path: Database file.
+        name: Schema name in the schema_versions table (e.g. "lessons").
+        version: Current version; bump it whenever schema_sql changes.
+        schema_sql: Idempotent DDL that brings any older schema up to date.
+
+    Returns:
+        True if the DDL ran (new database or upgrade), so callers can
+        backfill derived data.
+    """
+    marker = (_key(db_path), name, version)
+    if marker in _verified:
+        return False
+    applied = False
+    with shared_cursor(db_path) as cursor:
+        cursor.execute(SCHEMA_VERSIONS_SQL)
+        row = cursor.execute(
+            "SELECT version FROM schema_versions WHERE name = ?", [name]
+        ).fetchone()
+        if row is None or row[0] < version:
+            cursor.execute("BEGIN TRANSACTION")
+            try:
+                cursor.execute(schema_sql)
+                cursor.execute(
+                    "INSERT OR REPLACE INTO schema_versions VALUES (?, ?)", [name, version]
+                )
+                cursor.execute("COMMIT")
+            except Exception:
+                cursor.execute("ROLLBACK")
+                raise
+            applied = True
+    with _lock:
+        _verified.add(marker)
+    return applied
+
+
+def close_shared_connections() -> None:
+    """Close every shared connection opened by this process."""
+    with _lock:
+        for shared in _connections.values():
+            if shared.pid == os.getpid():
+                shared.conn.close()
+        _connections.clear()
+        _verified.clear()
+
+
+def _key(db_path: Path) -> str:
+    return str(Path(db_path).resolve())
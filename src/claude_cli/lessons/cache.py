@@ -0,0 +1,132 @@
+"""Cache of lessons query results.
+
+Hooks and agents repeat the same few lookups (lessons for this project,
+lessons tagged docker, the tag list) many times a session, each time in
+a fresh process. QueryCache keeps their results in memory and in a JSON
+file next to the database, so a repeated lookup costs two small file
+reads instead of opening DuckDB.
+
+Validity is tracked by a generation: a counter in a sidecar file, which
+LessonsDB bumps after every committed write, combined with the database
+file's identity (inode, ctime and size), so a database that is deleted,
+recreated or restored from a copy never serves the old file's results.
+Entries are tagged with the generation read before their query ran and
+only served while it is still current, so a write that lands mid-query
+can never be cached as the new state.
+"""
+
+import json
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any, Optional
+
+# Entries kept per database; the oldest are dropped first
+MAX_ENTRIES = 256
+
+_lock = threading.Lock()
+# Resolved database path -> (generation, entries), shared by every LessonsDB
+_memory: dict[str, tuple[str, dict[str, Any]]] = {}
+
+
+class QueryCache:
+    """In-process and on-disk cache of query results for one lessons database."""
+
+    def __init__(self, db_path: Path, max_entries: int = MAX_ENTRIES) -> None:
+        self.db_path = Path(db_path)
+        self.max_entries = max_entries
+        self.path = self.db_path.with_name(self.db_path.name + ".cache.json")
+        self.generation_path = self.db_path.with_name(self.db_path.name + ".generation")
+
+    def generation(self) -> Optional[str]:
+        """Current generation, or None when there is no database to cache yet."""
+        counter = self._counter()
+        try:
+            st = self.db_path.stat()
+        except OSError:
+            return None
+        if counter is None:
+            return None
+        return f"{counter}:{st.st_ino}:{st.st_ctime_ns}:{st.st_size}"
+
+    def get(self, key: str, generation: Optional[str]) -> Optional[Any]:
+        """Cached value for key at the given generation, or None on a miss."""
+        if generation is None:
+            return None
+        return self._entries(generation).get(key)
+
+    def put(self, key: str, value: Any, generation: Optional[str]) -> None:
+        """Store a value computed while the given generation was current.
+
+        Values from a generation that has since been superseded are dropped.
+        """
+        if generation is None or generation != self.generation():
+            return
+        entries = self._entries(generation)
+        with _lock:
+            entries.pop(key, None)
+            entries[key] = value
+            while len(entries) > self.max_entries:
+                del entries[next(iter(entries))]
+            snapshot = {"generation": generation, "entries": dict(entries)}
+        try:
+            _atomic_write(self.path, json.dumps(snapshot))
+        except OSError:
+            pass  # The in-process copy still serves this process
+
+    def invalidate(self) -> None:
+        """Start a new generation, so every cached entry becomes stale."""
+        previous = self._counter() or 0
+        # Past the clock as well as the old value, so two processes bumping
+        # at once still end on a generation neither reader has seen
+        _atomic_write(self.generation_path, str(max(previous + 1, time.time_ns())))
+        with _lock:
+            _memory.pop(self._key(), None)
+
+    def _counter(self) -> Optional[int]:
+        try:
+            return int(self.generation_path.read_text())
+        except FileNotFoundError:
+            # A database written before the cache existed starts at 0
+            return 0
+        except (OSError, ValueError):
+            return None
+
+    def _entries(self, generation: str) -> dict[str, Any]:
+        key = self._key()
+        with _lock:
+            cached = _memory.get(key)
+            if cached is not None and cached[0] == generation:
+                return cached[1]
+        entries: dict[str, Any] = {}
+        try:
+            stored = json.loads(self.path.read_text())
+            if stored.get("generation") == generation:
+                entries = stored.get("entries", {})
+        except (OSError, ValueError, AttributeError):
+            pass
+        with _lock:
+            _memory[key] = (generation, entries)
+        return entries
+
+    def _key(self) -> str:
+        return str(self.db_path.resolve())
+
+
+def clear_memory() -> None:
+    """Forget this process's in-memory entries (the on-disk cache is kept)."""
+    with _lock:
+        _memory.clear()
+
+
+def _atomic_write(path: Path, text: str) -> None:
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as f:
+            f.write(text)
+        os.replace(tmp, path)
+    except Exception:
+        Path(tmp).unlink(missing_ok=True)
+        raise
@@ -51,6 +51,9 @@ def search(
     severity: Optional[str] = typer.Option(None, "--severity", "-s", help="Filter by severity"),
     since: Optional[str] = typer.Option(None, "--since", help="Since date (YYYY-MM-DD)"),
     limit: int = typer.Option(20, "--limit", "-n", help="Max results"),
+    rank: bool = typer.Option(
+        False, "--rank", "-r", help='Rank by relevance (BM25); "quoted phrases" match exactly'
+    ),
 ) -> None:
     """Search lessons with filters."""
     db = LessonsDB()
@@ -58,6 +61,26 @@ def search(
     tags = [tag] if tag else None
     since_date = date.fromisoformat(since) if since else None
 
+    if rank:
+        if not query:
+            console.print("\n[red]--rank needs a search query.[/red]\n")
+            raise typer.Exit(1)
+        ranked = db.search_ranked(
+            query,
+            tags=tags,
+            project=project,
+            severity=severity,
+            since=since_date,
+            limit=limit,
+        )
+        if not ranked:
+            console.print("\n[yellow]No lessons found matching criteria.[/yellow]\n")
+            return
+        _display_lessons_table(
+            [lesson for lesson, _ in ranked], scores=[score for _, score in ranked]
+        )
+        return
+
     lessons = db.search(
         query=query,
         tags=tags,
@@ -74,6 +97,27 @@ def search(
     _display_lessons_table(lessons)
 
 
+@app.command()
+def similar(
+    text: str = typer.Argument(..., help="Text to find similar lessons for"),
+    limit: int = typer.Option(5, "--limit", "-n", help="Max results"),
+    min_score: float = typer.Option(
+        0.05, "--min-score", help="Minimum similarity (0-1) to include"
+    ),
+) -> None:
+    """Find lessons worded similarly to a text."""
+    db = LessonsDB()
+    matches = db.similar(text, limit=limit, min_score=min_score)
+
+    if not matches:
+        console.print("\n[yellow]No similar lessons found.[/yellow]\n")
+        return
+
+    _display_lessons_table(
+        [lesson for lesson, _ in matches], scores=[score for _, score in matches]
+    )
+
+
 @app.command("list")
 def list_lessons(
     limit: int = typer.Option(20, "--limit", "-n", help="Max results"),
@@ -184,21 +228,28 @@ def import_markdown(
     """Import lessons from existing devlessons.md file."""
     from claude_cli.lessons.importer import import_from_markdown
 
-    count = import_from_markdown(file)
-    console.print(f"\n[green]✓[/green] Imported {count} lessons\n")
+    result = import_from_markdown(file)
+    console.print(
+        f"\n[green]✓[/green] Imported {result.added} new lessons, "
+        f"updated {result.updated}, {result.unchanged} unchanged\n"
+    )
 
 
-def _display_lessons_table(lessons: list) -> None:
-    """Display lessons in a table."""
+def _display_lessons_table(lessons: list, scores: Optional[list[float]] = None) -> None:
+    """Display lessons in a table, with a relevance column when scores are given."""
     table = Table(title="Lessons")
+    if scores is not None:
+        table.add_column("Score", style="bold", width=6)
     table.add_column("#", style="cyan", width=5)
     table.add_column("Title", style="white", max_width=50)
     table.add_column("Date", style="green", width=12)
     table.add_column("Project", style="yellow", width=20)
     table.add_column("Severity", style="magenta", width=10)
 
-    for lesson in lessons:
+    for index, lesson in enumerate(lessons):
+        score_cell = [f"{scores[index]:.2f}"] if scores is not None else []
         table.add_row(
+            *score_cell,
             str(lesson.number),
             lesson.title[:47] + "..." if len(lesson.title) > 50 else lesson.title,
             str(lesson.date_learned),
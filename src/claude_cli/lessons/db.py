@@ -1,14 +1,45 @@
-"""DuckDB operations for lessons."""
+"""DuckDB operations for lessons.
+
+All LessonsDB instances for a database file share one connection per
+process (see claude_cli.common.db); each method runs on its own cursor.
+The schema is checked on first use against a version marker rather than
+re-applied on every instantiation.
+
+Every lesson is also indexed for ranked full-text search (see
+claude_cli.lessons.search) and for similarity lookup (see
+claude_cli.lessons.vectors) in the same transaction that stores it.
+Lessons carry a hash of their normalised title, problem and solution so
+bulk imports can skip content that is already stored. Markdown imports
+also record a hash per lesson block of each source file, so re-imports
+only touch the blocks that changed.
+
+search, count and get_tags results are cached (see
+claude_cli.lessons.cache) until the next committed write.
+"""
+
+from __future__ import annotations
 
+import hashlib
+import json
+from contextlib import contextmanager
 from datetime import date
 from pathlib import Path
-from typing import Optional
-
-import duckdb
+from typing import TYPE_CHECKING, Any, Callable, Generator, Iterable, Optional, Union
 
 from claude_cli.common.config import get_db_path
+from claude_cli.common.db import ensure_schema, shared_cursor
+from claude_cli.lessons.cache import QueryCache
 from claude_cli.lessons.models import Lesson, LessonCreate
+from claude_cli.lessons.search import B, K1, index_document, parse_query, phrase_matches
+from claude_cli.lessons.vectors import embed
 
+if TYPE_CHECKING:
+    # Only connections import duckdb, so a cache hit never loads it
+    import duckdb
+
+SCHEMA_NAME = "lessons"
+# Bump whenever SCHEMA_SQL changes so existing databases pick it up
+SCHEMA_VERSION = 5
 
 SCHEMA_SQL = """
 CREATE SEQUENCE IF NOT EXISTS seq_lessons_id START 1;
@@ -26,12 +57,113 @@ CREATE TABLE IF NOT EXISTS lessons (
     checklist VARCHAR[],
     severity VARCHAR DEFAULT 'medium',
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    content_hash VARCHAR
 );
 
+ALTER TABLE lessons ADD COLUMN IF NOT EXISTS content_hash VARCHAR;
+
 CREATE INDEX IF NOT EXISTS idx_lessons_date ON lessons(date_learned);
 CREATE INDEX IF NOT EXISTS idx_lessons_project ON lessons(project);
 CREATE INDEX IF NOT EXISTS idx_lessons_severity ON lessons(severity);
+
+CREATE TABLE IF NOT EXISTS lesson_postings (
+    term VARCHAR NOT NULL,
+    lesson_id INTEGER NOT NULL,
+    tf INTEGER NOT NULL,
+    positions INTEGER[] NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS lesson_doc_lengths (
+    lesson_id INTEGER PRIMARY KEY,
+    length INTEGER NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_lesson_postings_term ON lesson_postings(term);
+
+CREATE TABLE IF NOT EXISTS lesson_sources (
+    source VARCHAR NOT NULL,
+    block_key VARCHAR NOT NULL,
+    block_hash VARCHAR NOT NULL,
+    lesson_id INTEGER,
+    PRIMARY KEY (source, block_key)
+);
+
+CREATE TABLE IF NOT EXISTS lesson_vectors (
+    lesson_id INTEGER NOT NULL,
+    feature INTEGER NOT NULL,
+    weight FLOAT NOT NULL
+);
+"""
+
+SIMILAR_SQL = """
+WITH query AS (
+    SELECT UNNEST(?::JSON::INTEGER[]) AS feature, UNNEST(?::JSON::FLOAT[]) AS weight
+),
+scores AS (
+    SELECT v.lesson_id, SUM(v.weight * query.weight) AS score
+    FROM lesson_vectors v
+    JOIN query ON query.feature = v.feature
+    GROUP BY v.lesson_id
+)
+SELECT lessons.*, scores.score
+FROM scores
+JOIN lessons ON lessons.id = scores.lesson_id
+WHERE scores.score >= ?
+ORDER BY scores.score DESC, lessons.number DESC
+LIMIT ?
+"""
+
+BULK_INSERT_SQL = """
+INSERT INTO lessons (number, title, date_learned, project, context,
+                     problem, solution, tags, checklist, severity, content_hash)
+SELECT number, title, date_learned, project, context,
+       problem, solution, tags, checklist, severity, content_hash
+FROM (
+    SELECT UNNEST(?::JSON::STRUCT(
+        number INTEGER, title VARCHAR, date_learned DATE, project VARCHAR,
+        context VARCHAR, problem VARCHAR, solution VARCHAR, tags VARCHAR[],
+        checklist VARCHAR[], severity VARCHAR, content_hash VARCHAR
+    )[], recursive := true)
+)
+"""
+
+RANKED_SQL = f"""
+WITH stats AS (
+    SELECT COUNT(*) AS n, AVG(length) AS avgdl FROM lesson_doc_lengths
+),
+query_terms AS (
+    SELECT DISTINCT UNNEST(?) AS term
+),
+matches AS (
+    -- A join rather than list_contains(), so the scan probes idx_lesson_postings_term
+    SELECT lesson_id, term, tf
+    FROM lesson_postings
+    JOIN query_terms USING (term)
+),
+df AS (
+    SELECT term, COUNT(*) AS df FROM matches GROUP BY term
+),
+scores AS (
+    SELECT
+        p.lesson_id,
+        SUM(
+            ln(1 + (stats.n - df.df + 0.5) / (df.df + 0.5))
+            * p.tf * ({K1} + 1)
+            / (p.tf + {K1} * (1 - {B} + {B} * d.length / stats.avgdl))
+        ) AS score,
+        COUNT(*) FILTER (WHERE list_contains(?, p.term)) AS required_hits
+    FROM matches p
+    JOIN df USING (term)
+    JOIN lesson_doc_lengths d ON d.lesson_id = p.lesson_id
+    CROSS JOIN stats
+    GROUP BY p.lesson_id
+)
+SELECT lessons.*, scores.score
+FROM scores
+JOIN lessons ON lessons.id = scores.lesson_id
+WHERE scores.required_hits = ? AND {{where_clause}}
+ORDER BY scores.score DESC, lessons.number DESC
 """
 
 
@@ -40,12 +172,45 @@ class LessonsDB:
 
     def __init__(self, db_path: Optional[Path] = None):
         self.db_path = db_path or get_db_path("lessons.duckdb")
-        self._ensure_schema()
-
-    def _ensure_schema(self) -> None:
-        """Ensure database schema exists."""
-        with duckdb.connect(str(self.db_path)) as conn:
-            conn.execute(SCHEMA_SQL)
+        self._cache = QueryCache(self.db_path)
+
+    @contextmanager
+    def _cursor(self) -> Generator[duckdb.DuckDBPyConnection, None, None]:
+        """Cursor on the shared connection, with the schema verified first."""
+        # Opened first so the schema check reuses the connection
+        with shared_cursor(self.db_path) as cursor:
+            if ensure_schema(self.db_path, SCHEMA_NAME, SCHEMA_VERSION, SCHEMA_SQL):
+                # New or upgraded database: index any lessons stored before
+                self.reindex()
+            yield cursor
+
+    @contextmanager
+    def _transaction(self) -> Generator[duckdb.DuckDBPyConnection, None, None]:
+        """Cursor inside a transaction, committed on success and rolled back on error.
+
+        A commit invalidates the query cache.
+        """
+        with self._cursor() as conn:
+            conn.execute("BEGIN TRANSACTION")
+            try:
+                yield conn
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        self._cache.invalidate()
+
+    def _cached(self, key: list, compute: Callable[[], Any]) -> Any:
+        """compute()'s JSON-serialisable result, served from the query cache when valid."""
+        cache_key = json.dumps(key)
+        # Read before querying: a write that commits meanwhile moves the
+        # generation on, and put() then drops the possibly stale result
+        generation = self._cache.generation()
+        value = self._cache.get(cache_key, generation)
+        if value is None:
+            value = compute()
+            self._cache.put(cache_key, value, generation)
+        return value
 
     def _get_next_number(self, conn: duckdb.DuckDBPyConnection) -> int:
         """Get next lesson number."""
@@ -54,14 +219,16 @@ class LessonsDB:
 
     def add(self, lesson: LessonCreate) -> Lesson:
         """Add a new lesson."""
-        with duckdb.connect(str(self.db_path)) as conn:
+        # Numbering and insert in one transaction so concurrent adds conflict
+        with self._transaction() as conn:
             next_num = self._get_next_number(conn)
 
             conn.execute(
                 """
                 INSERT INTO lessons (number, title, date_learned, project, context,
-                                    problem, solution, tags, checklist, severity)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                                    problem, solution, tags, checklist, severity,
+                                    content_hash)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
                 """,
                 [
                     next_num,
@@ -74,18 +241,173 @@ class LessonsDB:
                     lesson.tags,
                     lesson.checklist,
                     lesson.severity,
+                    content_hash(lesson),
                 ],
             )
 
             result = conn.execute(
                 "SELECT * FROM lessons WHERE number = ?", [next_num]
             ).fetchone()
+            self._index_lessons(conn, [self._row_to_lesson(result)])
+
+        return self._row_to_lesson(result)
+
+    def add_many(self, lessons: Iterable[LessonCreate]) -> list[Lesson]:
+        """Add lessons in one transaction, skipping content that is already stored.
+
+        Lessons are numbered in the order given, after the highest existing
+        number. A lesson is a duplicate when its content_hash matches a stored
+        lesson or an earlier one in the same call, so re-importing a file adds
+        nothing.
+
+        Returns:
+            The lessons added.
+        """
+        with self._transaction() as conn:
+            added, _ = self._insert_unique(conn, list(lessons))
+        return added
+
+    def source_hashes(self, source: str) -> dict[str, str]:
+        """Block hashes recorded by the last import of a source file, by block key."""
+        with self._cursor() as conn:
+            return dict(conn.execute(
+                "SELECT block_key, block_hash FROM lesson_sources WHERE source = ?", [source]
+            ).fetchall())
+
+    def upsert_blocks(
+        self, source: str, blocks: list[tuple[str, str, Optional[LessonCreate]]]
+    ) -> tuple[int, int]:
+        """Store the lessons of new or changed source blocks in one transaction.
+
+        A block already imported from this source updates its lesson in
+        place (keeping the lesson's number); any other block is added as
+        with add_many(). Blocks are only linked to lessons they created: a
+        block duplicating an existing lesson (added by hand, by another
+        file or by another block) is skipped and stays unlinked, so a later
+        edit to it adds a lesson instead of rewriting someone else's. Each
+        block's hash is recorded for the next import.
+
+        Args:
+            source: Identity of the source file, e.g. its resolved path.
+            blocks: (block key, block hash, parsed lesson or None) per block.
+
+        Returns:
+            (lessons added, lessons updated).
+        """
+        with self._transaction() as conn:
+            linked = {
+                key: lesson_id
+                for key, lesson_id in conn.execute(
+                    """
+                    SELECT s.block_key, s.lesson_id FROM lesson_sources s
+                    JOIN lessons ON lessons.id = s.lesson_id
+                    WHERE s.source = ?
+                    """,
+                    [source],
+                ).fetchall()
+            }
+            updates = [(key, lesson) for key, _, lesson in blocks if lesson and key in linked]
+            new = [(key, lesson) for key, _, lesson in blocks if lesson and key not in linked]
+
+            for key, lesson in updates:
+                conn.execute(
+                    """
+                    UPDATE lessons SET title = ?, project = ?, context = ?, problem = ?,
+                        solution = ?, tags = ?, checklist = ?, severity = ?,
+                        content_hash = ?, updated_at = CURRENT_TIMESTAMP
+                    WHERE id = ?
+                    """,
+                    [
+                        lesson.title,
+                        lesson.project,
+                        lesson.context,
+                        lesson.problem,
+                        lesson.solution,
+                        lesson.tags,
+                        lesson.checklist,
+                        lesson.severity,
+                        content_hash(lesson),
+                        linked[key],
+                    ],
+                )
+            if updates:
+                rows = conn.execute(
+                    "SELECT * FROM lessons WHERE list_contains(?::JSON::INTEGER[], id)",
+                    [_json_list(linked[key] for key, _ in updates)],
+                ).fetchall()
+                self._index_lessons(conn, [self._row_to_lesson(row) for row in rows])
+
+            added, ids = self._insert_unique(conn, [lesson for _, lesson in new])
+            created = {lesson.id for lesson in added}
+            for (key, _), lesson_id in zip(new, ids):
+                if lesson_id in created:
+                    linked[key] = lesson_id
+                    created.discard(lesson_id)
 
-            return self._row_to_lesson(result)
+            conn.execute(
+                """
+                INSERT OR REPLACE INTO lesson_sources
+                SELECT ?, UNNEST(?::JSON::VARCHAR[]), UNNEST(?::JSON::VARCHAR[]),
+                       UNNEST(?::JSON::INTEGER[])
+                """,
+                [
+                    source,
+                    _json_list(key for key, _, _ in blocks),
+                    _json_list(digest for _, digest, _ in blocks),
+                    _json_list(linked.get(key) for key, _, _ in blocks),
+                ],
+            )
+
+        return len(added), len(updates)
+
+    def _insert_unique(
+        self, conn: duckdb.DuckDBPyConnection, lessons: list[LessonCreate]
+    ) -> tuple[list[Lesson], list[int]]:
+        """Insert and index the lessons whose content is not stored yet.
+
+        Returns:
+            (lessons added, id of the stored lesson for each given lesson).
+        """
+        stored = dict(conn.execute(
+            "SELECT content_hash, id FROM lessons WHERE content_hash IS NOT NULL"
+        ).fetchall())
+        digests = [content_hash(lesson) for lesson in lessons]
+        records = []
+        pending: set[str] = set()
+        first = self._get_next_number(conn)
+        for lesson, digest in zip(lessons, digests):
+            if digest in stored or digest in pending:
+                continue
+            pending.add(digest)
+            records.append({
+                "number": first + len(records),
+                "title": lesson.title,
+                "date_learned": date.today().isoformat(),
+                "project": lesson.project,
+                "context": lesson.context,
+                "problem": lesson.problem,
+                "solution": lesson.solution,
+                "tags": lesson.tags,
+                "checklist": lesson.checklist,
+                "severity": lesson.severity,
+                "content_hash": digest,
+            })
+        if not records:
+            return [], [stored[digest] for digest in digests]
+
+        # One statement for every row; see _json_list for why JSON
+        conn.execute(BULK_INSERT_SQL, [json.dumps(records)])
+        rows = conn.execute(
+            "SELECT * FROM lessons WHERE number >= ? ORDER BY number", [first]
+        ).fetchall()
+        added = [self._row_to_lesson(row) for row in rows]
+        self._index_lessons(conn, added, replace=False)
+        stored.update((row[-1], row[0]) for row in rows)
+        return added, [stored[digest] for digest in digests]
 
     def get(self, number: int) -> Optional[Lesson]:
         """Get a lesson by number."""
-        with duckdb.connect(str(self.db_path)) as conn:
+        with self._cursor() as conn:
             result = conn.execute(
                 "SELECT * FROM lessons WHERE number = ?", [number]
             ).fetchone()
@@ -101,6 +423,33 @@ class LessonsDB:
         limit: int = 50,
     ) -> list[Lesson]:
         """Search lessons with filters."""
+        key = [
+            "search",
+            query.lower() if query else None,  # ILIKE ignores case
+            sorted(set(tags)) if tags else None,
+            project.lower() if project else None,
+            severity or None,
+            since.isoformat() if since else None,
+            limit,
+        ]
+        rows = self._cached(
+            key,
+            lambda: [
+                lesson.model_dump(mode="json")
+                for lesson in self._search(query, tags, project, severity, since, limit)
+            ],
+        )
+        return [Lesson.model_validate(row) for row in rows]
+
+    def _search(
+        self,
+        query: Optional[str],
+        tags: Optional[list[str]],
+        project: Optional[str],
+        severity: Optional[str],
+        since: Optional[date],
+        limit: int,
+    ) -> list[Lesson]:
         conditions = []
         params: list = []
 
@@ -111,25 +460,13 @@ class LessonsDB:
             pattern = f"%{query}%"
             params.extend([pattern, pattern, pattern])
 
-        if tags:
-            conditions.append("tags && ?")
-            params.append(tags)
-
-        if project:
-            conditions.append("project ILIKE ?")
-            params.append(f"%{project}%")
-
-        if severity:
-            conditions.append("severity = ?")
-            params.append(severity)
-
-        if since:
-            conditions.append("date_learned >= ?")
-            params.append(since)
+        filters, filter_params = self._filters(tags, project, severity, since)
+        conditions.extend(filters)
+        params.extend(filter_params)
 
         where_clause = " AND ".join(conditions) if conditions else "1=1"
 
-        with duckdb.connect(str(self.db_path)) as conn:
+        with self._cursor() as conn:
             results = conn.execute(
                 f"""
                 SELECT * FROM lessons
@@ -142,9 +479,105 @@ class LessonsDB:
 
             return [self._row_to_lesson(row) for row in results]
 
+    def search_ranked(
+        self,
+        query: str,
+        tags: Optional[list[str]] = None,
+        project: Optional[str] = None,
+        severity: Optional[str] = None,
+        since: Optional[date] = None,
+        limit: int = 10,
+    ) -> list[tuple[Lesson, float]]:
+        """Full-text search ranked by BM25, best match first.
+
+        Args:
+            query: Words to look for; "quoted phrases" must match exactly.
+            tags, project, severity, since: Same filters as search().
+            limit: Number of results to return.
+
+        Returns:
+            (lesson, score) pairs.
+        """
+        parsed = parse_query(query)
+        terms = parsed.scoring_terms
+        if not terms:
+            return []
+
+        required = parsed.required_terms
+        conditions, filter_params = self._filters(tags, project, severity, since)
+        where_clause = " AND ".join(conditions) if conditions else "1=1"
+        sql = RANKED_SQL.format(where_clause=where_clause)
+        params = [terms, required, len(required), *filter_params]
+        if not parsed.phrases:
+            # Phrases are checked afterwards, so only cut early without them
+            sql += "LIMIT ?"
+            params.append(limit)
+
+        with self._cursor() as conn:
+            rows = conn.execute(sql, params).fetchall()
+            if parsed.phrases:
+                rows = self._with_phrases(conn, rows, parsed.phrases, required)
+            return [(self._row_to_lesson(row), row[-1]) for row in rows[:limit]]
+
+    def similar(
+        self, text: str, limit: int = 5, min_score: float = 0.05
+    ) -> list[tuple[Lesson, float]]:
+        """Find the lessons whose wording is closest to a text.
+
+        Args:
+            text: Free text, e.g. a problem description.
+            limit: Number of results to return.
+            min_score: Cosine similarity (0-1) below which lessons are left out.
+
+        Returns:
+            (lesson, similarity) pairs, most similar first.
+        """
+        vector = embed(None, [text])
+        if not vector:
+            return []
+        with self._cursor() as conn:
+            rows = conn.execute(
+                SIMILAR_SQL,
+                [_json_list(vector), _json_list(vector.values()), min_score, limit],
+            ).fetchall()
+            return [(self._row_to_lesson(row), row[-1]) for row in rows]
+
+    def reindex(self) -> int:
+        """Rebuild the full-text and similarity indexes from the lessons table.
+
+        Returns:
+            Number of lessons indexed.
+        """
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM lesson_postings")
+            conn.execute("DELETE FROM lesson_doc_lengths")
+            conn.execute("DELETE FROM lesson_vectors")
+            rows = conn.execute("SELECT * FROM lessons").fetchall()
+            lessons = [self._row_to_lesson(row) for row in rows]
+            self._index_lessons(conn, lessons, replace=False)
+
+            # Lessons stored before content hashes existed
+            unhashed = [lesson for lesson, row in zip(lessons, rows) if row[-1] is None]
+            if unhashed:
+                conn.execute(
+                    """
+                    UPDATE lessons SET content_hash = h.content_hash
+                    FROM (
+                        SELECT UNNEST(?::JSON::INTEGER[]) AS id,
+                               UNNEST(?::JSON::VARCHAR[]) AS content_hash
+                    ) h
+                    WHERE lessons.id = h.id
+                    """,
+                    [
+                        _json_list(lesson.id for lesson in unhashed),
+                        _json_list(content_hash(lesson) for lesson in unhashed),
+                    ],
+                )
+        return len(lessons)
+
     def list_all(self, limit: int = 100) -> list[Lesson]:
         """List all lessons."""
-        with duckdb.connect(str(self.db_path)) as conn:
+        with self._cursor() as conn:
             results = conn.execute(
                 "SELECT * FROM lessons ORDER BY number DESC LIMIT ?", [limit]
             ).fetchall()
@@ -152,17 +585,23 @@ class LessonsDB:
 
     def count(self) -> int:
         """Get total lesson count."""
-        with duckdb.connect(str(self.db_path)) as conn:
-            result = conn.execute("SELECT COUNT(*) FROM lessons").fetchone()
-            return result[0] if result else 0
+        def compute() -> int:
+            with self._cursor() as conn:
+                result = conn.execute("SELECT COUNT(*) FROM lessons").fetchone()
+                return result[0] if result else 0
+
+        return self._cached(["count"], compute)
 
     def get_tags(self) -> list[str]:
         """Get all unique tags."""
-        with duckdb.connect(str(self.db_path)) as conn:
-            result = conn.execute(
-                "SELECT DISTINCT UNNEST(tags) as tag FROM lessons ORDER BY tag"
-            ).fetchall()
-            return [row[0] for row in result]
+        def compute() -> list[str]:
+            with self._cursor() as conn:
+                result = conn.execute(
+                    "SELECT DISTINCT UNNEST(tags) as tag FROM lessons ORDER BY tag"
+                ).fetchall()
+                return [row[0] for row in result]
+
+        return self._cached(["tags"], compute)
 
     def export_markdown(self) -> str:
         """Export all lessons to markdown format."""
@@ -187,6 +626,123 @@ class LessonsDB:
 
         return "".join(lines)
 
+    @staticmethod
+    def _filters(
+        tags: Optional[list[str]],
+        project: Optional[str],
+        severity: Optional[str],
+        since: Optional[date],
+    ) -> tuple[list[str], list]:
+        """SQL conditions (with ? placeholders) and parameters for search filters."""
+        conditions = []
+        params: list = []
+
+        if tags:
+            conditions.append("tags && ?")
+            params.append(tags)
+
+        if project:
+            conditions.append("project ILIKE ?")
+            params.append(f"%{project}%")
+
+        if severity:
+            conditions.append("severity = ?")
+            params.append(severity)
+
+        if since:
+            conditions.append("date_learned >= ?")
+            params.append(since)
+
+        return conditions, params
+
+    @staticmethod
+    def _index_lessons(
+        conn: duckdb.DuckDBPyConnection, lessons: list[Lesson], replace: bool = True
+    ) -> None:
+        """Write lessons' postings, lengths and vectors into the search indexes.
+
+        Each table gets one set-based insert for all the lessons;
+        executemany would run a statement per row.
+        """
+        if not lessons:
+            return
+        ids = _json_list(lesson.id for lesson in lessons)
+        if replace:
+            for table in ("lesson_postings", "lesson_doc_lengths", "lesson_vectors"):
+                conn.execute(
+                    f"DELETE FROM {table} WHERE list_contains(?::JSON::INTEGER[], lesson_id)",
+                    [ids],
+                )
+
+        terms, owners, tfs, positions, lengths = [], [], [], [], []
+        features, feature_owners, weights = [], [], []
+        for lesson in lessons:
+            postings, length = index_document(
+                lesson.title, [lesson.problem, lesson.solution, *lesson.checklist]
+            )
+            for term, (tf, term_positions) in postings.items():
+                terms.append(term)
+                owners.append(lesson.id)
+                tfs.append(tf)
+                positions.append(term_positions)
+            lengths.append(length)
+
+            vector = embed(
+                lesson.title,
+                [lesson.problem, lesson.solution, lesson.context, *lesson.checklist, *lesson.tags],
+            )
+            features.extend(vector)
+            feature_owners.extend([lesson.id] * len(vector))
+            weights.extend(vector.values())
+
+        conn.execute(
+            """
+            INSERT INTO lesson_postings
+            SELECT UNNEST(?::JSON::VARCHAR[]), UNNEST(?::JSON::INTEGER[]),
+                   UNNEST(?::JSON::INTEGER[]), UNNEST(?::JSON::INTEGER[][])
+            """,
+            [_json_list(terms), _json_list(owners), _json_list(tfs), _json_list(positions)],
+        )
+        conn.execute(
+            """
+            INSERT INTO lesson_doc_lengths
+            SELECT UNNEST(?::JSON::INTEGER[]), UNNEST(?::JSON::INTEGER[])
+            """,
+            [ids, _json_list(lengths)],
+        )
+        conn.execute(
+            """
+            INSERT INTO lesson_vectors
+            SELECT UNNEST(?::JSON::INTEGER[]), UNNEST(?::JSON::INTEGER[]),
+                   UNNEST(?::JSON::FLOAT[])
+            """,
+            [_json_list(feature_owners), _json_list(features), _json_list(weights)],
+        )
+
+    @staticmethod
+    def _with_phrases(
+        conn: duckdb.DuckDBPyConnection,
+        rows: list[tuple],
+        phrases: list[list[str]],
+        terms: list[str],
+    ) -> list[tuple]:
+        """Keep the ranked rows whose lesson contains every phrase."""
+        if not rows:
+            return rows
+        positions: dict[int, dict[str, list[int]]] = {}
+        for lesson_id, term, term_positions in conn.execute(
+            """
+            SELECT lesson_id, term, positions FROM lesson_postings
+            WHERE list_contains(?, lesson_id) AND list_contains(?, term)
+            """,
+            [[row[0] for row in rows], terms],
+        ).fetchall():
+            positions.setdefault(lesson_id, {})[term] = term_positions
+        return [
+            row for row in rows
+            if all(phrase_matches(positions.get(row[0], {}), phrase) for phrase in phrases)
+        ]
+
     @staticmethod
     def _row_to_lesson(row: tuple) -> Lesson:
         """Convert database row to Lesson model."""
@@ -203,3 +759,20 @@ class LessonsDB:
             checklist=row[9] or [],
             severity=row[10],
         )
+
+
+def _json_list(values: Iterable) -> str:
+    """Encode a list parameter as JSON text for a ``?::JSON::T[]`` cast.
+
+    DuckDB converts a Python list parameter element by element, which is
+    slow for the hundreds of values in a lesson's postings or vector; one
+    string parameter is converted once and parsed inside the engine.
+    """
+    return json.dumps(list(values))
+
+
+def content_hash(lesson: Union[Lesson, LessonCreate]) -> str:
+    """Hash of a lesson's title, problem and solution, ignoring case and spacing."""
+    texts = (lesson.title, lesson.problem, lesson.solution)
+    parts = (" ".join(text.split()).casefold() for text in texts)
+    return hashlib.sha256("\x1f".join(parts).encode()).hexdigest()
@@ -1,65 +1,146 @@
-"""Import lessons from existing devlessons.md file."""
+"""Import lessons from existing devlessons.md file.
 
+Imports are incremental: the file is split into lesson blocks (one per
+"## Lesson" heading) and each block is hashed. Only blocks whose hash
+differs from the one recorded by the previous import of the same file
+are parsed and stored; a changed block updates the lesson it created.
+Blocks removed from the file leave their lessons in place.
+"""
+
+import functools
+import hashlib
 import re
-from datetime import date
+from dataclasses import dataclass
 from pathlib import Path
+from typing import Optional
 
 from claude_cli.lessons.db import LessonsDB
 from claude_cli.lessons.models import LessonCreate
 
+# Matches both ## Lesson and ### Lesson formats
+_LESSON_HEADING_RE = re.compile(r'^##+ Lesson\s*(\d+)?[:\s]*(.+?)$', re.MULTILINE)
+_DATE_RE = re.compile(r'\*\*Date\*\*[:\s]*(\d{4}-\d{2}-\d{2})')
+_PROJECT_RE = re.compile(r'\*\*(?:Project|Context)\*\*[:\s]*([^\n]+)')
+_CONTEXT_RE = re.compile(r'\*\*Context\*\*[:\s]*([^\n]+)')
+_CHECKLIST_RE = re.compile(r'- \[[ x]\]\s*(.+)')
+
+# Common technology keywords
+TAG_KEYWORDS = {
+    "python": ["python", "pytest", "pydantic", "fastapi"],
+    "javascript": ["javascript", "typescript", "react", "next.js", "node"],
+    "testing": ["test", "pytest", "playwright", "e2e"],
+    "database": ["database", "sql", "duckdb", "postgres", "sqlite"],
+    "docker": ["docker", "container", "dockerfile"],
+    "git": ["git", "commit", "branch", "worktree"],
+    "api": ["api", "endpoint", "rest", "graphql"],
+    "architecture": ["hexagonal", "architecture", "ports", "adapters"],
+    "deployment": ["deploy", "fly.io", "ci/cd", "pipeline"],
+}
+
+
+def _build_tag_matcher() -> tuple[re.Pattern[str], dict[str, frozenset[str]]]:
+    """One regex finding every keyword occurrence, and the tags each match implies.
+
+    The pattern is a lookahead tried at every position, so overlapping
+    keywords are all found in one pass. Where several keywords start at
+    the same position only the longest is reported, so each keyword also
+    carries the tags of the keywords it contains (e.g. "sqlite" -> "sql").
+    """
+    keywords = {keyword for patterns in TAG_KEYWORDS.values() for keyword in patterns}
+    tags_of = {
+        keyword: frozenset(
+            tag
+            for tag, patterns in TAG_KEYWORDS.items()
+            if any(pattern in keyword for pattern in patterns)
+        )
+        for keyword in keywords
+    }
+    alternation = "|".join(re.escape(k) for k in sorted(keywords, key=len, reverse=True))
+    return re.compile(f"(?=({alternation}))"), tags_of
+
+
+_TAG_RE, _TAGS_OF = _build_tag_matcher()
+
+
+@dataclass
+class LessonBlock:
+    """The raw text of one lesson in a markdown file."""
+
+    key: str  # stable identity within the file: lesson number, else title
+    number_str: Optional[str]
+    title: str
+    body: str
+    hash: str
 
-def import_from_markdown(file_path: str) -> int:
-    """Import lessons from a markdown file.
+
+@dataclass
+class ImportResult:
+    """Outcome of importing a markdown file."""
+
+    added: int
+    updated: int
+    unchanged: int
+
+
+def import_from_markdown(file_path: str, db: Optional[LessonsDB] = None) -> ImportResult:
+    """Import new and changed lessons from a markdown file.
+
+    Everything is stored in one transaction. New lessons whose content is
+    already in the database are skipped, so importing a file twice, or
+    importing a copy of it, adds nothing.
 
     Returns:
-        Number of lessons imported.
+        Counts of lessons added and updated, and of blocks left unchanged.
     """
     path = Path(file_path)
     if not path.exists():
         raise FileNotFoundError(f"File not found: {file_path}")
 
-    content = path.read_text()
-    lessons = parse_lessons(content)
-
-    db = LessonsDB()
-    count = 0
+    source = str(path.resolve())
+    blocks = split_blocks(path.read_text())
 
-    for lesson_data in lessons:
-        try:
-            db.add(lesson_data)
-            count += 1
-        except Exception as e:
-            print(f"Warning: Failed to import lesson '{lesson_data.title}': {e}")
+    db = db or LessonsDB()
+    known = db.source_hashes(source)
+    changed = [block for block in blocks if known.get(block.key) != block.hash]
+    if not changed:
+        return ImportResult(added=0, updated=0, unchanged=len(blocks))
 
-    return count
+    added, updated = db.upsert_blocks(source, [
+        (block.key, block.hash, parse_lesson_body(block.title, block.body, block.number_str))
+        for block in changed
+    ])
+    return ImportResult(added=added, updated=updated, unchanged=len(blocks) - len(changed))
 
 
-def parse_lessons(content: str) -> list[LessonCreate]:
-    """Parse lessons from markdown content."""
-    lessons = []
+def split_blocks(content: str) -> list[LessonBlock]:
+    """Split markdown content into lesson blocks, without parsing them."""
+    headings = list(_LESSON_HEADING_RE.finditer(content))
+    blocks = []
+    seen: dict[str, int] = {}
+    for index, heading in enumerate(headings):
+        end = headings[index + 1].start() if index + 1 < len(headings) else len(content)
+        number_str, title = heading.group(1), heading.group(2).strip()
+        body = content[heading.end():end]
 
-    # Pattern matches both ## Lesson and ### Lesson formats
-    lesson_pattern = re.compile(
-        r'^##+ Lesson\s*(\d+)?[:\s]*(.+?)$',
-        re.MULTILINE
-    )
+        key = number_str or "title:" + " ".join(title.split()).casefold()
+        seen[key] = seen.get(key, 0) + 1
+        if seen[key] > 1:
+            key = f"{key}#{seen[key]}"
 
-    # Split content by lesson headers
-    parts = lesson_pattern.split(content)
+        # Trailing blank lines belong to no lesson: appending one must not
+        # change the hash of the block before it
+        digest = hashlib.sha256(content[heading.start():end].rstrip().encode()).hexdigest()
+        blocks.append(LessonBlock(key, number_str, title, body, digest))
+    return blocks
 
-    # Parts will be: [preamble, num1, title1, content1, num2, title2, content2, ...]
-    i = 1
-    while i < len(parts) - 2:
-        number_str = parts[i]
-        title = parts[i + 1].strip()
-        body = parts[i + 2] if i + 2 < len(parts) else ""
 
-        lesson = parse_lesson_body(title, body, number_str)
+def parse_lessons(content: str) -> list[LessonCreate]:
+    """Parse lessons from markdown content."""
+    lessons = []
+    for block in split_blocks(content):
+        lesson = parse_lesson_body(block.title, block.body, block.number_str)
         if lesson:
             lessons.append(lesson)
-
-        i += 3
-
     return lessons
 
 
@@ -69,15 +150,15 @@ def parse_lesson_body(title: str, body: str, number_str: str | None) -> LessonCr
         return None
 
     # Extract date
-    date_match = re.search(r'\*\*Date\*\*[:\s]*(\d{4}-\d{2}-\d{2})', body)
+    date_match = _DATE_RE.search(body)
     lesson_date = date_match.group(1) if date_match else None
 
     # Extract project
-    project_match = re.search(r'\*\*(?:Project|Context)\*\*[:\s]*([^\n]+)', body)
+    project_match = _PROJECT_RE.search(body)
     project = project_match.group(1).strip() if project_match else None
 
     # Extract context (different from project)
-    context_match = re.search(r'\*\*Context\*\*[:\s]*([^\n]+)', body)
+    context_match = _CONTEXT_RE.search(body)
     context = context_match.group(1).strip() if context_match else None
 
     # Extract problem section
@@ -112,53 +193,38 @@ def parse_lesson_body(title: str, body: str, number_str: str | None) -> LessonCr
 def extract_section(body: str, headers: list[str]) -> str:
     """Extract a section by header name."""
     for header in headers:
-        # Try ### Header format
-        pattern = rf'###\s*{header}[:\s]*\n(.*?)(?=\n###|\n##|\Z)'
-        match = re.search(pattern, body, re.DOTALL | re.IGNORECASE)
-        if match:
-            return match.group(1).strip()
-
-        # Try **Header:** format
-        pattern = rf'\*\*{header}[:\s]*\*\*[:\s]*\n?(.*?)(?=\n\*\*|\n###|\n##|\Z)'
-        match = re.search(pattern, body, re.DOTALL | re.IGNORECASE)
-        if match:
-            return match.group(1).strip()
+        for pattern in _section_patterns(header):
+            match = pattern.search(body)
+            if match:
+                return match.group(1).strip()
 
     return ""
 
 
+@functools.lru_cache(maxsize=None)
+def _section_patterns(header: str) -> tuple[re.Pattern[str], re.Pattern[str]]:
+    """Compiled patterns for a section header: ### Header, then **Header:**."""
+    return (
+        re.compile(rf'###\s*{header}[:\s]*\n(.*?)(?=\n###|\n##|\Z)', re.DOTALL | re.IGNORECASE),
+        re.compile(
+            rf'\*\*{header}[:\s]*\*\*[:\s]*\n?(.*?)(?=\n\*\*|\n###|\n##|\Z)',
+            re.DOTALL | re.IGNORECASE,
+        ),
+    )
+
+
 def extract_checklist(body: str) -> list[str]:
     """Extract checklist items from body."""
-    items = []
-    pattern = r'- \[[ x]\]\s*(.+)'
-    for match in re.finditer(pattern, body):
-        items.append(match.group(1).strip())
-    return items
+    return [match.group(1).strip() for match in _CHECKLIST_RE.finditer(body)]
 
 
 def extract_tags(title: str, body: str) -> list[str]:
-    """Extract likely tags from content."""
-    tags = set()
-
-    # Common technology keywords
-    keywords = {
-        "python": ["python", "pytest", "pydantic", "fastapi"],
-        "javascript": ["javascript", "typescript", "react", "next.js", "node"],
-        "testing": ["test", "pytest", "playwright", "e2e"],
-        "database": ["database", "sql", "duckdb", "postgres", "sqlite"],
-        "docker": ["docker", "container", "dockerfile"],
-        "git": ["git", "commit", "branch", "worktree"],
-        "api": ["api", "endpoint", "rest", "graphql"],
-        "architecture": ["hexagonal", "architecture", "ports", "adapters"],
-        "deployment": ["deploy", "fly.io", "ci/cd", "pipeline"],
-    }
+    """Extract likely tags from content.
 
-    text = (title + " " + body).lower()
-
-    for tag, patterns in keywords.items():
-        for pattern in patterns:
-            if pattern in text:
-                tags.add(tag)
-                break
-
-    return list(tags)
+    A tag applies when any of its TAG_KEYWORDS occurs anywhere in the
+    title or body (case-insensitive); the text is scanned once.
+    """
+    tags: set[str] = set()
+    for match in _TAG_RE.finditer((title + " " + body).lower()):
+        tags |= _TAGS_OF[match.group(1)]
+    return sorted(tags)
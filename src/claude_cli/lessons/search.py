@@ -0,0 +1,101 @@
+"""Text analysis for ranked lesson search.
+
+Lessons are indexed into a positional inverted index (the lesson_postings
+and lesson_doc_lengths tables) when they are added, and queries are
+scored with BM25 in SQL. The indexed document is a lesson's title,
+problem, solution and checklist. Title terms count TITLE_BOOST extra
+times towards term frequency, a cheap stand-in for per-field weights.
+
+Queries are split into plain terms, which any match may contain, and
+double-quoted phrases, which a match must contain as consecutive words
+within one field.
+"""
+
+import re
+from dataclasses import dataclass, field
+from typing import Iterable, Optional
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+TITLE_BOOST = 2
+
+_TOKEN_RE = re.compile(r"[a-z0-9_]+")
+_PHRASE_RE = re.compile(r'"([^"]*)"')
+
+
+@dataclass
+class Query:
+    """A parsed search query."""
+
+    terms: list[str] = field(default_factory=list)
+    phrases: list[list[str]] = field(default_factory=list)
+
+    @property
+    def scoring_terms(self) -> list[str]:
+        """Every distinct term that contributes to the score."""
+        seen = dict.fromkeys(self.terms)
+        for phrase in self.phrases:
+            seen.update(dict.fromkeys(phrase))
+        return list(seen)
+
+    @property
+    def required_terms(self) -> list[str]:
+        """Terms a match must contain (those of the phrases)."""
+        return list(dict.fromkeys(term for phrase in self.phrases for term in phrase))
+
+
+def tokenize(text: Optional[str]) -> list[str]:
+    """Lower-case a text and split it into word tokens."""
+    return _TOKEN_RE.findall(text.lower()) if text else []
+
+
+def parse_query(query: str) -> Query:
+    """Split a query into plain terms and "quoted phrases"."""
+    phrases = [tokenize(match) for match in _PHRASE_RE.findall(query)]
+    rest = _PHRASE_RE.sub(" ", query)
+    parsed = Query(terms=list(dict.fromkeys(tokenize(rest))))
+    for phrase in phrases:
+        if len(phrase) == 1:
+            parsed.terms.append(phrase[0])
+        elif phrase:
+            parsed.phrases.append(phrase)
+    return parsed
+
+
+def index_document(
+    title: str, fields: Iterable[Optional[str]]
+) -> tuple[dict[str, tuple[int, list[int]]], int]:
+    """Build the postings of one lesson.
+
+    Args:
+        title: Lesson title (boosted).
+        fields: The other indexed texts, e.g. problem, solution, checklist items.
+
+    Returns:
+        ({term: (weighted term frequency, positions)}, document length).
+    """
+    postings: dict[str, tuple[int, list[int]]] = {}
+    position = 0
+    for index, text in enumerate([title, *fields]):
+        boost = 1 + TITLE_BOOST if index == 0 else 1
+        for token in tokenize(text):
+            tf, positions = postings.get(token, (0, []))
+            positions.append(position)
+            postings[token] = (tf + boost, positions)
+            position += 1
+        # Leave a gap so phrases never span two fields
+        position += 1
+    length = sum(tf for tf, _ in postings.values())
+    return postings, length
+
+
+def phrase_matches(positions: dict[str, list[int]], phrase: list[str]) -> bool:
+    """True if the words of a phrase occur at consecutive positions."""
+    if any(term not in positions for term in phrase):
+        return False
+    following = [set(positions[term]) for term in phrase[1:]]
+    return any(
+        all(start + offset + 1 in later for offset, later in enumerate(following))
+        for start in positions[phrase[0]]
+    )
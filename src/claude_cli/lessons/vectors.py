@@ -0,0 +1,62 @@
+"""Local text vectors for lesson similarity.
+
+A hashing-trick vectoriser: each word, and each character trigram of a
+word, is hashed into one of DIMENSIONS buckets. Trigrams let different
+wordings of the same idea overlap ("caching" and "cached" share "#ca",
+"cac", "ach"), while whole words keep exact matches on top. Counts are
+damped with log1p and the vector is L2-normalised, so the dot product of
+two vectors is their cosine similarity.
+
+Vectors depend only on their own text, with no corpus statistics, so a
+lesson's vector never changes once computed and the index can be updated
+one lesson at a time. Common English words are dropped instead of being
+down-weighted by IDF.
+"""
+
+import math
+import zlib
+from typing import Iterable, Optional
+
+from claude_cli.lessons.search import tokenize
+
+DIMENSIONS = 1 << 20
+TITLE_WEIGHT = 2.0
+# Share of a word's weight spread over its trigrams
+TRIGRAM_WEIGHT = 1.0
+
+STOPWORDS = frozenset(
+    """a an and are as at be but by can do does for from had has have how if in into is it
+    its not of on or so that the their then there these this to was were when which while
+    will with without you your we our i""".split()
+)
+
+
+def embed(title: Optional[str], fields: Iterable[Optional[str]] = ()) -> dict[int, float]:
+    """Vectorise a title plus other texts into a sparse unit vector."""
+    counts: dict[int, float] = {}
+    _accumulate(counts, title, TITLE_WEIGHT)
+    for text in fields:
+        _accumulate(counts, text, 1.0)
+
+    vector = {bucket: math.log1p(count) for bucket, count in counts.items()}
+    norm = math.sqrt(sum(weight * weight for weight in vector.values()))
+    if not norm:
+        return {}
+    return {bucket: weight / norm for bucket, weight in vector.items()}
+
+
+def _accumulate(counts: dict[int, float], text: Optional[str], weight: float) -> None:
+    for token in tokenize(text):
+        if token in STOPWORDS:
+            continue
+        _add(counts, "w:" + token, weight)
+        padded = f"#{token}#"
+        trigrams = [padded[i:i + 3] for i in range(len(padded) - 2)]
+        share = weight * TRIGRAM_WEIGHT / len(trigrams)
+        for trigram in trigrams:
+            _add(counts, "c:" + trigram, share)
+
+
+def _add(counts: dict[int, float], feature: str, weight: float) -> None:
+    bucket = zlib.crc32(feature.encode()) % DIMENSIONS
+    counts[bucket] = counts.get(bucket, 0.0) + weight
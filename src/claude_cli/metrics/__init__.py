@@ -1,8 +1,11 @@
 """Agent performance metrics collection and reporting."""
 
+from claude_cli.metrics.catalog import collect_incremental
 from claude_cli.metrics.collector import (
+    AgentProjectStats,
     AgentRun,
     AgentStats,
+    DailyStats,
     MetricsReport,
     aggregate_metrics,
     collect_from_batch_ledgers,
@@ -10,14 +13,24 @@ from claude_cli.metrics.collector import (
     load_metrics_history,
     store_metrics,
 )
+from claude_cli.metrics.regressions import Regression, detect_regressions
+from claude_cli.metrics.warehouse import aggregate_runs, query_report, store_runs
 
 __all__ = [
+    "AgentProjectStats",
     "AgentRun",
     "AgentStats",
+    "DailyStats",
     "MetricsReport",
+    "Regression",
     "aggregate_metrics",
+    "aggregate_runs",
     "collect_from_batch_ledgers",
     "collect_from_evidence",
+    "collect_incremental",
+    "detect_regressions",
     "load_metrics_history",
+    "query_report",
     "store_metrics",
+    "store_runs",
 ]
@@ -0,0 +1,185 @@
+"""Incremental collection of agent runs.
+
+A source is the set of files runs are read from: one batch (its
+ledger.yaml, the ledger journal and results/index.jsonl) or one
+project's evidence/agent_runs.json. The warehouse catalogue remembers
+each source's combined mtime, size and content hash from the last pass:
+
+- mtime and size unchanged: the source is skipped without being read.
+- they changed but the content hash did not (e.g. a touch or a copy):
+  only the catalogue entry is refreshed.
+- otherwise the source is parsed and its runs replace the ones it
+  produced before.
+
+So a periodic collection over many projects only reads what moved.
+
+Hashing and parsing the changed sources can run in a process pool. The
+parent only stats files and writes: workers never open the database.
+Their runs come back in source order and are written every WRITE_BATCH
+sources while the workers carry on parsing.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import multiprocessing
+import os
+from collections.abc import Iterator
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from itertools import islice
+from pathlib import Path
+
+from claude_cli.batch.broker import INDEX_FILENAME
+from claude_cli.batch.ledger import journal_path_for
+from claude_cli.metrics.collector import (
+    AgentRun,
+    batch_ledgers,
+    collect_from_evidence,
+    discover_projects,
+    runs_from_batch,
+)
+from claude_cli.metrics.warehouse import load_catalog, replace_sources
+
+_HASH_CHUNK = 1024 * 1024
+# Sources written per warehouse transaction
+WRITE_BATCH = 64
+
+
+@dataclass
+class Source:
+    """Files one group of runs is collected from."""
+
+    kind: str  # "batch" or "evidence"
+    path: Path  # ledger.yaml or agent_runs.json; the catalogue key
+    project_root: Path
+
+    def files(self) -> list[Path]:
+        """Every file whose change can change the runs."""
+        if self.kind == "batch":
+            return [
+                self.path,
+                journal_path_for(self.path),
+                self.path.parent / "results" / INDEX_FILENAME,
+            ]
+        return [self.path]
+
+    def stat(self) -> tuple[int, int]:
+        """(latest mtime_ns, total size) of the files that exist."""
+        mtime_ns = size = 0
+        for path in self.files():
+            try:
+                st = path.stat()
+            except OSError:
+                continue
+            mtime_ns = max(mtime_ns, st.st_mtime_ns)
+            size += st.st_size
+        return mtime_ns, size
+
+    def content_hash(self) -> str:
+        """SHA-256 over the files' names and contents."""
+        h = hashlib.sha256()
+        for path in self.files():
+            h.update(path.name.encode() + b"\0")
+            try:
+                with open(path, "rb") as f:
+                    while chunk := f.read(_HASH_CHUNK):
+                        h.update(chunk)
+            except OSError:
+                h.update(b"\0missing\0")
+        return h.hexdigest()
+
+    def read(self) -> list[AgentRun]:
+        """Parse the source's runs."""
+        if self.kind == "batch":
+            return runs_from_batch(self.path, self.project_root.name)
+        return collect_from_evidence(self.project_root)
+
+
+@dataclass
+class CollectionResult:
+    """Outcome of a collection pass."""
+
+    sources: int
+    changed: int
+    runs: int
+
+
+def discover_sources(base_dir: Path) -> list[Source]:
+    """Batch and evidence sources of every governed project under base_dir."""
+    sources = []
+    for project_root in discover_projects(base_dir):
+        for ledger_path in batch_ledgers(project_root):
+            sources.append(Source("batch", ledger_path, project_root))
+        evidence = project_root / ".claude" / "evidence" / "agent_runs.json"
+        if evidence.exists():
+            sources.append(Source("evidence", evidence, project_root))
+    return sources
+
+
+def collect_incremental(
+    base_dir: Path, db_path: Path, full: bool = False, jobs: int | None = 1
+) -> CollectionResult:
+    """Collect runs from sources changed since the last pass into the warehouse.
+
+    Args:
+        base_dir: Directory holding the projects.
+        db_path: Metrics database.
+        full: Re-read every source regardless of the catalogue.
+        jobs: Worker processes for hashing and parsing; None for one per CPU.
+    """
+    sources = discover_sources(base_dir)
+    catalog = {} if full else load_catalog(db_path)
+
+    pending: list[tuple[Source, str, int, int, str | None]] = []
+    for source in sources:
+        key = str(source.path.resolve())
+        mtime_ns, size = source.stat()
+        known = catalog.get(key)
+        if known is not None and known[:2] == (mtime_ns, size):
+            continue
+        pending.append((source, key, mtime_ns, size, known[2] if known else None))
+
+    changed = runs = 0
+    for batch in _batches(_scan_all(pending, jobs), WRITE_BATCH):
+        collected = {key: entry for key, entry, parsed in batch if parsed}
+        touched = {key: entry[:3] for key, entry, parsed in batch if not parsed}
+        runs += replace_sources(db_path, collected, touched)
+        changed += len(collected)
+    return CollectionResult(sources=len(sources), changed=changed, runs=runs)
+
+
+def _scan(
+    task: tuple[Source, str, int, int, str | None],
+) -> tuple[str, tuple[int, int, str, list[AgentRun]], bool]:
+    """Hash a source and parse it if its content changed (runs in a worker).
+
+    Returns:
+        (catalogue key, (mtime_ns, size, hash, runs), whether it was parsed).
+    """
+    source, key, mtime_ns, size, known_hash = task
+    digest = source.content_hash()
+    if digest == known_hash:
+        return key, (mtime_ns, size, digest, []), False
+    return key, (mtime_ns, size, digest, source.read()), True
+
+
+def _scan_all(tasks: list, jobs: int | None) -> Iterator[tuple]:
+    """_scan every task, in order, in a process pool when that can help."""
+    workers = min(jobs or os.cpu_count() or 1, len(tasks))
+    if workers <= 1:
+        yield from map(_scan, tasks)
+        return
+    # The parent has DuckDB's threads running by now, so workers come from
+    # a clean fork server rather than a fork of this process
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context("forkserver" if "forkserver" in methods else None)
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+        # Several sources per round trip; small enough to keep every worker busy
+        chunksize = max(1, min(16, len(tasks) // (workers * 4)))
+        yield from pool.map(_scan, tasks, chunksize=chunksize)
+
+
+def _batches(items: Iterator, size: int) -> Iterator[list]:
+    while batch := list(islice(items, size)):
+        yield batch
@@ -2,19 +2,21 @@
 
 from __future__ import annotations
 
+import json
+from dataclasses import asdict
 from pathlib import Path
+from typing import Optional
 
 import typer
 from rich.console import Console
+from rich.table import Table
 
 from claude_cli.common.config import get_db_path
-from claude_cli.metrics.collector import (
-    aggregate_metrics,
-    collect_from_batch_ledgers,
-    collect_from_evidence,
-    load_metrics_history,
-    store_metrics,
-)
+from claude_cli.metrics.catalog import collect_incremental
+from claude_cli.metrics.collector import MetricsReport, load_metrics_history
+from claude_cli.metrics.regressions import detect_regressions, link_changes
+from claude_cli.metrics.warehouse import query_report
+from claude_cli.versioning.tracker import load_history
 
 app = typer.Typer(help="Agent performance metrics")
 console = Console()
@@ -25,6 +27,12 @@ def collect(
     base_dir: Path = typer.Option(
         None, "--base-dir", "-b", help="Base directory to scan for projects"
     ),
+    full: bool = typer.Option(
+        False, "--full", help="Re-read every source, not only those changed since the last run"
+    ),
+    jobs: Optional[int] = typer.Option(
+        None, "--jobs", "-j", min=1, help="Worker processes for parsing (default: one per CPU)"
+    ),
 ) -> None:
     """Scan projects and collect agent run metrics."""
     if base_dir is None:
@@ -34,40 +42,33 @@ def collect(
         console.print(f"[red]Directory not found:[/red] {base_dir}")
         raise typer.Exit(code=1)
 
-    runs = collect_from_batch_ledgers(base_dir)
-
-    # Also collect from evidence files in discovered projects
-    for manifest in sorted(base_dir.glob("*/.claude/manifest.yaml")):
-        project_root = manifest.parent.parent
-        runs.extend(collect_from_evidence(project_root))
+    db_path = get_db_path("metrics.duckdb")
+    result = collect_incremental(base_dir, db_path, full=full, jobs=jobs)
 
-    if not runs:
+    if not result.sources:
         console.print("[yellow]No agent runs found.[/yellow]")
         return
 
-    report = aggregate_metrics(runs)
-    db_path = get_db_path("metrics.duckdb")
-    store_metrics(report, db_path)
-
-    projects_count = len(report.by_project)
-    console.print(f"[green]Collected {len(runs)} runs from {projects_count} projects.[/green]")
+    console.print(
+        f"[green]Collected {result.runs} runs from {result.changed} changed sources "
+        f"({result.sources} scanned).[/green]"
+    )
     console.print(f"[dim]Stored in {db_path}[/dim]")
 
 
 @app.command("report")
 def report(
-    days: int = typer.Option(30, "--days", "-d", help="Number of recent reports to show"),
+    days: Optional[int] = typer.Option(
+        None, "--days", "-d", help="Only runs started in the last N days (default: all)"
+    ),
     json_output: bool = typer.Option(False, "--json", help="Output as JSON"),
 ) -> None:
     """Show aggregated metrics report."""
-    db_path = get_db_path("metrics.duckdb")
-    history = load_metrics_history(db_path, days=days)
-
-    if not history:
+    latest = _load_report(days)
+    if latest is None:
         console.print("[yellow]No metrics history found. Run 'caf metrics collect' first.[/yellow]")
         return
 
-    latest = history[0]
     if json_output:
         console.print(latest.to_json())
     else:
@@ -75,16 +76,17 @@ def report(
 
 
 @app.command("dashboard")
-def dashboard() -> None:
+def dashboard(
+    days: Optional[int] = typer.Option(
+        None, "--days", "-d", help="Only runs started in the last N days (default: all)"
+    ),
+) -> None:
     """Show one-line summary stats."""
-    db_path = get_db_path("metrics.duckdb")
-    history = load_metrics_history(db_path, days=1)
-
-    if not history:
+    latest = _load_report(days)
+    if latest is None:
         console.print("[yellow]No metrics data. Run 'caf metrics collect' first.[/yellow]")
         return
 
-    latest = history[0]
     agents = len(latest.by_agent)
     projects = len(latest.by_project)
 
@@ -97,3 +99,83 @@ def dashboard() -> None:
         f"{agents} agent types | {projects} projects | "
         f"{avg_success:.0%} avg success"
     )
+
+
+@app.command("regressions")
+def regressions(
+    recent: int = typer.Option(7, "--recent", min=1, help="Days in the recent window"),
+    baseline: int = typer.Option(
+        28, "--baseline", min=1, help="Days in the baseline window before it"
+    ),
+    alpha: float = typer.Option(0.01, "--alpha", help="Significance level"),
+    min_change: float = typer.Option(
+        0.1, "--min-change", help="Smallest median increase to flag (0.1 = +10%)"
+    ),
+    min_runs: int = typer.Option(5, "--min-runs", min=2, help="Runs needed in each window"),
+    json_output: bool = typer.Option(False, "--json", help="Output as JSON"),
+) -> None:
+    """Flag agent types whose recent duration or token use rose against the baseline."""
+    found = detect_regressions(
+        get_db_path("metrics.duckdb"),
+        recent_days=recent,
+        baseline_days=baseline,
+        alpha=alpha,
+        min_change=min_change,
+        min_runs=min_runs,
+    )
+    link_changes(found, load_history(), recent_days=recent)
+
+    if json_output:
+        console.print_json(json.dumps([asdict(r) for r in found], default=str))
+        return
+    if not found:
+        console.print(
+            f"[green]No regressions in the last {recent} days "
+            f"against the {baseline} before.[/green]"
+        )
+        return
+
+    table = Table(title=f"Regressions: last {recent} days vs the {baseline} before")
+    table.add_column("Agent", style="cyan")
+    table.add_column("Metric")
+    table.add_column("Baseline", justify="right")
+    table.add_column("Recent", justify="right")
+    table.add_column("Change", justify="right", style="red")
+    table.add_column("p", justify="right")
+    table.add_column("Runs", justify="right", style="dim")
+    for r in found:
+        table.add_row(
+            r.agent_type,
+            r.metric,
+            f"{r.baseline_median:,.0f}",
+            f"{r.recent_median:,.0f}",
+            f"{r.change:+.0%}",
+            f"{r.p_value:.1e}",
+            f"{r.n_baseline}/{r.n_recent}",
+        )
+    console.print(table)
+
+    for r in found:
+        if not r.related_changes and not r.other_changes:
+            continue
+        console.print(f"\n[bold]{r.agent_type}[/bold] ({r.metric}): changes in the window")
+        for change in r.related_changes:
+            console.print(
+                f"  {change.get('valid_from', '')[:16]}  {change.get('file_path', '')} "
+                f"v{change.get('version', '?')}  {change.get('change_summary') or ''}"
+            )
+        if r.other_changes:
+            console.print(f"  [dim]{r.other_changes} other framework changes[/dim]")
+
+
+def _load_report(days: Optional[int]) -> Optional[MetricsReport]:
+    """Aggregate stored runs, falling back to the last report snapshot of older databases."""
+    db_path = get_db_path("metrics.duckdb")
+    latest = query_report(db_path, days=days)
+    if latest.total_runs:
+        return latest
+    if days is None:
+        history = load_metrics_history(db_path, days=1)
+        if history:
+            return history[0]
+    return None
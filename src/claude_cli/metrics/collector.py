@@ -1,17 +1,20 @@
 """Agent performance metrics collection and aggregation.
 
-Collects agent run data from batch ledgers and evidence files,
-aggregates into reports, and stores in DuckDB for trending.
+Collects agent run data from batch ledgers and evidence files and
+aggregates it into reports. Runs are stored one row each in DuckDB for
+trending (see claude_cli.metrics.warehouse).
 """
 
 from __future__ import annotations
 
 import json
-from dataclasses import dataclass, field
-from datetime import UTC, datetime
+from dataclasses import asdict, dataclass, field
 from pathlib import Path
 
-from claude_cli.cockpit.generator import read_yaml_simple
+import yaml
+
+from claude_cli.batch.broker import load_index
+from claude_cli.batch.ledger import load_ledger
 
 
 @dataclass
@@ -26,6 +29,8 @@ class AgentRun:
     tool_uses: int
     status: str  # "completed", "failed", "timeout"
     task_ids: list[str] = field(default_factory=list)
+    # Identity of the run within its project, e.g. "{batch}/{item}"; empty if unknown
+    run_id: str = ""
 
 
 @dataclass
@@ -37,6 +42,34 @@ class AgentStats:
     avg_tokens: float
     avg_tool_uses: float
     success_rate: float
+    p50_duration_ms: float = 0.0
+    p90_duration_ms: float = 0.0
+    p99_duration_ms: float = 0.0
+    p50_tokens: float = 0.0
+    p90_tokens: float = 0.0
+    p99_tokens: float = 0.0
+
+
+@dataclass
+class DailyStats:
+    """Runs started on one UTC day."""
+
+    day: str  # YYYY-MM-DD
+    runs: int
+    success_rate: float
+    p50_duration_ms: float
+    p90_duration_ms: float
+    total_tokens: int
+
+
+@dataclass
+class AgentProjectStats:
+    """Outcome of one agent type's runs in one project."""
+
+    agent_type: str
+    project_slug: str
+    runs: int
+    success_rate: float
 
 
 @dataclass
@@ -47,6 +80,11 @@ class MetricsReport:
     total_runs: int
     by_agent: dict[str, AgentStats] = field(default_factory=dict)
     by_project: dict[str, int] = field(default_factory=dict)
+    # Runs started in the last N days only; None when all runs are included
+    window_days: int | None = None
+    # Oldest day first; runs without a usable start time are left out
+    by_day: list[DailyStats] = field(default_factory=list)
+    by_agent_project: list[AgentProjectStats] = field(default_factory=list)
 
     def to_json(self) -> str:
         """Serialize report to JSON."""
@@ -54,17 +92,11 @@ class MetricsReport:
             {
                 "generated_at": self.generated_at,
                 "total_runs": self.total_runs,
-                "by_agent": {
-                    name: {
-                        "runs": stats.runs,
-                        "avg_duration_ms": stats.avg_duration_ms,
-                        "avg_tokens": stats.avg_tokens,
-                        "avg_tool_uses": stats.avg_tool_uses,
-                        "success_rate": stats.success_rate,
-                    }
-                    for name, stats in self.by_agent.items()
-                },
+                "window_days": self.window_days,
+                "by_agent": {name: asdict(stats) for name, stats in self.by_agent.items()},
                 "by_project": self.by_project,
+                "by_day": [asdict(day) for day in self.by_day],
+                "by_agent_project": [asdict(cell) for cell in self.by_agent_project],
             },
             indent=2,
         )
@@ -78,6 +110,8 @@ class MetricsReport:
             f"**Total Runs**: {self.total_runs}",
             "",
         ]
+        if self.window_days is not None:
+            lines.insert(3, f"**Window**: last {self.window_days} days  ")
 
         if not self.by_agent:
             lines.append("No agent runs recorded.")
@@ -85,16 +119,49 @@ class MetricsReport:
 
         lines.append("## By Agent")
         lines.append("")
-        lines.append("| Agent | Runs | Avg Duration | Avg Tokens | Avg Tools | Success Rate |")
-        lines.append("|-------|------|-------------|------------|-----------|-------------|")
+        lines.append(
+            "| Agent | Runs | Avg Duration | p50 | p90 | p99 "
+            "| Avg Tokens | p50 Tokens | p99 Tokens | Avg Tools | Success Rate |"
+        )
+        lines.append(
+            "|-------|------|-------------|-----|-----|-----"
+            "|------------|------------|------------|-----------|-------------|"
+        )
         for name, stats in sorted(self.by_agent.items()):
             lines.append(
                 f"| {name} | {stats.runs} | {stats.avg_duration_ms:.0f}ms "
-                f"| {stats.avg_tokens:.0f} | {stats.avg_tool_uses:.1f} "
-                f"| {stats.success_rate:.1%} |"
+                f"| {stats.p50_duration_ms:.0f}ms | {stats.p90_duration_ms:.0f}ms "
+                f"| {stats.p99_duration_ms:.0f}ms "
+                f"| {stats.avg_tokens:.0f} | {stats.p50_tokens:.0f} | {stats.p99_tokens:.0f} "
+                f"| {stats.avg_tool_uses:.1f} | {stats.success_rate:.1%} |"
             )
         lines.append("")
 
+        if self.by_day:
+            lines.append("## By Day")
+            lines.append("")
+            lines.append("| Day | Runs | Success Rate | p50 | p90 | Tokens |")
+            lines.append("|-----|------|-------------|-----|-----|--------|")
+            for day in self.by_day:
+                lines.append(
+                    f"| {day.day} | {day.runs} | {day.success_rate:.1%} "
+                    f"| {day.p50_duration_ms:.0f}ms | {day.p90_duration_ms:.0f}ms "
+                    f"| {day.total_tokens} |"
+                )
+            lines.append("")
+
+        if self.by_agent_project:
+            lines.append("## Success Rate by Agent and Project")
+            lines.append("")
+            lines.append("| Agent | Project | Runs | Success Rate |")
+            lines.append("|-------|---------|------|-------------|")
+            for cell in self.by_agent_project:
+                lines.append(
+                    f"| {cell.agent_type} | {cell.project_slug} | {cell.runs} "
+                    f"| {cell.success_rate:.1%} |"
+                )
+            lines.append("")
+
         if self.by_project:
             lines.append("## By Project")
             lines.append("")
@@ -111,56 +178,93 @@ def collect_from_batch_ledgers(base_dir: Path) -> list[AgentRun]:
     Looks for: {project}/.claude/batch/*/ledger.yaml
     """
     runs: list[AgentRun] = []
+    for project_root in discover_projects(base_dir):
+        for ledger_path in batch_ledgers(project_root):
+            runs.extend(runs_from_batch(ledger_path, project_root.name))
+    return runs
 
-    for manifest in sorted(base_dir.glob("*/.claude/manifest.yaml")):
-        project_root = manifest.parent.parent
-        batch_dir = project_root / ".claude" / "batch"
-        if not batch_dir.exists():
-            continue
 
-        for ledger_path in sorted(batch_dir.glob("*/ledger.yaml")):
-            ledger = read_yaml_simple(ledger_path)
-            if not ledger:
-                continue
+def discover_projects(base_dir: Path) -> list[Path]:
+    """Governed projects directly under base_dir (those with a .claude/manifest.yaml)."""
+    return [manifest.parent.parent for manifest in sorted(base_dir.glob("*/.claude/manifest.yaml"))]
 
-            items = ledger.get("items", [])
-            if not isinstance(items, list):
-                continue
 
-            for item in items:
-                if not isinstance(item, dict):
-                    continue
-
-                status = item.get("status", "unknown")
-                if status not in ("done", "failed"):
-                    continue
-
-                agent_type = item.get("agent_type", ledger.get("agent_type", "unknown"))
-                started = item.get("started_at", ledger.get("created_at", ""))
-                duration = item.get("duration_ms", 0)
-                tokens = item.get("total_tokens", 0)
-                tools = item.get("tool_uses", 0)
-                task_ids = item.get("task_ids", [])
-                if not isinstance(task_ids, list):
-                    task_ids = [str(task_ids)] if task_ids else []
-
-                mapped_status = "completed" if status == "done" else "failed"
-                runs.append(
-                    AgentRun(
-                        agent_type=str(agent_type),
-                        project_slug=project_root.name,
-                        started_at=str(started),
-                        duration_ms=int(duration) if duration else 0,
-                        total_tokens=int(tokens) if tokens else 0,
-                        tool_uses=int(tools) if tools else 0,
-                        status=mapped_status,
-                        task_ids=[str(t) for t in task_ids],
-                    )
-                )
+def batch_ledgers(project_root: Path) -> list[Path]:
+    """Ledger files of a project's batches."""
+    return sorted((project_root / ".claude" / "batch").glob("*/ledger.yaml"))
 
+
+def runs_from_batch(ledger_path: Path, project_slug: str) -> list[AgentRun]:
+    """Extract the finished runs of one batch.
+
+    The ledger snapshot is loaded with its journal replayed on top. Items
+    with an orchestrator record in the results index take their outcome
+    and metrics from the latest record; agent type and task ids always
+    come from the ledger, as do items finished before the index existed.
+    """
+    indexed = {
+        str(r.get("item", "")): r for r in load_index(ledger_path.parent / "results").values()
+        if "status" in r
+    }
+    try:
+        ledger = load_ledger(ledger_path)
+    except (OSError, yaml.YAMLError):
+        ledger = {}
+    if not isinstance(ledger, dict):
+        ledger = {}
+    items = ledger.get("items", [])
+    if not isinstance(items, list):
+        items = []
+
+    runs: list[AgentRun] = []
+    for item in items:
+        if not isinstance(item, dict):
+            continue
+        name = str(item.get("name", ""))
+        record = indexed.pop(name, None)
+        run = _batch_run(ledger, item, record, project_slug, f"{ledger_path.parent.name}/{name}")
+        if run is not None:
+            runs.append(run)
+    # Index records for items the ledger does not list (e.g. a truncated ledger)
+    for name, record in indexed.items():
+        run = _batch_run(ledger, {}, record, project_slug, f"{ledger_path.parent.name}/{name}")
+        if run is not None:
+            runs.append(run)
     return runs
 
 
+def _batch_run(
+    ledger: dict, item: dict, record: dict | None, project_slug: str, run_id: str
+) -> AgentRun | None:
+    """One finished run from a ledger item, overlaid with its index record if any.
+
+    Returns None for unfinished items and results served from the batch
+    result cache (no agent actually ran).
+    """
+    outcome = {**item, **record} if record is not None else item
+    status = outcome.get("status", "unknown")
+    if status not in ("done", "failed") or outcome.get("cache_hit"):
+        return None
+
+    agent_type = item.get("agent_type", ledger.get("agent_type", "unknown"))
+    started = outcome.get("started_at", ledger.get("created_at", ""))
+    task_ids = item.get("task_ids", [])
+    if not isinstance(task_ids, list):
+        task_ids = [str(task_ids)] if task_ids else []
+
+    return AgentRun(
+        agent_type=str(agent_type),
+        project_slug=project_slug,
+        started_at=str(started),
+        duration_ms=int(outcome.get("duration_ms") or 0),
+        total_tokens=int(outcome.get("total_tokens") or 0),
+        tool_uses=int(outcome.get("tool_uses") or 0),
+        status="completed" if status == "done" else "failed",
+        task_ids=[str(t) for t in task_ids],
+        run_id=run_id,
+    )
+
+
 def collect_from_evidence(project_root: Path) -> list[AgentRun]:
     """Collect agent run data from evidence files.
 
@@ -196,6 +300,7 @@ def collect_from_evidence(project_root: Path) -> list[AgentRun]:
                 tool_uses=int(entry.get("tool_uses", 0)),
                 status=entry.get("status", "unknown"),
                 task_ids=[str(t) for t in task_ids],
+                run_id=str(entry.get("run_id", "")),
             )
         )
 
@@ -203,42 +308,23 @@ def collect_from_evidence(project_root: Path) -> list[AgentRun]:
 
 
 def aggregate_metrics(runs: list[AgentRun]) -> MetricsReport:
-    """Aggregate a list of agent runs into a metrics report."""
-    now = datetime.now(UTC).isoformat()
-
-    if not runs:
-        return MetricsReport(generated_at=now, total_runs=0)
-
-    # Group by agent type
-    by_agent: dict[str, list[AgentRun]] = {}
-    by_project: dict[str, int] = {}
-
-    for run in runs:
-        by_agent.setdefault(run.agent_type, []).append(run)
-        by_project[run.project_slug] = by_project.get(run.project_slug, 0) + 1
-
-    agent_stats: dict[str, AgentStats] = {}
-    for agent_type, agent_runs in by_agent.items():
-        count = len(agent_runs)
-        completed = sum(1 for r in agent_runs if r.status == "completed")
-        agent_stats[agent_type] = AgentStats(
-            runs=count,
-            avg_duration_ms=sum(r.duration_ms for r in agent_runs) / count,
-            avg_tokens=sum(r.total_tokens for r in agent_runs) / count,
-            avg_tool_uses=sum(r.tool_uses for r in agent_runs) / count,
-            success_rate=completed / count if count > 0 else 0.0,
-        )
+    """Aggregate a list of agent runs into a metrics report.
 
-    return MetricsReport(
-        generated_at=now,
-        total_runs=len(runs),
-        by_agent=agent_stats,
-        by_project=by_project,
-    )
+    The runs are loaded column by column into an in-memory DuckDB table
+    and aggregated with the same SQL as stored runs (see
+    claude_cli.metrics.warehouse.aggregate_runs).
+    """
+    from claude_cli.metrics.warehouse import aggregate_runs
+
+    return aggregate_runs(runs)
 
 
 def store_metrics(report: MetricsReport, db_path: Path) -> None:
-    """Store a metrics report in DuckDB for trending."""
+    """Store a metrics report snapshot in DuckDB.
+
+    Superseded by claude_cli.metrics.warehouse.store_runs, which stores
+    the runs themselves so reports can be aggregated in SQL.
+    """
     from claude_cli.common.db import get_connection
 
     db_path.parent.mkdir(parents=True, exist_ok=True)
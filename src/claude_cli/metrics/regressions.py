@@ -0,0 +1,198 @@
+"""Detect agent performance regressions in the metrics warehouse.
+
+For each agent type, the runs of a recent window are compared with those
+of the baseline window just before it, separately for duration and for
+tokens. A regression needs both:
+
+- significance: a one-sided Mann-Whitney U test (recent values larger),
+  which assumes nothing about the distributions and is not moved by a
+  few extreme runs;
+- size: the recent median at least min_change above the baseline one.
+
+Ranks, tie counts, medians and the baseline MAD are computed in DuckDB
+(see warehouse.window_rank_stats); only one row per agent type and
+metric comes back to Python.
+
+Regressions are linked to version-tracker records (versions/history.json)
+that took effect during the recent window, with records of components
+whose name or path contains the agent type as whole tokens listed as
+related.
+"""
+
+from __future__ import annotations
+
+import math
+import re
+from dataclasses import dataclass, field
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+
+from claude_cli.metrics.warehouse import window_rank_stats
+
+METRICS = ("duration_ms", "total_tokens")
+
+# Scales a MAD to the standard deviation of normally distributed data
+MAD_SCALE = 1.4826
+
+_TOKEN_SEPARATORS = re.compile(r"[-_/\\.\s]+")
+
+
+@dataclass
+class Regression:
+    """A significant increase in one metric of one agent type."""
+
+    agent_type: str
+    metric: str  # "duration_ms" or "total_tokens"
+    baseline_median: float
+    recent_median: float
+    n_baseline: int
+    n_recent: int
+    p_value: float
+    # Median shift in units of the baseline's MAD-estimated spread; None if it has none
+    robust_z: float | None
+    # Version-tracker records that took effect in the recent window
+    related_changes: list[dict] = field(default_factory=list)
+    other_changes: int = 0
+
+    @property
+    def change(self) -> float:
+        """Relative increase of the median, e.g. 0.25 for +25%."""
+        if not self.baseline_median:
+            return math.inf
+        return self.recent_median / self.baseline_median - 1
+
+
+def detect_regressions(
+    db_path: Path,
+    recent_days: int = 7,
+    baseline_days: int = 28,
+    alpha: float = 0.01,
+    min_change: float = 0.1,
+    min_runs: int = 5,
+    now: datetime | None = None,
+) -> list[Regression]:
+    """Compare each agent type's recent runs with its baseline runs.
+
+    Args:
+        db_path: Metrics database.
+        recent_days: Length of the recent window, ending now.
+        baseline_days: Length of the baseline window, ending where the recent one starts.
+        alpha: Significance level of the one-sided test.
+        min_change: Smallest relative increase of the median worth reporting.
+        min_runs: Runs required in each window to test an agent type.
+        now: End of the recent window (default: the current time).
+
+    Returns:
+        Regressions, by agent type and metric.
+    """
+    if not db_path.exists():
+        return []
+    now = (now or datetime.now(UTC)).astimezone(UTC).replace(tzinfo=None)
+    recent_start = now - timedelta(days=recent_days)
+    baseline_start = recent_start - timedelta(days=baseline_days)
+
+    regressions = []
+    for metric in METRICS:
+        rows = window_rank_stats(db_path, metric, baseline_start, recent_start, now)
+        for (agent_type, n_baseline, n_recent, baseline_median, recent_median, mad,
+             rank_sum, tie_term) in rows:
+            if n_baseline < min_runs or n_recent < min_runs:
+                continue
+            if recent_median < baseline_median * (1 + min_change) or recent_median <= 0:
+                continue
+            p_value = mann_whitney_p(n_recent, n_baseline, rank_sum, tie_term)
+            if p_value >= alpha:
+                continue
+            spread = MAD_SCALE * mad
+            regressions.append(Regression(
+                agent_type=agent_type,
+                metric=metric,
+                baseline_median=baseline_median,
+                recent_median=recent_median,
+                n_baseline=n_baseline,
+                n_recent=n_recent,
+                p_value=p_value,
+                robust_z=(recent_median - baseline_median) / spread if spread else None,
+            ))
+    return regressions
+
+
+def mann_whitney_p(n_recent: int, n_baseline: int, rank_sum: float, tie_term: float) -> float:
+    """One-sided p-value that recent values tend to be larger than baseline ones.
+
+    Uses the normal approximation of U with tie and continuity corrections,
+    which is adequate from about five values per sample.
+
+    Args:
+        n_recent: Recent sample size.
+        n_baseline: Baseline sample size.
+        rank_sum: Sum of the recent values' ranks in the pooled sample.
+        tie_term: Sum of t^3 - t over groups of t tied values.
+    """
+    n = n_recent + n_baseline
+    u = rank_sum - n_recent * (n_recent + 1) / 2
+    mean = n_recent * n_baseline / 2
+    variance = n_recent * n_baseline / 12 * ((n + 1) - tie_term / (n * (n - 1)))
+    if variance <= 0:
+        return 1.0
+    z = (u - mean - 0.5) / math.sqrt(variance)
+    return 0.5 * math.erfc(z / math.sqrt(2))
+
+
+def link_changes(
+    regressions: list[Regression],
+    history: dict,
+    recent_days: int = 7,
+    now: datetime | None = None,
+) -> None:
+    """Attach the version-tracker records that took effect in the recent window.
+
+    Records of components whose name or path contains the agent type as
+    whole tokens (split on -, _, / and .) go to related_changes, so
+    "qa" matches agents/qa.md or qa-checklist but not quality; the rest
+    are counted in other_changes.
+
+    Args:
+        regressions: Regressions from detect_regressions, updated in place.
+        history: Version history as returned by versioning.tracker.load_history.
+        recent_days: The recent window used for detection.
+        now: End of the recent window (default: the current time).
+    """
+    now = (now or datetime.now(UTC)).astimezone(UTC)
+    start = now - timedelta(days=recent_days)
+
+    changes = []
+    for record in history.get("records", []):
+        valid_from = _parse_time(record.get("valid_from"))
+        if valid_from is not None and start <= valid_from <= now:
+            changes.append(record)
+    changes.sort(key=lambda record: record["valid_from"])
+
+    for regression in regressions:
+        agent = _tokens(regression.agent_type)
+        related = [record for record in changes if _mentions(record, agent)]
+        regression.related_changes = related
+        regression.other_changes = len(changes) - len(related)
+
+
+def _mentions(record: dict, agent: list[str]) -> bool:
+    """True if the record's component name or path holds the agent's tokens in a row."""
+    if not agent:
+        return False
+    for text in (record.get("component_name", ""), record.get("file_path", "")):
+        tokens = _tokens(str(text))
+        if any(tokens[i:i + len(agent)] == agent for i in range(len(tokens) - len(agent) + 1)):
+            return True
+    return False
+
+
+def _tokens(text: str) -> list[str]:
+    return [token for token in _TOKEN_SEPARATORS.split(text.lower()) if token]
+
+
+def _parse_time(value: object) -> datetime | None:
+    try:
+        parsed = datetime.fromisoformat(str(value))
+    except ValueError:
+        return None
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=UTC)
@@ -0,0 +1,454 @@
+"""Per-run metrics warehouse in DuckDB.
+
+Every collected AgentRun is stored as one row of the agent_runs table,
+keyed by run_key so collecting the same run again replaces its row
+instead of duplicating it. Reports are SQL aggregations over that table
+(means, duration and token percentiles, per-day buckets and success per
+agent and project), optionally restricted to a recent time window, so
+nothing is decoded or regrouped in Python. Runs that are not stored are
+aggregated by the same queries over an in-memory table.
+
+started_at is stored as a naive UTC timestamp; runs whose start time is
+missing or unparseable are kept but fall outside every time window.
+
+The collected_sources catalogue records each source file set's mtime,
+size and content hash, and agent_runs rows remember their source, so
+incremental collection (see claude_cli.metrics.catalog) can replace the
+runs of exactly the sources that changed.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+from collections.abc import Generator, Iterable
+from contextlib import contextmanager
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from claude_cli.common.db import ensure_schema, shared_cursor
+from claude_cli.metrics.collector import (
+    AgentProjectStats,
+    AgentRun,
+    AgentStats,
+    DailyStats,
+    MetricsReport,
+)
+
+if TYPE_CHECKING:
+    import duckdb
+
+SCHEMA_NAME = "metrics"
+# Bump whenever SCHEMA_SQL changes so existing databases pick it up
+SCHEMA_VERSION = 2
+
+SCHEMA_SQL = """
+CREATE TABLE IF NOT EXISTS agent_runs (
+    run_key VARCHAR PRIMARY KEY,
+    agent_type VARCHAR NOT NULL,
+    project VARCHAR NOT NULL,
+    started_at TIMESTAMP,
+    duration_ms BIGINT NOT NULL,
+    total_tokens BIGINT NOT NULL,
+    tool_uses INTEGER NOT NULL,
+    status VARCHAR NOT NULL,
+    task_ids VARCHAR[],
+    collected_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    source VARCHAR
+);
+
+ALTER TABLE agent_runs ADD COLUMN IF NOT EXISTS source VARCHAR;
+
+CREATE INDEX IF NOT EXISTS idx_agent_runs_started ON agent_runs(started_at);
+
+CREATE TABLE IF NOT EXISTS collected_sources (
+    path VARCHAR PRIMARY KEY,
+    mtime_ns BIGINT NOT NULL,
+    size BIGINT NOT NULL,
+    content_hash VARCHAR NOT NULL,
+    runs INTEGER NOT NULL,
+    collected_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+"""
+
+UPSERT_SQL = """
+INSERT OR REPLACE INTO agent_runs (run_key, agent_type, project, started_at, duration_ms,
+                                   total_tokens, tool_uses, status, task_ids, source)
+SELECT run_key, agent_type, project, started_at, duration_ms,
+       total_tokens, tool_uses, status, task_ids, source
+FROM (
+    SELECT UNNEST(?::JSON::STRUCT(
+        run_key VARCHAR, agent_type VARCHAR, project VARCHAR, started_at TIMESTAMP,
+        duration_ms BIGINT, total_tokens BIGINT, tool_uses INTEGER, status VARCHAR,
+        task_ids VARCHAR[], source VARCHAR
+    )[], recursive := true)
+)
+"""
+
+CATALOG_UPSERT_SQL = """
+INSERT OR REPLACE INTO collected_sources (path, mtime_ns, size, content_hash, runs)
+SELECT path, mtime_ns, size, content_hash, runs
+FROM (
+    SELECT UNNEST(?::JSON::STRUCT(
+        path VARCHAR, mtime_ns BIGINT, size BIGINT, content_hash VARCHAR, runs INTEGER
+    )[], recursive := true)
+)
+"""
+
+# Rows per upsert statement
+UPSERT_CHUNK = 50_000
+
+_SUCCESS = "AVG(CASE WHEN status = 'completed' THEN 1.0 ELSE 0.0 END)"
+
+AGENT_STATS_SQL = f"""
+SELECT agent_type,
+       COUNT(*) AS runs,
+       AVG(duration_ms) AS avg_duration_ms,
+       AVG(total_tokens) AS avg_tokens,
+       AVG(tool_uses) AS avg_tool_uses,
+       {_SUCCESS} AS success_rate,
+       QUANTILE_CONT(duration_ms, [0.5, 0.9, 0.99]) AS duration_quantiles,
+       QUANTILE_CONT(total_tokens, [0.5, 0.9, 0.99]) AS token_quantiles
+FROM agent_runs
+WHERE {{where}}
+GROUP BY agent_type
+"""
+
+DAILY_SQL = f"""
+SELECT strftime(started_at, '%Y-%m-%d') AS day,
+       COUNT(*) AS runs,
+       {_SUCCESS} AS success_rate,
+       QUANTILE_CONT(duration_ms, [0.5, 0.9]) AS duration_quantiles,
+       SUM(total_tokens) AS total_tokens
+FROM agent_runs
+WHERE started_at IS NOT NULL AND {{where}}
+GROUP BY day
+ORDER BY day
+"""
+
+AGENT_PROJECT_SQL = f"""
+SELECT agent_type, project, COUNT(*) AS runs, {_SUCCESS} AS success_rate
+FROM agent_runs
+WHERE {{where}}
+GROUP BY agent_type, project
+ORDER BY agent_type, project
+"""
+
+RANK_SQL = """
+WITH windowed AS (
+    -- Failed and timed-out runs record zero duration and tokens
+    SELECT agent_type, {metric} AS value, started_at >= ? AS recent
+    FROM agent_runs
+    WHERE started_at >= ? AND started_at < ? AND status = 'completed'
+),
+ranked AS (
+    -- Average rank within each agent type, ties sharing the mean of their ranks
+    SELECT agent_type, recent, value,
+           RANK() OVER (PARTITION BY agent_type ORDER BY value)
+               + (COUNT(*) OVER (PARTITION BY agent_type, value) - 1) / 2.0 AS rank
+    FROM windowed
+),
+ties AS (
+    SELECT agent_type, SUM(t * t * t - t) AS tie_term
+    FROM (SELECT agent_type, COUNT(*) AS t FROM windowed GROUP BY agent_type, value)
+    GROUP BY agent_type
+)
+SELECT ranked.agent_type,
+       COUNT(*) FILTER (WHERE NOT recent) AS n_baseline,
+       COUNT(*) FILTER (WHERE recent) AS n_recent,
+       MEDIAN(value) FILTER (WHERE NOT recent) AS baseline_median,
+       MEDIAN(value) FILTER (WHERE recent) AS recent_median,
+       MAD(value) FILTER (WHERE NOT recent) AS baseline_mad,
+       SUM(rank) FILTER (WHERE recent) AS recent_rank_sum,
+       ANY_VALUE(ties.tie_term) AS tie_term
+FROM ranked
+JOIN ties USING (agent_type)
+GROUP BY ranked.agent_type
+ORDER BY ranked.agent_type
+"""
+
+PROJECT_COUNTS_SQL = """
+SELECT project, COUNT(*) FROM agent_runs WHERE {where} GROUP BY project
+"""
+
+# In-memory table for aggregate_runs: the columns the report SQL reads
+MEMORY_TABLE_SQL = """
+CREATE TABLE agent_runs AS
+SELECT UNNEST(?::JSON::VARCHAR[]) AS agent_type,
+       UNNEST(?::JSON::VARCHAR[]) AS project,
+       UNNEST(?::JSON::TIMESTAMP[]) AS started_at,
+       UNNEST(?::JSON::BIGINT[]) AS duration_ms,
+       UNNEST(?::JSON::BIGINT[]) AS total_tokens,
+       UNNEST(?::JSON::BIGINT[]) AS tool_uses,
+       UNNEST(?::JSON::VARCHAR[]) AS status
+"""
+
+
+@contextmanager
+def _cursor(db_path: Path) -> Generator[duckdb.DuckDBPyConnection, None, None]:
+    """Cursor on the shared connection, with the schema verified first."""
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+    # Opened first so the schema check reuses the connection
+    with shared_cursor(db_path) as cursor:
+        ensure_schema(db_path, SCHEMA_NAME, SCHEMA_VERSION, SCHEMA_SQL)
+        yield cursor
+
+
+@contextmanager
+def _transaction(db_path: Path) -> Generator[duckdb.DuckDBPyConnection, None, None]:
+    """Cursor inside a transaction, committed on success and rolled back on error."""
+    with _cursor(db_path) as conn:
+        conn.execute("BEGIN TRANSACTION")
+        try:
+            yield conn
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+
+def run_key(run: AgentRun) -> str:
+    """Stable identity of a run, so re-collecting it replaces its row.
+
+    Runs that carry a run_id (batch items) are identified by project and
+    run_id, so a later attempt of the same item supersedes the earlier
+    one. Other runs are identified by all of their fields.
+    """
+    if run.run_id:
+        parts = ["id", run.project_slug, run.run_id]
+    else:
+        parts = [
+            "fields", run.project_slug, run.agent_type, run.started_at, run.duration_ms,
+            run.total_tokens, run.tool_uses, run.status, run.task_ids,
+        ]
+    return hashlib.sha256(json.dumps(parts).encode()).hexdigest()
+
+
+def store_runs(runs: Iterable[AgentRun], db_path: Path) -> int:
+    """Upsert runs into the agent_runs table in one statement.
+
+    Returns:
+        Number of distinct runs written.
+    """
+    records = _run_records(runs, source=None)
+    if not records:
+        return 0
+
+    with _cursor(db_path) as conn:
+        _upsert_runs(conn, records)
+    return len(records)
+
+
+def load_catalog(db_path: Path) -> dict[str, tuple[int, int, str]]:
+    """Collected sources by path: (mtime_ns, size, content_hash) when last collected."""
+    if not db_path.exists():
+        return {}
+    with _cursor(db_path) as conn:
+        rows = conn.execute(
+            "SELECT path, mtime_ns, size, content_hash FROM collected_sources"
+        ).fetchall()
+    return {path: (mtime_ns, size, digest) for path, mtime_ns, size, digest in rows}
+
+
+def replace_sources(
+    db_path: Path,
+    collected: dict[str, tuple[int, int, str, list[AgentRun]]],
+    touched: dict[str, tuple[int, int, str]],
+) -> int:
+    """Record a collection pass in one transaction.
+
+    Args:
+        db_path: Metrics database.
+        collected: Sources that were parsed, by path: (mtime_ns, size,
+            content_hash, runs). Their previous runs are replaced.
+        touched: Sources whose files changed on disk but whose content did
+            not, by path: (mtime_ns, size, content_hash). Only their
+            catalogue entry is refreshed.
+
+    Returns:
+        Number of runs written.
+    """
+    by_key: dict[str, dict] = {}
+    for path, (*_, runs) in collected.items():
+        by_key.update((record["run_key"], record) for record in _run_records(runs, source=path))
+    records = list(by_key.values())
+    catalog = [
+        {"path": path, "mtime_ns": mtime_ns, "size": size, "content_hash": digest,
+         "runs": len(runs)}
+        for path, (mtime_ns, size, digest, runs) in collected.items()
+    ]
+    with _transaction(db_path) as conn:
+        if collected:
+            conn.execute(
+                "DELETE FROM agent_runs WHERE list_contains(?::JSON::VARCHAR[], source)",
+                [json.dumps(list(collected))],
+            )
+        if records:
+            _upsert_runs(conn, records)
+        for path, (mtime_ns, size, digest) in touched.items():
+            conn.execute(
+                "UPDATE collected_sources SET mtime_ns = ?, size = ?, content_hash = ? "
+                "WHERE path = ?",
+                [mtime_ns, size, digest, path],
+            )
+        if catalog:
+            conn.execute(CATALOG_UPSERT_SQL, [json.dumps(catalog)])
+    return len(records)
+
+
+def query_report(db_path: Path, days: int | None = None) -> MetricsReport:
+    """Aggregate stored runs into a report.
+
+    Args:
+        db_path: Metrics database.
+        days: Only include runs started in the last N days; None for all runs.
+    """
+    now = datetime.now(UTC)
+    if not db_path.exists():
+        return MetricsReport(generated_at=now.isoformat(), total_runs=0, window_days=days)
+
+    where, params = "1=1", []
+    if days is not None:
+        where, params = "started_at >= ?", [(now - timedelta(days=days)).replace(tzinfo=None)]
+
+    with _cursor(db_path) as conn:
+        report = _report(conn, where, params)
+    report.window_days = days
+    return report
+
+
+def aggregate_runs(runs: list[AgentRun]) -> MetricsReport:
+    """Aggregate runs that are not stored, using an in-memory database.
+
+    Each field is passed as one JSON array, so loading costs a few
+    statements however many runs there are.
+    """
+    columns = [
+        [run.agent_type for run in runs],
+        [run.project_slug for run in runs],
+        [_utc(run.started_at) for run in runs],
+        [run.duration_ms for run in runs],
+        [run.total_tokens for run in runs],
+        [run.tool_uses for run in runs],
+        [run.status for run in runs],
+    ]
+    import duckdb
+
+    with duckdb.connect() as conn:
+        conn.execute(MEMORY_TABLE_SQL, [json.dumps(column) for column in columns])
+        return _report(conn, "1=1", [])
+
+
+def _report(conn: duckdb.DuckDBPyConnection, where: str, params: list) -> MetricsReport:
+    """Run the report queries over the agent_runs table rows matching where."""
+    agent_rows = conn.execute(AGENT_STATS_SQL.format(where=where), params).fetchall()
+    project_rows = conn.execute(PROJECT_COUNTS_SQL.format(where=where), params).fetchall()
+    day_rows = conn.execute(DAILY_SQL.format(where=where), params).fetchall()
+    cell_rows = conn.execute(AGENT_PROJECT_SQL.format(where=where), params).fetchall()
+
+    by_agent = {
+        agent: AgentStats(
+            runs=runs,
+            avg_duration_ms=avg_duration,
+            avg_tokens=avg_tokens,
+            avg_tool_uses=avg_tools,
+            success_rate=success_rate,
+            p50_duration_ms=durations[0],
+            p90_duration_ms=durations[1],
+            p99_duration_ms=durations[2],
+            p50_tokens=tokens[0],
+            p90_tokens=tokens[1],
+            p99_tokens=tokens[2],
+        )
+        for agent, runs, avg_duration, avg_tokens, avg_tools, success_rate, durations, tokens
+        in agent_rows
+    }
+    return MetricsReport(
+        generated_at=datetime.now(UTC).isoformat(),
+        total_runs=sum(stats.runs for stats in by_agent.values()),
+        by_agent=by_agent,
+        by_project=dict(project_rows),
+        by_day=[
+            DailyStats(
+                day=day,
+                runs=runs,
+                success_rate=success_rate,
+                p50_duration_ms=durations[0],
+                p90_duration_ms=durations[1],
+                total_tokens=int(total_tokens),
+            )
+            for day, runs, success_rate, durations, total_tokens in day_rows
+        ],
+        by_agent_project=[
+            AgentProjectStats(
+                agent_type=agent, project_slug=project, runs=runs, success_rate=success_rate
+            )
+            for agent, project, runs, success_rate in cell_rows
+        ],
+    )
+
+
+def window_rank_stats(
+    db_path: Path, metric: str, baseline_start: datetime, recent_start: datetime,
+    end: datetime,
+) -> list[tuple]:
+    """Per agent type, rank statistics of a metric over two adjacent windows.
+
+    Completed runs started in [baseline_start, recent_start) form the
+    baseline and those in [recent_start, end) the recent sample. Times are
+    naive UTC.
+
+    Returns:
+        One row per agent type: (agent_type, n_baseline, n_recent,
+        baseline_median, recent_median, baseline_mad, recent_rank_sum,
+        tie_term), where ranks are over both windows pooled and tie_term
+        is the sum of t^3 - t over groups of t tied values.
+    """
+    if metric not in ("duration_ms", "total_tokens", "tool_uses"):
+        raise ValueError(f"Unknown metric: {metric}")
+    if not db_path.exists():
+        return []
+    with _cursor(db_path) as conn:
+        return conn.execute(
+            RANK_SQL.format(metric=metric), [recent_start, baseline_start, end]
+        ).fetchall()
+
+
+def _run_records(runs: Iterable[AgentRun], source: str | None) -> list[dict]:
+    """Rows for _upsert_runs, one per distinct run_key (the last one wins)."""
+    records = {}
+    for run in runs:
+        key = run_key(run)
+        records[key] = {
+            "run_key": key,
+            "agent_type": run.agent_type,
+            "project": run.project_slug,
+            "started_at": _utc(run.started_at),
+            "duration_ms": run.duration_ms,
+            "total_tokens": run.total_tokens,
+            "tool_uses": run.tool_uses,
+            "status": run.status,
+            "task_ids": run.task_ids,
+            "source": source,
+        }
+    return list(records.values())
+
+
+def _upsert_runs(conn: duckdb.DuckDBPyConnection, records: list[dict]) -> None:
+    # One JSON parameter per chunk of rows: DuckDB converts a Python list
+    # parameter element by element, which is slow for large batches, and
+    # chunks keep the parsed JSON of a huge collection out of memory
+    for start in range(0, len(records), UPSERT_CHUNK):
+        conn.execute(UPSERT_SQL, [json.dumps(records[start:start + UPSERT_CHUNK])])
+
+
+def _utc(started_at: str) -> str | None:
+    """ISO start time as naive UTC, or None if it cannot be parsed."""
+    try:
+        parsed = datetime.fromisoformat(started_at)
+    except (TypeError, ValueError):
+        return None
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(UTC).replace(tzinfo=None)
+    return parsed.isoformat()
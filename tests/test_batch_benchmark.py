@@ -0,0 +1,93 @@
+"""Smoke tests for the batch benchmark harness and its stub claude."""
+
+import importlib.util
+import json
+import os
+import subprocess
+from pathlib import Path
+
+import pytest
+
+BENCH_DIR = Path(__file__).resolve().parent.parent / "benchmarks"
+
+
+@pytest.fixture
+def bench(monkeypatch):
+    # Guard PATH and the STUB_CLAUDE_* variables should the harness leak them
+    monkeypatch.setenv("PATH", os.environ["PATH"])
+    for name in ("LATENCY", "JITTER", "FAIL_RATE", "EXIT", "OUTPUT_BYTES"):
+        monkeypatch.delenv(f"STUB_CLAUDE_{name}", raising=False)
+    spec = importlib.util.spec_from_file_location("bench_batch", BENCH_DIR / "bench_batch.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class TestStubClaude:
+    def _run(self, *args, **env):
+        return subprocess.run(
+            [str(BENCH_DIR / "stub_claude.sh"), *args],
+            capture_output=True,
+            text=True,
+            env={"PATH": "/usr/bin:/bin", **env},
+        )
+
+    def test_prints_result_json(self):
+        proc = self._run("-p", "hello", "--output-format", "json", STUB_CLAUDE_OUTPUT_BYTES="40")
+
+        assert proc.returncode == 0
+        result = json.loads(proc.stdout)
+        assert result["type"] == "result"
+        assert result["result"].count("x") == 40
+
+    def test_fail_rate_sets_exit_code(self):
+        proc = self._run("-p", "hello", STUB_CLAUDE_FAIL_RATE="1", STUB_CLAUDE_EXIT="3")
+
+        assert proc.returncode == 3
+        assert json.loads(proc.stdout)["is_error"] is True
+
+
+class TestBenchmarkHarness:
+    def test_reports_every_phase(self, bench):
+        report = bench.run_benchmarks([6], parallel=3, latency=0.0, fail_rate=0.0)
+
+        assert report["config"]["parallel"] == 3
+        assert report["stub_exec_ms"] > 0
+        (result,) = report["results"]
+        assert result["items"] == 6
+        assert result["ledger"]["session_transition_us"] > 0
+        assert result["run_batch"]["done"] == 6
+        assert result["resume_batch"]["items_run"] == 3
+        assert result["resume_batch"]["done"] == 6
+        json.dumps(report)
+
+    def test_restores_environment(self, bench):
+        path = os.environ["PATH"]
+        bench.run_benchmarks([2], parallel=2, latency=0.0, fail_rate=0.5)
+
+        assert os.environ["PATH"] == path
+        assert not any(name.startswith("STUB_CLAUDE_") for name in os.environ)
+
+    def test_sets_and_restores_fail_exit(self, bench, monkeypatch, tmp_path):
+        monkeypatch.setenv("STUB_CLAUDE_EXIT", "9")
+        with bench.install_stub(tmp_path / "bin"):
+            bench.configure_stub(0.0, 0.0, 1.0, 16, fail_exit=4)
+            assert os.environ["STUB_CLAUDE_EXIT"] == "4"
+        assert os.environ["STUB_CLAUDE_EXIT"] == "9"
+
+        report = bench.run_benchmarks([2], parallel=2, latency=0.0, fail_rate=1.0, fail_exit=4)
+        assert report["config"]["fail_exit"] == 4
+        assert report["results"][0]["run_batch"]["failed"] == 2
+        assert os.environ["STUB_CLAUDE_EXIT"] == "9"
+
+    def test_peak_rss_in_kib_on_macos(self, bench, monkeypatch):
+        import resource
+        import sys
+
+        usage = resource.struct_rusage((0.0, 0.0, 2048 * 1024) + (0,) * 13)
+        monkeypatch.setattr(bench.resource, "getrusage", lambda who: usage)
+        monkeypatch.setattr(sys, "platform", "darwin")
+        # On macOS ru_maxrss is in bytes
+        assert bench._peak_rss_kib() == 2048
+        monkeypatch.setattr(sys, "platform", "linux")
+        assert bench._peak_rss_kib() == 2048 * 1024
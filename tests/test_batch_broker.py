@@ -9,6 +9,9 @@ import yaml
 from claude_cli.batch.broker import (
     collect_summaries,
     generate_report,
+    index_result,
+    load_index,
+    read_index,
     read_result,
     sanitize_item_name,
     write_result,
@@ -144,6 +147,56 @@ class TestCollectSummaries:
         assert summaries == []
 
 
+class TestResultsIndex:
+    def test_write_result_indexes(self, results_dir):
+        path = write_result(results_dir, "src/foo.py", {"exit_code": 0, "summary": "OK"})
+        record = load_index(results_dir)["src_foo_py.json"]
+        assert record["item"] == "src/foo.py"
+        assert record["summary"] == "OK"
+        assert record["size"] == path.stat().st_size
+
+    def test_latest_record_wins(self, results_dir):
+        write_result(results_dir, "a.py", {"summary": "first"})
+        write_result(results_dir, "a.py", {"summary": "second"})
+        assert load_index(results_dir)["a_py.json"]["summary"] == "second"
+
+    def test_read_resumes_from_offset(self, results_dir):
+        index_result(results_dir, {"item": "a", "file": "a.json"})
+        records, offset = read_index(results_dir)
+        assert [r["item"] for r in records] == ["a"]
+        assert records[0]["offset"] == 0
+
+        second = index_result(results_dir, {"item": "b", "file": "b.json"})
+        records, _ = read_index(results_dir, offset)
+        assert [r["item"] for r in records] == ["b"]
+        assert records[0]["offset"] == second == offset
+
+    def test_torn_trailing_line_left_for_next_read(self, results_dir):
+        index_result(results_dir, {"item": "a", "file": "a.json"})
+        with open(results_dir / "index.jsonl", "a") as f:
+            f.write('{"item": "b"')
+        records, offset = read_index(results_dir)
+        assert len(records) == 1
+        assert offset == len((results_dir / "index.jsonl").read_bytes()) - len('{"item": "b"')
+
+    def test_collect_uses_index_not_result_content(self, results_dir):
+        path = write_result(results_dir, "a.py", {"exit_code": 0, "summary": "indexed"})
+        # Same size, different content: the index record is trusted
+        path.write_text("x" * path.stat().st_size)
+        assert collect_summaries(results_dir)[0]["summary"] == "indexed"
+
+    def test_collect_reindexes_changed_files(self, results_dir):
+        path = write_result(results_dir, "a.py", {"exit_code": 0, "summary": "old"})
+        path.write_text(json.dumps({"item": "a.py", "summary": "rewritten by hand"}))
+        assert collect_summaries(results_dir)[0]["summary"] == "rewritten by hand"
+        assert load_index(results_dir)["a_py.json"]["summary"] == "rewritten by hand"
+
+    def test_collect_backfills_unindexed_files(self, results_dir):
+        (results_dir / "legacy.json").write_text(json.dumps({"item": "legacy.py", "summary": "s"}))
+        assert collect_summaries(results_dir)[0]["item"] == "legacy.py"
+        assert "legacy.json" in load_index(results_dir)
+
+
 class TestGenerateReport:
     def test_produces_markdown(self, batch_dir):
         report = generate_report(batch_dir)
@@ -165,7 +218,32 @@ class TestGenerateReport:
         assert "## Failed Items" in report
         assert "src/bar.py" in report
 
+    def test_failed_items_show_error_class(self, batch_dir):
+        update_item_status(
+            batch_dir / "ledger.yaml", "src/bar.py", "failed",
+            exit_code=1, attempts=3, error_class="transient",
+        )
+        report = generate_report(batch_dir)
+        assert "**src/bar.py** (transient, 3 attempts)" in report
+
     def test_lists_remaining_items(self, batch_dir):
         report = generate_report(batch_dir)
         assert "## Remaining Items" in report
         assert "src/baz.py" in report
+
+    def test_resource_section(self, batch_dir):
+        update_item_status(
+            batch_dir / "ledger.yaml", "src/foo.py", "done", exit_code=0,
+            metrics={
+                "duration_ms": 2000, "cpu_user_ms": 800, "cpu_sys_ms": 200,
+                "peak_rss_kib": 204800, "io_read_bytes": 1024, "io_write_bytes": 0,
+            },
+        )
+        report = generate_report(batch_dir)
+        assert "## Resources" in report
+        assert "- CPU per running worker: 0.50 cores" in report
+        assert "- Peak RSS per worker: 200.0 MiB median, 200.0 MiB max" in report
+        assert "- Storage I/O: 1.0 KiB read, 0 B written" in report
+
+    def test_no_resource_section_without_usage(self, batch_dir):
+        assert "## Resources" not in generate_report(batch_dir)
@@ -0,0 +1,79 @@
+"""Tests for the batch result cache."""
+
+import os
+import time
+
+import pytest
+
+from claude_cli.batch.cache import ResultCache, cache_key
+
+
+@pytest.fixture
+def project(tmp_path):
+    (tmp_path / "a.py").write_text("print('a')")
+    return tmp_path
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ResultCache(tmp_path / "cache")
+
+
+def store_entry(cache, tmp_path, key, content="{}", summary="ok"):
+    result = tmp_path / f"{key}.src"
+    result.write_text(content)
+    cache.store(key, result, {"summary": summary})
+
+
+class TestCacheKey:
+    def test_stable(self, project):
+        cmd = ["claude", "-p", "Review a.py"]
+        assert cache_key(project, "a.py", cmd) == cache_key(project, "a.py", cmd)
+
+    def test_changes_with_content(self, project):
+        cmd = ["claude", "-p", "Review a.py"]
+        before = cache_key(project, "a.py", cmd)
+        (project / "a.py").write_text("print('changed')")
+        assert cache_key(project, "a.py", cmd) != before
+
+    def test_changes_with_command(self, project):
+        base = cache_key(project, "a.py", ["claude", "-p", "Review a.py", "--max-turns", "20"])
+        other = cache_key(project, "a.py", ["claude", "-p", "Review a.py", "--max-turns", "30"])
+        assert base != other
+
+    def test_non_file_item(self, project):
+        assert cache_key(project, "not-a-file", ["claude"])
+
+
+class TestResultCache:
+    def test_miss(self, cache):
+        assert cache.lookup("ab" * 32) is None
+
+    def test_store_and_lookup(self, cache, tmp_path):
+        key = "ab" * 32
+        store_entry(cache, tmp_path, key, summary="2 issues")
+        assert cache.lookup(key) == {"summary": "2 issues"}
+
+    def test_materialize_links_result(self, cache, tmp_path):
+        key = "cd" * 32
+        store_entry(cache, tmp_path, key, content='{"result": "x"}')
+        dest = tmp_path / "out.json"
+        dest.write_text("stale")
+        cache.materialize(key, dest)
+        assert dest.read_text() == '{"result": "x"}'
+
+    def test_evicts_least_recently_used(self, tmp_path):
+        cache = ResultCache(tmp_path / "cache", max_bytes=10**9)
+        keys = ["aa" * 32, "bb" * 32, "cc" * 32]
+        for i, key in enumerate(keys):
+            store_entry(cache, tmp_path, key, content="x" * 100)
+            meta = cache.cache_dir / key[:2] / f"{key}.meta.json"
+            os.utime(meta, (time.time() - 100 + i, time.time() - 100 + i))
+        # Touch the oldest so it becomes most recently used
+        cache.lookup(keys[0])
+
+        cache.max_bytes = 250
+        assert cache.evict() == 1
+        assert cache.lookup(keys[1]) is None
+        assert cache.lookup(keys[0]) is not None
+        assert cache.lookup(keys[2]) is not None
@@ -0,0 +1,103 @@
+"""Tests for streaming capture of batch worker output."""
+
+import io
+import json
+
+from claude_cli.batch.capture import StreamCapture, capture_file, tee_stream
+
+
+def feed_all(data: bytes, chunk: int = 7, **kwargs) -> StreamCapture:
+    capture = StreamCapture(**kwargs)
+    for i in range(0, len(data), chunk):
+        capture.feed(data[i:i + chunk])
+    capture.close()
+    return capture
+
+
+RESULT = {
+    "type": "result",
+    "subtype": "success",
+    "result": "Found 2 issues",
+    "num_turns": 4,
+    "usage": {
+        "input_tokens": 100,
+        "output_tokens": 50,
+        "cache_creation_input_tokens": 10,
+        "cache_read_input_tokens": 5,
+    },
+}
+
+
+class TestJsonOutput:
+    def test_extracts_result_and_usage(self):
+        capture = feed_all(json.dumps(RESULT).encode() + b"\n")
+        assert capture.summary_text() == "Found 2 issues"
+        assert capture.total_tokens == 165
+        assert capture.num_turns == 4
+        assert capture.metrics() == {"tool_uses": 0, "total_tokens": 165, "num_turns": 4}
+        assert capture.result_subtype == "success"
+
+    def test_pretty_printed_document(self):
+        capture = feed_all(json.dumps(RESULT, indent=2).encode())
+        assert capture.summary_text() == "Found 2 issues"
+        assert capture.total_tokens == 165
+
+    def test_summary_truncated(self):
+        capture = feed_all(json.dumps({"result": "x" * 500}).encode())
+        assert len(capture.summary_text()) == 200
+
+    def test_content_field(self):
+        capture = feed_all(b'{"content": "Review complete"}')
+        assert capture.summary_text() == "Review complete"
+
+
+class TestStreamJsonOutput:
+    def test_counts_tool_uses_across_events(self):
+        events = [
+            {"type": "system", "subtype": "init"},
+            {"type": "assistant", "message": {"content": [
+                {"type": "text", "text": "Reading"},
+                {"type": "tool_use", "name": "Read", "input": {}},
+            ]}},
+            {"type": "user", "message": {"content": [{"type": "tool_result"}]}},
+            {"type": "assistant", "message": {"content": [
+                {"type": "tool_use", "name": "Grep", "input": {}},
+                {"type": "tool_use", "name": "Glob", "input": {}},
+            ]}},
+            RESULT,
+        ]
+        data = b"".join(json.dumps(e).encode() + b"\n" for e in events)
+        capture = feed_all(data, chunk=13)
+        assert capture.tool_uses == 3
+        assert capture.summary_text() == "Found 2 issues"
+        assert capture.total_tokens == 165
+
+
+class TestFallbacks:
+    def test_first_non_empty_line(self):
+        capture = feed_all(b"\n\n  Error: something broke  \nmore\n")
+        assert capture.summary_text() == "Error: something broke"
+        assert capture.total_tokens is None
+
+    def test_empty_output(self):
+        assert feed_all(b"").summary_text() == "No summary available"
+
+    def test_oversized_line_skipped(self):
+        data = b"{" + b"a" * 1000 + b"}\n" + json.dumps(RESULT).encode() + b"\n"
+        capture = feed_all(data, max_parse_bytes=400)
+        assert capture.summary_text() == "Found 2 issues"
+
+
+class TestTeeStream:
+    def test_writes_output_and_parses(self, tmp_path):
+        data = json.dumps(RESULT).encode()
+        out = tmp_path / "result.json"
+        capture = StreamCapture()
+        tee_stream(io.BytesIO(data), out, capture)
+        assert out.read_bytes() == data
+        assert capture.summary_text() == "Found 2 issues"
+
+    def test_capture_file(self, tmp_path):
+        out = tmp_path / "result.json"
+        out.write_text(json.dumps(RESULT))
+        assert capture_file(out).total_tokens == 165
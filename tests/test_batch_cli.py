@@ -85,6 +85,59 @@ class TestInitCommand:
         assert result.exit_code == 0
         assert "Parallel: 3" in result.output
 
+    def test_init_with_priorities(self, runner, project_dir):
+        with patch("claude_cli.batch.cli._find_project_root", return_value=project_dir):
+            result = runner.invoke(app, [
+                "init",
+                "--pattern", "src/*.py",
+                "--prompt", "Check $item",
+                "--priority", "src/auth*=5",
+            ])
+        assert result.exit_code == 0
+        ledger_path = next((project_dir / ".claude" / "batch").glob("*/ledger.yaml"))
+        items = {i["name"]: i for i in yaml.safe_load(ledger_path.read_text())["items"]}
+        assert items["src/auth.py"]["priority"] == 5
+        assert items["src/api.py"]["priority"] == 0
+
+    def test_init_exclude_and_shard(self, runner, project_dir):
+        with patch("claude_cli.batch.cli._find_project_root", return_value=project_dir):
+            result = runner.invoke(app, [
+                "init",
+                "--pattern", "src/*.py",
+                "--prompt", "Check $item",
+                "--exclude", "auth.py",
+                "--shard", "1/1",
+            ])
+        assert result.exit_code == 0
+        assert "Items: 1" in result.output
+        ledger_path = next((project_dir / ".claude" / "batch").glob("*/ledger.yaml"))
+        ledger = yaml.safe_load(ledger_path.read_text())
+        assert [i["name"] for i in ledger["items"]] == ["src/api.py"]
+        assert ledger["config"]["exclude"] == ["auth.py"]
+        assert ledger["config"]["shard"] == "1/1"
+
+    def test_init_bad_shard(self, runner, project_dir):
+        with patch("claude_cli.batch.cli._find_project_root", return_value=project_dir):
+            result = runner.invoke(app, [
+                "init",
+                "--pattern", "src/*.py",
+                "--prompt", "Check $item",
+                "--shard", "3/2",
+            ])
+        assert result.exit_code == 1
+        assert "i/N" in result.output
+
+    def test_init_bad_priority(self, runner, project_dir):
+        with patch("claude_cli.batch.cli._find_project_root", return_value=project_dir):
+            result = runner.invoke(app, [
+                "init",
+                "--pattern", "src/*.py",
+                "--prompt", "Check $item",
+                "--priority", "src/auth*",
+            ])
+        assert result.exit_code == 1
+        assert "PATTERN=N" in result.output
+
 
 class TestStatusCommand:
     def test_status_shows_counts(self, runner, batch_with_ledger):
@@ -96,6 +149,37 @@ class TestStatusCommand:
         assert result.exit_code == 0
         assert "test-batch-001" in result.output
 
+    def test_status_follow_exits_when_finished(self, runner, batch_with_ledger):
+        from claude_cli.batch.ledger import LedgerSession
+
+        ledger_path = batch_with_ledger / ".claude" / "batch" / "test-batch-001" / "ledger.yaml"
+        with LedgerSession(ledger_path) as session:
+            for name in ("src/auth.py", "src/api.py"):
+                session.update_item_status(name, "done", exit_code=0)
+
+        with patch("claude_cli.batch.cli._find_project_root", return_value=batch_with_ledger):
+            result = runner.invoke(app, ["status", "-b", "test-batch-001", "--follow"])
+        assert result.exit_code == 0
+        assert "2 / 2" in result.output
+        assert "ETA" in result.output
+
+    def test_status_reads_work_queue_without_syncing(self, runner, batch_with_ledger):
+        from claude_cli.batch.workqueue import WorkQueue, queue_path_for
+
+        batch_dir = batch_with_ledger / ".claude" / "batch" / "test-batch-001"
+        work_queue = WorkQueue(queue_path_for(batch_dir))
+        work_queue.seed(["src/auth.py"])
+        work_queue.claim("w1")
+        work_queue.record("w1", "src/auth.py", {"status": "done", "summary": "queued ok"})
+        work_queue.close()
+        before = (batch_dir / "ledger.yaml").read_bytes()
+
+        with patch("claude_cli.batch.cli._find_project_root", return_value=batch_with_ledger):
+            result = runner.invoke(app, ["status", "-b", "test-batch-001"])
+        assert result.exit_code == 0
+        assert "queued ok" in result.output
+        assert (batch_dir / "ledger.yaml").read_bytes() == before
+
     def test_status_not_found(self, runner, project_dir):
         with patch("claude_cli.batch.cli._find_project_root", return_value=project_dir):
             result = runner.invoke(app, [
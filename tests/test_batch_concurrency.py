@@ -0,0 +1,100 @@
+"""Tests for the batch adaptive concurrency controller."""
+
+import time
+
+import pytest
+
+from claude_cli.batch.concurrency import ConcurrencyController, system_pressure
+
+
+def no_pressure():
+    return None
+
+
+@pytest.fixture
+def controller():
+    return ConcurrencyController(ceiling=8, initial=2, pressure_check=no_pressure)
+
+
+class TestInitialLimit:
+    def test_defaults_to_half_ceiling(self):
+        c = ConcurrencyController(ceiling=8, pressure_check=no_pressure)
+        assert c.limit == 4
+
+    def test_clamped_to_ceiling(self):
+        c = ConcurrencyController(ceiling=3, initial=10, pressure_check=no_pressure)
+        assert c.limit == 3
+
+    def test_ceiling_of_one(self):
+        c = ConcurrencyController(ceiling=1, pressure_check=no_pressure)
+        assert c.limit == 1
+
+
+class TestAdditiveIncrease:
+    def test_grows_after_full_window(self, controller):
+        start = time.monotonic()
+        assert controller.on_complete(0, 1.0, start) is None
+        adj = controller.on_complete(0, 1.0, start)
+        assert adj is not None
+        assert (adj.previous, adj.limit) == (2, 3)
+        assert adj.reason == "healthy window"
+
+    def test_never_exceeds_ceiling(self):
+        c = ConcurrencyController(ceiling=2, initial=2, pressure_check=no_pressure)
+        for _ in range(10):
+            assert c.on_complete(0, 1.0, time.monotonic()) is None
+        assert c.limit == 2
+
+    def test_slow_completion_blocks_growth(self, controller):
+        start = time.monotonic()
+        controller.on_complete(0, 1.0, start)
+        assert controller.on_complete(0, 10.0, start) is None
+        assert controller.limit == 2
+
+
+class TestMultiplicativeDecrease:
+    def test_halves_on_failure(self):
+        c = ConcurrencyController(ceiling=8, initial=8, pressure_check=no_pressure)
+        adj = c.on_complete(1, 1.0, time.monotonic())
+        assert (adj.previous, adj.limit) == (8, 4)
+        assert adj.reason == "exit code 1"
+
+    def test_halves_on_timeout(self):
+        c = ConcurrencyController(ceiling=8, initial=6, pressure_check=no_pressure)
+        adj = c.on_timeout(time.monotonic())
+        assert adj.limit == 3
+        assert adj.reason == "timeout"
+
+    def test_burst_from_old_limit_cuts_once(self):
+        c = ConcurrencyController(ceiling=8, initial=8, pressure_check=no_pressure)
+        started = time.monotonic()
+        assert c.on_complete(1, 1.0, started) is not None
+        # Workers launched before the cut should not trigger another one
+        assert c.on_complete(1, 1.0, started) is None
+        assert c.limit == 4
+
+    def test_respects_floor(self):
+        c = ConcurrencyController(ceiling=4, initial=1, pressure_check=no_pressure)
+        assert c.on_complete(1, 1.0, time.monotonic()) is None
+        assert c.limit == 1
+
+    def test_pressure_backs_off(self):
+        c = ConcurrencyController(ceiling=8, initial=8, pressure_check=lambda: "load average")
+        adj = c.check_pressure()
+        assert adj.limit == 4
+        assert adj.reason == "load average"
+        # Within the cooldown, sustained pressure does not cut again
+        assert c.check_pressure() is None
+
+
+class TestSystemPressure:
+    def test_no_pressure_with_generous_thresholds(self):
+        assert system_pressure(max_load_per_cpu=1e9, min_available_memory=0.0) is None
+
+    def test_load_pressure_reported(self):
+        reason = system_pressure(max_load_per_cpu=-1.0, min_available_memory=0.0)
+        assert reason is None or "load average" in reason
+
+    def test_adjustment_serializes(self, controller):
+        adj = controller.on_complete(2, 1.0, time.monotonic())
+        assert adj.to_dict() == {"from": 2, "to": 1, "reason": "exit code 2"}
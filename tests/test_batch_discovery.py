@@ -0,0 +1,108 @@
+"""Tests for streaming batch item discovery."""
+
+import glob
+
+import pytest
+
+from claude_cli.batch.discovery import in_shard, iter_items, parse_shard
+
+
+@pytest.fixture
+def tree(tmp_path):
+    """A small repo with vendored and build directories."""
+    files = [
+        "src/a.py",
+        "src/a/inner.py",
+        "src/a-b.py",
+        "src/pkg/mod.py",
+        "src/pkg/deep/leaf.py",
+        "src/notes.txt",
+        "node_modules/lib/index.py",
+        "build/gen.py",
+        ".hidden/secret.py",
+        "src/.cache.py",
+        "top.py",
+    ]
+    for rel in files:
+        path = tmp_path / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text("# " + rel)
+    return tmp_path
+
+
+def _glob(pattern, root):
+    return sorted(glob.glob(pattern, root_dir=str(root), recursive=True))
+
+
+class TestIterItems:
+    @pytest.mark.parametrize("pattern", ["src/*.py", "src/**/*.py", "**/*.py", "src/*", "*.py"])
+    def test_matches_glob_without_ignores(self, tree, pattern):
+        assert sorted(iter_items(pattern, tree, gitignore=False)) == _glob(pattern, tree)
+
+    def test_files_stream_in_sorted_order(self, tree):
+        items = list(iter_items("**/*.py", tree, gitignore=False))
+        assert items == sorted(items)
+
+    def test_hidden_only_when_pattern_asks(self, tree):
+        assert ".hidden/secret.py" not in list(iter_items("**/*.py", tree))
+        assert list(iter_items(".hidden/*.py", tree)) == [".hidden/secret.py"]
+
+    def test_gitignore_prunes_directories(self, tree):
+        (tree / ".gitignore").write_text("node_modules/\n/build\n# comment\n")
+        items = list(iter_items("**/*.py", tree))
+        assert not any(i.startswith(("node_modules/", "build/")) for i in items)
+        assert "src/pkg/mod.py" in items
+
+    def test_nested_gitignore_and_negation(self, tree):
+        (tree / "src" / ".gitignore").write_text("*.py\n!mod.py\n")
+        items = list(iter_items("**/*.py", tree))
+        assert "src/pkg/mod.py" in items
+        assert "src/a.py" not in items
+        assert "top.py" in items  # outside the nested .gitignore's scope
+
+    def test_gitignore_can_be_disabled(self, tree):
+        (tree / ".gitignore").write_text("build/\n")
+        assert "build/gen.py" in iter_items("**/*.py", tree, gitignore=False)
+
+    def test_exclude_globs(self, tree):
+        items = list(iter_items("**/*.py", tree, exclude=["node_modules", "src/pkg/**"]))
+        assert "node_modules/lib/index.py" not in items
+        assert "src/pkg/mod.py" not in items
+        assert "src/a.py" in items
+
+    def test_does_not_enter_unmatched_directories(self, tree, monkeypatch):
+        import claude_cli.batch.discovery as discovery
+
+        visited = []
+        real_walk = discovery._walk
+
+        def spy(root, rel, *args):
+            visited.append(rel)
+            return real_walk(root, rel, *args)
+
+        monkeypatch.setattr(discovery, "_walk", spy)
+        list(iter_items("src/*.py", tree))
+        assert set(visited) == {"", "src/"}
+
+    def test_is_lazy(self, tree):
+        it = iter_items("**/*.py", tree)
+        assert next(it) == "build/gen.py"
+
+
+class TestSharding:
+    def test_parse(self):
+        assert parse_shard("2/4") == (2, 4)
+
+    @pytest.mark.parametrize("spec", ["0/4", "5/4", "1", "a/b", "1/0"])
+    def test_parse_rejects(self, spec):
+        with pytest.raises(ValueError):
+            parse_shard(spec)
+
+    def test_shards_partition_items(self, tree):
+        everything = list(iter_items("**/*.py", tree, gitignore=False))
+        shards = [list(iter_items("**/*.py", tree, gitignore=False, shard=(i, 3))) for i in (1, 2, 3)]
+        assert sorted(sum(shards, [])) == sorted(everything)
+
+    def test_assignment_is_stable(self):
+        assert in_shard("src/a.py", (1, 4)) == in_shard("src/a.py", (1, 4))
+        assert sum(in_shard("src/a.py", (i, 4)) for i in range(1, 5)) == 1
@@ -1,18 +1,22 @@
 """Tests for the batch ledger module."""
 
 import os
+import signal
 from pathlib import Path
 
 import pytest
 import yaml
 
 from claude_cli.batch.ledger import (
+    LedgerSession,
     _sanitize_name,
+    compact_ledger,
     create_ledger,
     generate_batch_id,
     get_active_items,
     get_ledger_summary,
     get_resumable_items,
+    journal_path_for,
     load_ledger,
     reset_stale_active,
     update_item_status,
@@ -101,6 +105,24 @@ class TestCreateLedger:
         item = data["items"][0]
         assert item["result_file"] == "results/src_auth_service_py.json"
 
+    def test_streams_items_from_generator(self, batch_dir, monkeypatch):
+        import claude_cli.batch.ledger as ledger_mod
+
+        monkeypatch.setattr(ledger_mod, "_CREATE_CHUNK", 2)
+        names = (f"f{i}.py" for i in range(5))
+        path = create_ledger("gen", names, "p", {}, batch_dir, lambda item: int(item[1]))
+
+        data = yaml.safe_load(path.read_text())
+        assert [i["name"] for i in data["items"]] == [f"f{i}.py" for i in range(5)]
+        assert [i["priority"] for i in data["items"]] == [0, 1, 2, 3, 4]
+        assert data["summary"]["total"] == 5
+
+    def test_empty_items(self, batch_dir):
+        path = create_ledger("empty", iter(()), "p", {}, batch_dir)
+        data = load_ledger(path)
+        assert data["items"] == []
+        assert data["summary"]["total"] == 0
+
 
 class TestLoadLedger:
     def test_roundtrip(self, ledger_path, sample_items):
@@ -230,6 +252,127 @@ class TestResetStaleActive:
         assert reset == []
 
 
+class TestJournal:
+    def test_update_appends_without_rewriting_snapshot(self, ledger_path):
+        before = ledger_path.read_text()
+        update_item_status(ledger_path, "src/auth/service.py", "active", pid=42)
+        assert ledger_path.read_text() == before
+        lines = journal_path_for(ledger_path).read_text().splitlines()
+        assert len(lines) == 1
+
+    def test_load_replays_journal(self, ledger_path):
+        update_item_status(ledger_path, "src/auth/service.py", "active", pid=42)
+        update_item_status(ledger_path, "src/auth/service.py", "done", exit_code=0)
+        data = load_ledger(ledger_path)
+        assert data["items"][0]["status"] == "done"
+        assert data["items"][0]["pid"] == 42
+        assert data["summary"]["done"] == 1
+
+    def test_compact_folds_journal_into_snapshot(self, ledger_path):
+        update_item_status(ledger_path, "src/auth/service.py", "done", exit_code=0)
+        compact_ledger(ledger_path)
+        assert not journal_path_for(ledger_path).exists()
+        data = yaml.safe_load(ledger_path.read_text())
+        assert data["items"][0]["status"] == "done"
+        assert data["summary"]["done"] == 1
+
+    def test_replay_after_compaction_crash_is_idempotent(self, ledger_path):
+        update_item_status(ledger_path, "src/auth/service.py", "done", exit_code=0)
+        journal = journal_path_for(ledger_path)
+        saved = journal.read_text()
+        compact_ledger(ledger_path)
+        # Simulate a crash after the snapshot write but before the truncate
+        journal.write_text(saved)
+        data = load_ledger(ledger_path)
+        assert data["summary"]["done"] == 1
+        assert data["summary"]["pending"] == 2
+
+    def test_torn_trailing_line_ignored(self, ledger_path):
+        update_item_status(ledger_path, "src/auth/service.py", "done", exit_code=0)
+        with journal_path_for(ledger_path).open("a") as f:
+            f.write('{"ts": "2026-01-01T00:00:00", "item": "src/api/ro')
+        data = load_ledger(ledger_path)
+        assert data["items"][0]["status"] == "done"
+        assert data["items"][1]["status"] == "pending"
+
+    def test_auto_compacts_past_threshold(self, ledger_path, monkeypatch):
+        import claude_cli.batch.ledger as ledger_mod
+
+        monkeypatch.setattr(ledger_mod, "COMPACT_THRESHOLD_BYTES", 1)
+        update_item_status(ledger_path, "src/auth/service.py", "done", exit_code=0)
+        assert not journal_path_for(ledger_path).exists()
+        assert yaml.safe_load(ledger_path.read_text())["items"][0]["status"] == "done"
+
+    def test_create_discards_stale_journal(self, ledger_path, batch_dir, sample_items):
+        update_item_status(ledger_path, "src/auth/service.py", "done", exit_code=0)
+        create_ledger("test-batch", sample_items, "Review $item", {}, batch_dir)
+        assert load_ledger(ledger_path)["summary"]["pending"] == 3
+
+
+class TestLedgerSession:
+    def test_buffers_until_flush_every(self, ledger_path):
+        with LedgerSession(ledger_path, flush_interval=60, flush_every=3) as session:
+            session.update_item_status("src/auth/service.py", "active", pid=1)
+            session.update_item_status("src/api/routes.py", "active", pid=2)
+            assert not journal_path_for(ledger_path).exists()
+            session.update_item_status("src/db/models.py", "active", pid=3)
+            lines = journal_path_for(ledger_path).read_text().splitlines()
+            assert len(lines) == 3
+
+    def test_flushes_after_interval(self, ledger_path):
+        with LedgerSession(ledger_path, flush_interval=0, flush_every=100) as session:
+            session.update_item_status("src/auth/service.py", "active", pid=1)
+            assert load_ledger(ledger_path)["items"][0]["status"] == "active"
+
+    def test_summary_maintained_in_memory(self, ledger_path):
+        with LedgerSession(ledger_path, flush_interval=60, flush_every=100) as session:
+            session.update_item_status("src/auth/service.py", "active", pid=1)
+            session.update_item_status("src/auth/service.py", "done", exit_code=0)
+            session.update_item_status("src/api/routes.py", "failed", exit_code=1)
+            assert session.summary == {
+                "total": 3, "pending": 1, "active": 0, "done": 1, "failed": 1,
+            }
+            assert session.get_item("src/auth/service.py")["exit_code"] == 0
+            assert session.get_resumable_items() == ["src/api/routes.py", "src/db/models.py"]
+
+    def test_close_compacts_into_snapshot(self, ledger_path):
+        with LedgerSession(ledger_path, flush_interval=60, flush_every=100) as session:
+            session.update_item_status("src/auth/service.py", "done", exit_code=0)
+        assert not journal_path_for(ledger_path).exists()
+        data = yaml.safe_load(ledger_path.read_text())
+        assert data["items"][0]["status"] == "done"
+        assert data["summary"]["done"] == 1
+
+    def test_sees_prior_journal(self, ledger_path):
+        update_item_status(ledger_path, "src/auth/service.py", "done", exit_code=0)
+        with LedgerSession(ledger_path) as session:
+            assert session.summary["done"] == 1
+
+    def test_reset_stale_active(self, ledger_path):
+        update_item_status(ledger_path, "src/auth/service.py", "active", pid=999999999)
+        with LedgerSession(ledger_path, flush_interval=60, flush_every=100) as session:
+            assert session.reset_stale_active() == ["src/auth/service.py"]
+            assert session.summary["active"] == 0
+            # Reset is flushed immediately, not left in the buffer
+            assert load_ledger(ledger_path)["items"][0]["status"] == "pending"
+
+    def test_sigterm_flushes_buffer(self, ledger_path):
+        session = LedgerSession(ledger_path, flush_interval=60, flush_every=100)
+        with pytest.raises(SystemExit):
+            with session.flush_on_signals():
+                session.update_item_status("src/auth/service.py", "active", pid=7)
+                os.kill(os.getpid(), signal.SIGTERM)
+        data = load_ledger(ledger_path)
+        assert data["items"][0]["status"] == "active"
+        assert data["items"][0]["pid"] == 7
+
+    def test_signal_handlers_restored(self, ledger_path):
+        before = signal.getsignal(signal.SIGTERM)
+        with LedgerSession(ledger_path) as session, session.flush_on_signals():
+            assert signal.getsignal(signal.SIGTERM) is not before
+        assert signal.getsignal(signal.SIGTERM) is before
+
+
 class TestSanitizeName:
     def test_basic_path(self):
         assert _sanitize_name("src/auth/service.py") == "src_auth_service_py"
@@ -242,3 +385,39 @@ class TestSanitizeName:
 
     def test_windows_path(self):
         assert _sanitize_name("src\\auth\\service.py") == "src_auth_service_py"
+
+
+class TestRetryBudget:
+    def test_failed_with_budget_is_resumable(self, ledger_path):
+        update_item_status(
+            ledger_path, "src/auth/service.py", "failed",
+            exit_code=1, attempts=2, error_class="transient",
+        )
+        assert "src/auth/service.py" in get_resumable_items(ledger_path)
+
+    def test_exhausted_budget_not_resumable(self, ledger_path):
+        update_item_status(
+            ledger_path, "src/auth/service.py", "failed",
+            exit_code=1, attempts=3, error_class="transient",
+        )
+        assert "src/auth/service.py" not in get_resumable_items(ledger_path)
+
+    def test_permanent_not_resumable(self, ledger_path):
+        update_item_status(
+            ledger_path, "src/auth/service.py", "failed",
+            exit_code=1, attempts=1, error_class="permanent",
+        )
+        assert "src/auth/service.py" not in get_resumable_items(ledger_path)
+
+    def test_done_clears_error_class(self, ledger_path):
+        update_item_status(
+            ledger_path, "src/auth/service.py", "failed", exit_code=1, error_class="timeout"
+        )
+        update_item_status(ledger_path, "src/auth/service.py", "done", exit_code=0)
+        assert load_ledger(ledger_path)["items"][0]["last_error_class"] is None
+
+    def test_new_items_start_with_no_attempts(self, ledger_path):
+        item = load_ledger(ledger_path)["items"][0]
+        assert item["attempts"] == 0
+        assert item["last_error_class"] is None
+        assert load_ledger(ledger_path)["config"]["max_attempts"] == 3
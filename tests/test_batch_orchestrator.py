@@ -1,5 +1,10 @@
 """Tests for the batch orchestrator module."""
 
+import functools
+import io
+import os
+import stat
+import time
 from pathlib import Path
 from unittest.mock import MagicMock, patch
 
@@ -7,6 +12,7 @@ import pytest
 
 from claude_cli.batch.ledger import create_ledger
 from claude_cli.batch.orchestrator import build_command, discover_items, find_claude_binary
+from claude_cli.batch.retry import RetryPolicy
 
 
 @pytest.fixture
@@ -81,6 +87,11 @@ class TestBuildCommand:
         cmd = build_command("test.py", "Check $item")
         assert "--allowedTools" not in cmd
 
+    def test_stream_json_adds_verbose(self):
+        cmd = build_command("test.py", "Check $item", output_format="stream-json")
+        assert cmd[cmd.index("--output-format") + 1] == "stream-json"
+        assert "--verbose" in cmd
+
 
 class TestFindClaudeBinary:
     @patch("claude_cli.batch.orchestrator.shutil.which")
@@ -102,8 +113,9 @@ class TestRunBatch:
 
         # Mock process that completes immediately
         mock_proc = MagicMock()
-        mock_proc.poll.return_value = 0
+        mock_proc.wait.return_value = 0
         mock_proc.pid = 12345
+        mock_proc.stdout = io.BytesIO()
         mock_popen.return_value = mock_proc
 
         summary = run_batch(batch_dir, parallel=2, poll_interval=0.01)
@@ -128,9 +140,10 @@ class TestRunBatch:
         def make_proc(*args, **kwargs):
             mock = MagicMock()
             mock.pid = 10000 + len(spawn_order)
+            mock.stdout = io.BytesIO()
             spawn_order.append(mock)
-            # Each process completes on first poll
-            mock.poll.return_value = 0
+            # Each process exits as soon as it is waited on
+            mock.wait.return_value = 0
             return mock
 
         mock_popen.side_effect = make_proc
@@ -138,9 +151,8 @@ class TestRunBatch:
 
         assert len(spawn_order) == 5  # All items processed
         assert summary["done"] == 5
-        # The orchestrator spawns up to `parallel` before polling.
-        # With instant completion, it cycles: spawn 2, poll (both done),
-        # spawn 2, poll, spawn 1, poll. So it works correctly.
+        # The orchestrator spawns up to `parallel`, then refills one slot
+        # per completion delivered by the waiter threads.
 
     @patch("claude_cli.batch.orchestrator.subprocess.Popen")
     def test_handles_failures(self, mock_popen, batch_dir):
@@ -148,11 +160,14 @@ class TestRunBatch:
         from claude_cli.batch.orchestrator import run_batch
 
         mock_proc = MagicMock()
-        mock_proc.poll.return_value = 1  # Non-zero exit
+        mock_proc.wait.return_value = 1  # Non-zero exit
         mock_proc.pid = 99999
+        mock_proc.stdout = io.BytesIO()
         mock_popen.return_value = mock_proc
 
-        summary = run_batch(batch_dir, parallel=2, poll_interval=0.01)
+        summary = run_batch(
+            batch_dir, parallel=2, poll_interval=0.01, retry=RetryPolicy(max_attempts=1)
+        )
         assert summary["failed"] == 2
         assert summary["done"] == 0
 
@@ -169,11 +184,473 @@ class TestResumeBatch:
         update_item_status(ledger_path, "src/auth.py", "done", exit_code=0)
 
         mock_proc = MagicMock()
-        mock_proc.poll.return_value = 0
+        mock_proc.wait.return_value = 0
         mock_proc.pid = 11111
+        mock_proc.stdout = io.BytesIO()
         mock_popen.return_value = mock_proc
 
         summary = resume_batch(batch_dir, parallel=2)
 
         # Should only spawn 1 process (the pending item)
         assert mock_popen.call_count == 1
+
+
+@pytest.fixture
+def fake_claude(tmp_path, monkeypatch):
+    """Put a stub `claude` executable on PATH that sleeps briefly then exits."""
+    bin_dir = tmp_path / "fakebin"
+    bin_dir.mkdir()
+    script = bin_dir / "claude"
+    script.write_text(
+        "#!/bin/sh\n"
+        "sleep \"${FAKE_CLAUDE_SLEEP:-0.05}\"\n"
+        "echo '{\"result\": \"ok\"}'\n"
+        "exit \"${FAKE_CLAUDE_EXIT:-0}\"\n"
+    )
+    script.chmod(script.stat().st_mode | stat.S_IEXEC)
+    monkeypatch.setenv("PATH", f"{bin_dir}{os.pathsep}{os.environ.get('PATH', '')}")
+    return script
+
+
+class TestEventDrivenReaping:
+    def test_slots_refilled_without_waiting_for_poll(self, fake_claude, tmp_path):
+        """A finished child frees its slot immediately, not on the next poll tick."""
+        from claude_cli.batch.orchestrator import run_batch
+
+        bd = tmp_path / ".claude" / "batch" / "reap-test"
+        items = [f"file_{i}.py" for i in range(6)]
+        create_ledger("reap-test", items, "Check $item", {"parallel": 2}, bd)
+
+        start = time.monotonic()
+        summary = run_batch(bd, parallel=2, poll_interval=5.0)
+        elapsed = time.monotonic() - start
+
+        assert summary["done"] == 6
+        # Three waves of 50 ms children; a poll-and-sleep loop would need
+        # at least one full poll_interval per wave.
+        assert elapsed < 5.0
+
+    def test_on_complete_called_per_item(self, fake_claude, batch_dir):
+        from claude_cli.batch.orchestrator import run_batch
+
+        completed = []
+        run_batch(batch_dir, parallel=2, on_complete=lambda i, rc: completed.append((i, rc)))
+
+        assert sorted(completed) == [("src/api.py", 0), ("src/auth.py", 0)]
+
+    def test_completions_indexed(self, fake_claude, batch_dir):
+        from claude_cli.batch.broker import collect_summaries, load_index
+        from claude_cli.batch.orchestrator import run_batch
+
+        run_batch(batch_dir, parallel=2)
+
+        index = load_index(batch_dir / "results")
+        record = index["src_auth_py.json"]
+        assert record["status"] == "done"
+        assert record["summary"] == "ok"
+        assert record["duration_ms"] >= 0
+        assert {s["summary"] for s in collect_summaries(batch_dir / "results")} == {"ok"}
+
+    def test_resource_usage_recorded(self, fake_claude, tmp_path):
+        from claude_cli.batch.ledger import load_ledger
+        from claude_cli.batch.orchestrator import run_batch
+
+        bd = tmp_path / ".claude" / "batch" / "usage-test"
+        create_ledger("usage-test", ["a.py"], "Check $item", {"sample_interval": 0.01}, bd)
+        run_batch(bd, parallel=1)
+
+        item = load_ledger(bd / "ledger.yaml")["items"][0]
+        assert item["status"] == "done"
+        assert item["peak_rss_kib"] > 0
+        assert item["cpu_user_ms"] >= 0
+        assert item["io_write_bytes"] >= 0
+
+    def test_nonzero_exit_marks_failed(self, fake_claude, batch_dir, monkeypatch):
+        from claude_cli.batch.orchestrator import run_batch
+
+        monkeypatch.setenv("FAKE_CLAUDE_EXIT", "3")
+        summary = run_batch(batch_dir, parallel=2, retry=RetryPolicy(max_attempts=1))
+
+        assert summary["failed"] == 2
+
+
+class TestAdaptiveConcurrency:
+    def test_adjustments_recorded_in_ledger(self, fake_claude, tmp_path, monkeypatch):
+        from claude_cli.batch import orchestrator
+        from claude_cli.batch.concurrency import ConcurrencyController
+        from claude_cli.batch.ledger import load_ledger
+        from claude_cli.batch.orchestrator import run_batch
+
+        # Keep the test independent of the host's load average
+        monkeypatch.setattr(
+            orchestrator, "ConcurrencyController",
+            functools.partial(ConcurrencyController, pressure_check=lambda: None),
+        )
+        bd = tmp_path / ".claude" / "batch" / "aimd-test"
+        items = [f"file_{i}.py" for i in range(6)]
+        create_ledger("aimd-test", items, "Check $item", {"parallel": 4}, bd)
+
+        summary = run_batch(bd, parallel=4, adaptive=True)
+
+        assert summary["done"] == 6
+        log = load_ledger(bd / "ledger.yaml")["concurrency_log"]
+        assert log[0]["reason"] == "start"
+        assert log[0]["to"] == 2
+        assert any(entry["reason"] == "healthy window" for entry in log[1:])
+        assert all(entry["to"] <= 4 for entry in log)
+
+
+class TestTimeoutsAndRetries:
+    def test_hung_worker_is_killed_and_classified(self, fake_claude, batch_dir, monkeypatch):
+        from claude_cli.batch.ledger import load_ledger
+        from claude_cli.batch.orchestrator import run_batch
+
+        monkeypatch.setenv("FAKE_CLAUDE_SLEEP", "30")
+        start = time.monotonic()
+        summary = run_batch(
+            batch_dir, parallel=2, timeout=0.2, retry=RetryPolicy(max_attempts=1)
+        )
+
+        assert time.monotonic() - start < 10
+        assert summary["failed"] == 2
+        item = load_ledger(batch_dir / "ledger.yaml")["items"][0]
+        assert item["last_error_class"] == "timeout"
+        assert item["attempts"] == 1
+
+    def test_transient_failure_retried_up_to_budget(self, fake_claude, batch_dir, monkeypatch):
+        from claude_cli.batch.ledger import load_ledger
+        from claude_cli.batch.orchestrator import run_batch
+
+        monkeypatch.setenv("FAKE_CLAUDE_EXIT", "1")
+        completions = []
+        run_batch(
+            batch_dir,
+            parallel=2,
+            on_complete=lambda i, rc: completions.append(i),
+            retry=RetryPolicy(max_attempts=3, base_delay=0.01, jitter=False),
+        )
+
+        assert len(completions) == 6
+        ledger = load_ledger(batch_dir / "ledger.yaml")
+        assert all(item["attempts"] == 3 for item in ledger["items"])
+        assert all(item["last_error_class"] == "transient" for item in ledger["items"])
+
+    def test_permanent_failure_not_retried(self, fake_claude, batch_dir, monkeypatch):
+        from claude_cli.batch.ledger import get_resumable_items
+        from claude_cli.batch.orchestrator import run_batch
+
+        monkeypatch.setenv("FAKE_CLAUDE_EXIT", "127")
+        completions = []
+        run_batch(
+            batch_dir,
+            parallel=2,
+            on_complete=lambda i, rc: completions.append(i),
+            retry=RetryPolicy(max_attempts=3, base_delay=0.01),
+        )
+
+        assert len(completions) == 2
+        assert get_resumable_items(batch_dir / "ledger.yaml") == []
+
+    @pytest.mark.parametrize("broken", ["missing", "not_executable"])
+    def test_spawn_failure_is_permanent(self, fake_claude, batch_dir, monkeypatch, broken):
+        from claude_cli.batch.ledger import load_ledger
+        from claude_cli.batch.orchestrator import run_batch
+
+        if broken == "missing":
+            fake_claude.unlink()
+        else:
+            fake_claude.chmod(0o644)
+        # Keep any real claude on the host out of reach
+        monkeypatch.setenv("PATH", str(fake_claude.parent))
+        completions = []
+        summary = run_batch(
+            batch_dir,
+            parallel=2,
+            on_complete=lambda i, rc: completions.append(rc),
+            retry=RetryPolicy(max_attempts=3, base_delay=0.01),
+        )
+
+        expected = 127 if broken == "missing" else 126
+        assert summary["failed"] == 2
+        assert completions == [expected, expected]
+        item = load_ledger(batch_dir / "ledger.yaml")["items"][0]
+        assert item["last_error_class"] == "permanent"
+        assert item["attempts"] == 1
+        assert item["exit_code"] == expected
+
+    def test_retry_succeeds_after_transient_failure(self, fake_claude, batch_dir, tmp_path):
+        from claude_cli.batch.ledger import load_ledger
+        from claude_cli.batch.orchestrator import run_batch
+
+        # Fail the first invocation for each item, succeed afterwards
+        marker_dir = tmp_path / "markers"
+        marker_dir.mkdir()
+        fake_claude.write_text(
+            "#!/bin/sh\n"
+            f"m=\"{marker_dir}/$(echo \"$3\" | tr -c 'a-z' '_')\"\n"
+            "if [ -e \"$m\" ]; then echo '{\"result\": \"ok\"}'; exit 0; fi\n"
+            "touch \"$m\"; echo 'API Error: 529 overloaded'; exit 1\n"
+        )
+
+        summary = run_batch(
+            batch_dir, parallel=2, retry=RetryPolicy(base_delay=0.01, jitter=False)
+        )
+
+        assert summary["done"] == 2
+        item = load_ledger(batch_dir / "ledger.yaml")["items"][0]
+        assert item["attempts"] == 2
+        assert item["last_error_class"] is None
+
+
+class TestInterrupt:
+    def test_interrupt_stops_workers(self, tmp_path):
+        import signal
+        import subprocess
+        import sys
+
+        from claude_cli.batch.ledger import load_ledger
+
+        bin_dir = tmp_path / "bin"
+        bin_dir.mkdir()
+        pids_file = tmp_path / "pids"
+        script = bin_dir / "claude"
+        script.write_text(f"#!/bin/sh\necho $$ >> {pids_file}\nexec sleep 60\n")
+        script.chmod(script.stat().st_mode | stat.S_IEXEC)
+        bd = tmp_path / ".claude" / "batch" / "interrupt-test"
+        create_ledger("interrupt-test", ["a.py", "b.py"], "Check $item", {"parallel": 2}, bd)
+
+        orchestrator = subprocess.Popen(
+            [sys.executable, "-c",
+             "import sys; from pathlib import Path; "
+             "from claude_cli.batch.orchestrator import run_batch; "
+             "run_batch(Path(sys.argv[1]), parallel=2)", str(bd)],
+            env={**os.environ, "PATH": f"{bin_dir}{os.pathsep}{os.environ['PATH']}"},
+        )
+        try:
+            deadline = time.monotonic() + 30
+            while time.monotonic() < deadline:
+                if pids_file.exists() and len(pids_file.read_text().split()) == 2:
+                    break
+                time.sleep(0.05)
+            workers = [int(pid) for pid in pids_file.read_text().split()]
+            assert len(workers) == 2
+
+            orchestrator.send_signal(signal.SIGINT)
+            orchestrator.wait(timeout=30)
+        finally:
+            orchestrator.kill()
+
+        time.sleep(0.2)
+        for pid in workers:
+            with pytest.raises(ProcessLookupError):
+                os.kill(pid, 0)
+        items = load_ledger(bd / "ledger.yaml")["items"]
+        assert [item["status"] for item in items] == ["pending", "pending"]
+        assert all(item["attempts"] == 0 for item in items)
+
+
+class TestStreamingCapture:
+    def test_metrics_land_in_ledger(self, fake_claude, batch_dir):
+        from claude_cli.batch.ledger import load_ledger
+        from claude_cli.batch.orchestrator import run_batch
+
+        fake_claude.write_text(
+            "#!/bin/sh\n"
+            "echo '{\"type\": \"assistant\", \"message\": {\"content\": "
+            "[{\"type\": \"tool_use\", \"name\": \"Read\"}]}}'\n"
+            "echo '{\"type\": \"result\", \"result\": \"2 issues\", "
+            "\"usage\": {\"input_tokens\": 30, \"output_tokens\": 12}}'\n"
+        )
+
+        run_batch(batch_dir, parallel=2)
+
+        item = load_ledger(batch_dir / "ledger.yaml")["items"][0]
+        assert item["summary"] == "2 issues"
+        assert item["total_tokens"] == 42
+        assert item["tool_uses"] == 1
+        assert item["duration_ms"] >= 0
+        result = (batch_dir / "results" / "src_auth_py.json").read_text()
+        assert "2 issues" in result
+
+    def test_collector_reads_captured_metrics(self, fake_claude, tmp_path):
+        from claude_cli.batch.orchestrator import run_batch
+        from claude_cli.metrics.collector import collect_from_batch_ledgers
+
+        project = tmp_path / "proj"
+        (project / ".claude").mkdir(parents=True)
+        (project / ".claude" / "manifest.yaml").write_text("phase: coding\n")
+        fake_claude.write_text(
+            "#!/bin/sh\n"
+            "echo '{\"result\": \"ok\", \"usage\": {\"input_tokens\": 7, \"output_tokens\": 3}}'\n"
+        )
+        bd = project / ".claude" / "batch" / "b1"
+        create_ledger("b1", ["a.py"], "Check $item", {}, bd)
+
+        run_batch(bd, parallel=1)
+
+        runs = collect_from_batch_ledgers(tmp_path)
+        assert len(runs) == 1
+        assert runs[0].total_tokens == 10
+
+
+class TestResultCache:
+    def test_unchanged_items_skip_spawn(self, fake_claude, tmp_path):
+        from claude_cli.batch.broker import generate_report
+        from claude_cli.batch.ledger import load_ledger
+        from claude_cli.batch.orchestrator import run_batch
+
+        (tmp_path / "a.py").write_text("a")
+        (tmp_path / "b.py").write_text("b")
+        config = {"parallel": 2, "cache": True}
+        first = tmp_path / ".claude" / "batch" / "first"
+        create_ledger("first", ["a.py", "b.py"], "Check $item", config, first)
+        run_batch(first, parallel=2)
+
+        (tmp_path / "b.py").write_text("b changed")
+        second = tmp_path / ".claude" / "batch" / "second"
+        create_ledger("second", ["a.py", "b.py"], "Check $item", config, second)
+        fake_claude.write_text("#!/bin/sh\necho '{\"result\": \"fresh\"}'\n")
+        run_batch(second, parallel=2)
+
+        items = {i["name"]: i for i in load_ledger(second / "ledger.yaml")["items"]}
+        assert items["a.py"]["cache_hit"] is True
+        assert items["a.py"]["summary"] == "ok"
+        assert items["b.py"]["cache_hit"] is False
+        assert items["b.py"]["summary"] == "fresh"
+        assert "ok" in (second / "results" / "a_py.json").read_text()
+
+        report = generate_report(second)
+        assert "- Hits: 1" in report
+        assert "- Misses: 1" in report
+
+    def test_cache_off_by_default(self, fake_claude, batch_dir):
+        from claude_cli.batch.ledger import load_ledger
+        from claude_cli.batch.orchestrator import run_batch
+
+        run_batch(batch_dir, parallel=2)
+        assert "cache_hit" not in load_ledger(batch_dir / "ledger.yaml")["items"][0]
+        assert not (batch_dir.parent / "cache").exists()
+
+
+class TestScheduling:
+    @patch("claude_cli.batch.orchestrator.subprocess.Popen")
+    def test_dispatches_largest_first(self, mock_popen, tmp_path):
+        from claude_cli.batch.orchestrator import run_batch
+
+        for name, size in (("a.py", 10), ("b.py", 1000), ("c.py", 100)):
+            (tmp_path / name).write_text("x" * size)
+        bd = tmp_path / ".claude" / "batch" / "lpt-test"
+        create_ledger("lpt-test", ["a.py", "b.py", "c.py"], "Check $item", {}, bd)
+
+        spawned = []
+
+        def make_proc(cmd, **kwargs):
+            spawned.append(cmd[2])
+            mock = MagicMock()
+            mock.pid = 20000 + len(spawned)
+            mock.stdout = io.BytesIO()
+            mock.wait.return_value = 0
+            return mock
+
+        mock_popen.side_effect = make_proc
+        run_batch(bd, parallel=1)
+
+        assert spawned == ["Check b.py", "Check c.py", "Check a.py"]
+
+    @patch("claude_cli.batch.orchestrator.subprocess.Popen")
+    def test_fifo_keeps_glob_order(self, mock_popen, tmp_path):
+        from claude_cli.batch.orchestrator import run_batch
+
+        for name, size in (("a.py", 10), ("b.py", 1000)):
+            (tmp_path / name).write_text("x" * size)
+        bd = tmp_path / ".claude" / "batch" / "fifo-test"
+        create_ledger("fifo-test", ["a.py", "b.py"], "Check $item", {"schedule": "fifo"}, bd)
+
+        spawned = []
+
+        def make_proc(cmd, **kwargs):
+            spawned.append(cmd[2])
+            mock = MagicMock()
+            mock.pid = 21000 + len(spawned)
+            mock.stdout = io.BytesIO()
+            mock.wait.return_value = 0
+            return mock
+
+        mock_popen.side_effect = make_proc
+        run_batch(bd, parallel=1)
+
+        assert spawned == ["Check a.py", "Check b.py"]
+
+
+class TestWorkerMode:
+    def test_workers_split_batch(self, fake_claude, tmp_path):
+        import threading
+
+        from claude_cli.batch.ledger import load_ledger
+        from claude_cli.batch.orchestrator import run_worker
+
+        bd = tmp_path / ".claude" / "batch" / "multi-test"
+        items = [f"file_{i}.py" for i in range(8)]
+        create_ledger("multi-test", items, "Check $item", {"parallel": 2}, bd)
+
+        completed = {"w1": [], "w2": []}
+
+        def work(worker_id):
+            run_worker(
+                bd, parallel=2, poll_interval=0.05, worker_id=worker_id,
+                on_complete=lambda item, rc: completed[worker_id].append(item),
+            )
+
+        threads = [threading.Thread(target=work, args=(w,)) for w in completed]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join(30)
+
+        assert sorted(completed["w1"] + completed["w2"]) == sorted(items)
+        ledger = load_ledger(bd / "ledger.yaml")
+        assert ledger["summary"]["done"] == 8
+        assert {item["worker"] for item in ledger["items"]} <= {"w1", "w2"}
+
+    def test_worker_retries_through_queue(self, fake_claude, batch_dir, monkeypatch):
+        from claude_cli.batch.ledger import load_ledger
+        from claude_cli.batch.orchestrator import run_worker
+
+        monkeypatch.setenv("FAKE_CLAUDE_EXIT", "1")
+        retry = RetryPolicy(max_attempts=2, base_delay=0.01, jitter=False)
+        summary = run_worker(batch_dir, parallel=2, poll_interval=0.05, retry=retry)
+
+        assert summary["failed"] == 2
+        item = load_ledger(batch_dir / "ledger.yaml")["items"][0]
+        assert item["attempts"] == 2
+        assert item["last_error_class"] == "transient"
+
+    def test_local_resume_retires_queue(self, fake_claude, batch_dir, monkeypatch):
+        from claude_cli.batch.orchestrator import resume_batch, run_worker
+        from claude_cli.batch.workqueue import queue_path_for, read_ledger
+
+        monkeypatch.setenv("FAKE_CLAUDE_EXIT", "1")
+        run_worker(batch_dir, parallel=2, poll_interval=0.05, retry=RetryPolicy(max_attempts=1))
+        assert read_ledger(batch_dir)["summary"]["failed"] == 2
+
+        monkeypatch.setenv("FAKE_CLAUDE_EXIT", "0")
+        resume_batch(batch_dir, parallel=2, retry=RetryPolicy(max_attempts=2))
+
+        assert not queue_path_for(batch_dir).exists()
+        ledger = read_ledger(batch_dir)
+        assert ledger["summary"]["done"] == 2
+        assert all(item["attempts"] == 2 for item in ledger["items"])
+
+    def test_local_run_refuses_live_workers(self, batch_dir):
+        from claude_cli.batch.orchestrator import run_batch
+        from claude_cli.batch.workqueue import WorkQueue, queue_path_for
+
+        work_queue = WorkQueue(queue_path_for(batch_dir))
+        work_queue.seed(["src/auth.py"])
+        work_queue.claim("elsewhere")
+        work_queue.close()
+
+        with pytest.raises(RuntimeError):
+            run_batch(batch_dir, parallel=1)
+        assert queue_path_for(batch_dir).exists()
+
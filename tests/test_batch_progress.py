@@ -0,0 +1,156 @@
+"""Tests for live batch progress tracking."""
+
+from datetime import datetime, timezone
+
+import pytest
+
+from claude_cli.batch.ledger import LedgerSession, create_ledger
+from claude_cli.batch.progress import ProgressTracker, _percentile, format_duration
+
+
+@pytest.fixture
+def ledger_path(tmp_path):
+    items = [f"f{i}.py" for i in range(10)]
+    return create_ledger("p-batch", items, "Check $item", {}, tmp_path / "batch")
+
+
+@pytest.fixture
+def tracker(ledger_path):
+    t = ProgressTracker(ledger_path)
+    yield t
+    t.close()
+
+
+def _complete(session, name, duration_ms, status="done", attempt=1, error_class=None):
+    session.update_item_status(name, "active", pid=1, attempts=attempt)
+    session.update_item_status(
+        name, status, exit_code=0 if status == "done" else 1, error_class=error_class,
+        metrics={"duration_ms": duration_ms},
+    )
+
+
+class TestProgressTracker:
+    def test_initial_counts(self, tracker):
+        progress = tracker.poll()
+        assert progress.total == 10
+        assert progress.pending == 10
+        assert progress.items_per_min is None
+        assert progress.eta_s is None
+        assert not progress.finished
+
+    def test_follows_journal(self, ledger_path, tracker):
+        session = LedgerSession(ledger_path, flush_every=1)
+        for i, ms in enumerate((1000, 2000, 3000)):
+            _complete(session, f"f{i}.py", ms)
+        _complete(session, "f3.py", 500, status="failed")
+        session.update_item_status("f4.py", "active", pid=2, attempts=1)
+        session.flush()
+
+        progress = tracker.poll()
+        assert (progress.done, progress.failed, progress.active, progress.pending) == (3, 1, 1, 5)
+        assert progress.p50_ms == 2000
+        assert progress.p95_ms == 3000
+        assert progress.items_per_min > 0
+        assert progress.eta_s is not None
+
+    def test_survives_compaction(self, ledger_path, tracker):
+        session = LedgerSession(ledger_path, flush_every=1)
+        _complete(session, "f0.py", 1000)
+        tracker.poll()
+
+        _complete(session, "f1.py", 1000)
+        session.compact()  # folds the journal in and unlinks it
+        _complete(session, "f2.py", 1000)
+        session.flush()
+
+        assert tracker.poll().done == 3
+
+    def test_finished(self, ledger_path, tracker):
+        with LedgerSession(ledger_path) as session:
+            for i in range(10):
+                _complete(session, f"f{i}.py", 100)
+        progress = tracker.poll()
+        assert progress.done == 10
+        assert progress.finished
+
+    def test_torn_line_waits_for_rest(self, ledger_path, tracker):
+        journal = ledger_path.with_suffix(".journal.jsonl")
+        now = datetime.now(timezone.utc).isoformat()
+        line = f'{{"ts": "{now}", "item": "f0.py", "set": {{"status": "active"}}}}\n'
+        journal.write_text(line[:20])
+        assert tracker.poll().active == 0
+        with journal.open("a") as f:
+            f.write(line[20:])
+        assert tracker.poll().active == 1
+
+    def test_retry_backoff_is_not_finished(self, ledger_path, tracker):
+        session = LedgerSession(ledger_path, flush_every=1)
+        for i in range(9):
+            _complete(session, f"f{i}.py", 100)
+        _complete(session, "f9.py", 100, status="failed", error_class="transient")
+
+        progress = tracker.poll()
+        assert (progress.pending, progress.active, progress.failed) == (0, 0, 1)
+        assert progress.retrying == 1
+        assert not progress.finished
+
+        _complete(session, "f9.py", 100, status="failed", attempt=2, error_class="permanent")
+        progress = tracker.poll()
+        assert (progress.failed, progress.retrying) == (1, 0)
+        assert progress.finished
+
+    def test_exhausted_retries_finish(self, ledger_path, tracker):
+        session = LedgerSession(ledger_path, flush_every=1)
+        for i in range(9):
+            _complete(session, f"f{i}.py", 100)
+        for attempt in (1, 2, 3):
+            _complete(session, "f9.py", 100, status="failed", attempt=attempt)
+            assert tracker.poll().finished == (attempt == 3)
+
+    def test_folded_events_not_counted_twice(self, ledger_path):
+        session = LedgerSession(ledger_path, flush_every=1)
+        _complete(session, "f0.py", 100)
+        journal = ledger_path.with_suffix(".journal.jsonl")
+        events = journal.read_bytes()
+        session.compact()
+        # A reader that opened the journal just before compaction sees it again
+        journal.write_bytes(events)
+
+        tracker = ProgressTracker(ledger_path)
+        try:
+            progress = tracker.poll()
+            assert (progress.done, progress.pending, progress.active) == (1, 9, 0)
+        finally:
+            tracker.close()
+
+    def test_keeps_only_active_items(self, ledger_path, tracker):
+        session = LedgerSession(ledger_path, flush_every=1)
+        for i in range(5):
+            _complete(session, f"f{i}.py", 100)
+        session.update_item_status("f5.py", "active", pid=2, attempts=1)
+        tracker.poll()
+        assert tracker._active == {"f5.py": 1}
+
+    def test_duration_window_is_bounded(self, ledger_path):
+        tracker = ProgressTracker(ledger_path, samples=3)
+        try:
+            session = LedgerSession(ledger_path, flush_every=1)
+            for i, ms in enumerate((10_000, 1, 2, 3)):
+                _complete(session, f"f{i}.py", ms)
+            assert tracker.poll().p95_ms == 3
+        finally:
+            tracker.close()
+
+
+class TestHelpers:
+    def test_percentile(self):
+        assert _percentile([], 0.5) is None
+        assert _percentile([5], 0.95) == 5
+        assert _percentile(list(range(1, 101)), 0.95) == 95
+
+    @pytest.mark.parametrize(
+        "seconds, text",
+        [(None, "-"), (42, "42s"), (125, "2m 05s"), (3900, "1h 05m")],
+    )
+    def test_format_duration(self, seconds, text):
+        assert format_duration(seconds) == text
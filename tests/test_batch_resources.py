@@ -0,0 +1,95 @@
+"""Tests for per-worker resource accounting."""
+
+import os
+import resource
+import subprocess
+import sys
+
+import pytest
+
+from claude_cli.batch.resources import (
+    RESOURCE_KEYS,
+    merge_peaks,
+    sample_proc,
+    usage_metrics,
+    wait_with_usage,
+)
+
+
+class TestWaitWithUsage:
+    def test_returns_exit_code_and_usage(self):
+        proc = subprocess.Popen([sys.executable, "-c", "sum(range(10**6)); raise SystemExit(3)"])
+
+        retcode, usage = wait_with_usage(proc)
+
+        assert retcode == 3
+        assert proc.returncode == 3
+        assert proc.wait() == 3
+        assert set(usage) == set(RESOURCE_KEYS)
+        assert usage["cpu_user_ms"] + usage["cpu_sys_ms"] > 0
+        assert usage["peak_rss_kib"] > 0
+
+    def test_signal_exit_is_negative(self):
+        proc = subprocess.Popen(["sleep", "5"])
+        proc.kill()
+
+        retcode, _ = wait_with_usage(proc)
+
+        assert retcode == -9
+
+    def test_already_reaped_child(self):
+        proc = subprocess.Popen(["true"])
+        proc.wait()
+
+        assert wait_with_usage(proc) == (0, {})
+
+
+class TestUsageMetrics:
+    def test_converts_units(self):
+        fields = [0] * 16
+        fields[0], fields[1] = 1.5, 0.25  # utime, stime
+        fields[2] = 2048  # maxrss
+        fields[9], fields[10] = 4, 8  # inblock, oublock
+        metrics = usage_metrics(resource.struct_rusage(fields))
+
+        assert metrics["cpu_user_ms"] == 1500
+        assert metrics["cpu_sys_ms"] == 250
+        assert metrics["peak_rss_kib"] == (2 if sys.platform == "darwin" else 2048)
+        assert metrics["io_read_bytes"] == 2048
+        assert metrics["io_write_bytes"] == 4096
+
+
+class TestSampleProc:
+    def test_reads_status_and_io(self, tmp_path):
+        proc_dir = tmp_path / "42"
+        proc_dir.mkdir()
+        (proc_dir / "status").write_text("Name:\tclaude\nVmHWM:\t  51200 kB\nVmRSS:\t 40000 kB\n")
+        (proc_dir / "io").write_text("rchar: 900\nread_bytes: 4096\nwrite_bytes: 8192\n")
+
+        assert sample_proc(42, proc_root=tmp_path) == {
+            "peak_rss_kib": 51200,
+            "io_read_bytes": 4096,
+            "io_write_bytes": 8192,
+        }
+
+    def test_missing_process(self, tmp_path):
+        assert sample_proc(42, proc_root=tmp_path) == {}
+
+    @pytest.mark.skipif(not os.path.exists("/proc/self/status"), reason="needs /proc")
+    def test_live_process(self):
+        assert sample_proc(os.getpid())["peak_rss_kib"] > 0
+
+
+class TestMergePeaks:
+    def test_keeps_larger_values(self):
+        merged = merge_peaks(
+            {"peak_rss_kib": 100, "io_read_bytes": 10, "cpu_user_ms": 5},
+            {"peak_rss_kib": 300, "io_read_bytes": 2, "io_write_bytes": 7},
+        )
+
+        assert merged == {
+            "peak_rss_kib": 300,
+            "io_read_bytes": 10,
+            "io_write_bytes": 7,
+            "cpu_user_ms": 5,
+        }
@@ -0,0 +1,73 @@
+"""Tests for batch failure classification and retry policy."""
+
+import signal
+import subprocess
+
+import pytest
+
+from claude_cli.batch.retry import (
+    PERMANENT,
+    TIMEOUT,
+    TRANSIENT,
+    RetryPolicy,
+    classify_failure,
+)
+
+
+class TestClassifyFailure:
+    def test_timed_out_flag(self):
+        assert classify_failure(-15, timed_out=True) == TIMEOUT
+
+    def test_timeout_exit_code(self):
+        assert classify_failure(124) == TIMEOUT
+        assert classify_failure(137) == TIMEOUT
+
+    def test_missing_binary_is_permanent(self):
+        assert classify_failure(127) == PERMANENT
+        assert classify_failure(126) == PERMANENT
+
+    def test_max_turns_is_permanent(self):
+        assert classify_failure(1, "error_max_turns") == PERMANENT
+
+    def test_other_subtypes_are_transient(self):
+        assert classify_failure(1, "error_during_execution") == TRANSIENT
+        assert classify_failure(1, "success") == TRANSIENT
+
+    def test_free_text_ignored(self):
+        # Output quoting an auth error or a missing file is not a signal
+        assert classify_failure(1, "Invalid API key - please run /login") == TRANSIENT
+        assert classify_failure(1, None) == TRANSIENT
+
+    @pytest.mark.parametrize(
+        "sig, expected",
+        [(signal.SIGKILL, TIMEOUT), (signal.SIGTERM, TRANSIENT), (signal.SIGSEGV, TRANSIENT)],
+    )
+    def test_killed_child(self, sig, expected):
+        proc = subprocess.Popen(["sleep", "30"])
+        proc.send_signal(sig)
+        assert proc.wait() == -sig
+        assert classify_failure(proc.returncode) == expected
+
+
+class TestRetryPolicy:
+    def test_retries_until_budget_spent(self):
+        policy = RetryPolicy(max_attempts=3)
+        assert policy.should_retry(1, TRANSIENT)
+        assert policy.should_retry(2, TIMEOUT)
+        assert not policy.should_retry(3, TRANSIENT)
+
+    def test_never_retries_permanent(self):
+        assert not RetryPolicy(max_attempts=10).should_retry(1, PERMANENT)
+
+    def test_exponential_backoff(self):
+        policy = RetryPolicy(base_delay=2.0, max_delay=100.0, jitter=False)
+        assert [policy.delay(n) for n in (1, 2, 3, 4)] == [2.0, 4.0, 8.0, 16.0]
+
+    def test_backoff_capped(self):
+        policy = RetryPolicy(base_delay=2.0, max_delay=5.0, jitter=False)
+        assert policy.delay(10) == 5.0
+
+    def test_jitter_within_bounds(self):
+        policy = RetryPolicy(base_delay=8.0, max_delay=100.0)
+        for _ in range(50):
+            assert 4.0 <= policy.delay(1) <= 8.0
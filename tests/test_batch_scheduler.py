@@ -0,0 +1,125 @@
+"""Tests for batch item scheduling."""
+
+import pytest
+
+from claude_cli.batch.ledger import create_ledger, load_ledger, update_item_status
+from claude_cli.batch.scheduler import (
+    estimate_costs,
+    load_duration_history,
+    order_items,
+    parse_priorities,
+    priority_for,
+)
+
+
+@pytest.fixture
+def project(tmp_path):
+    (tmp_path / "small.py").write_text("x" * 10)
+    (tmp_path / "medium.py").write_text("x" * 100)
+    (tmp_path / "large.py").write_text("x" * 1000)
+    return tmp_path
+
+
+def make_ledger(items, priorities=None):
+    return {
+        "items": [
+            {"name": item, "priority": (priorities or {}).get(item, 0)} for item in items
+        ]
+    }
+
+
+class TestPriorities:
+    def test_parse(self):
+        assert parse_priorities(["src/**=10", "tests/*=-1"]) == [("src/**", 10), ("tests/*", -1)]
+
+    def test_parse_rejects_missing_value(self):
+        with pytest.raises(ValueError):
+            parse_priorities(["src/**"])
+
+    def test_parse_rejects_non_integer(self):
+        with pytest.raises(ValueError):
+            parse_priorities(["src/**=high"])
+
+    def test_first_matching_rule_wins(self):
+        rules = [("src/core/*", 10), ("src/*", 5)]
+        assert priority_for("src/core/a.py", rules) == 10
+        assert priority_for("src/b.py", rules) == 5
+
+    def test_unmatched_item_defaults_to_zero(self):
+        assert priority_for("docs/c.md", [("src/*", 5)]) == 0
+        assert priority_for("docs/c.md", []) == 0
+
+
+class TestEstimateCosts:
+    def test_size_only_without_history(self, project):
+        costs = estimate_costs(["small.py", "large.py"], project, {})
+        assert costs["large.py"] > costs["small.py"]
+
+    def test_history_scales_size_estimates(self, project):
+        # medium.py took 1000 ms for 100 bytes -> 10 ms/byte
+        costs = estimate_costs(["small.py", "medium.py", "large.py"], project, {"medium.py": 1000})
+        assert costs["medium.py"] == 1000
+        assert costs["large.py"] == pytest.approx(10000)
+        assert costs["small.py"] == pytest.approx(100)
+
+    def test_missing_file_costs_zero(self, project):
+        assert estimate_costs(["ghost.py"], project, {}) == {"ghost.py": 0.0}
+
+
+class TestOrderItems:
+    def test_longest_first(self, project):
+        items = ["small.py", "medium.py", "large.py"]
+        assert order_items(items, make_ledger(items), project, {}) == [
+            "large.py", "medium.py", "small.py",
+        ]
+
+    def test_history_overrides_size(self, project):
+        items = ["small.py", "large.py"]
+        order = order_items(items, make_ledger(items), project, {"small.py": 9000, "large.py": 10})
+        assert order == ["small.py", "large.py"]
+
+    def test_priority_beats_cost(self, project):
+        items = ["small.py", "large.py"]
+        ledger = make_ledger(items, {"small.py": 1})
+        assert order_items(items, ledger, project, {}) == ["small.py", "large.py"]
+
+    def test_ties_keep_ledger_order(self, project):
+        items = ["b.txt", "a.txt", "c.txt"]
+        assert order_items(items, make_ledger(items), project, {}) == items
+
+
+class TestDurationHistory:
+    def test_reads_sibling_ledgers(self, tmp_path):
+        root = tmp_path / "batch"
+        create_ledger("batch-1", ["a.py", "b.py"], "x $item", {}, root / "batch-1")
+        update_item_status(
+            root / "batch-1" / "ledger.yaml", "a.py", "done", exit_code=0,
+            metrics={"duration_ms": 1234},
+        )
+        update_item_status(
+            root / "batch-1" / "ledger.yaml", "b.py", "failed", exit_code=1,
+            metrics={"duration_ms": 99},
+        )
+        assert load_duration_history(root) == {"a.py": 1234}
+
+    def test_excludes_current_batch(self, tmp_path):
+        root = tmp_path / "batch"
+        create_ledger("batch-1", ["a.py"], "x $item", {}, root / "batch-1")
+        update_item_status(
+            root / "batch-1" / "ledger.yaml", "a.py", "done", exit_code=0,
+            metrics={"duration_ms": 5},
+        )
+        assert load_duration_history(root, exclude=root / "batch-1") == {}
+
+    def test_newer_batch_wins(self, tmp_path):
+        root = tmp_path / "batch"
+        for batch_id, duration in (("batch-20260101-000000", 10), ("batch-20260102-000000", 20)):
+            create_ledger(batch_id, ["a.py"], "x $item", {}, root / batch_id)
+            update_item_status(
+                root / batch_id / "ledger.yaml", "a.py", "done", exit_code=0,
+                metrics={"duration_ms": duration},
+            )
+        assert load_duration_history(root) == {"a.py": 20}
+
+    def test_missing_root(self, tmp_path):
+        assert load_duration_history(tmp_path / "nope") == {}
@@ -0,0 +1,210 @@
+"""Tests for the multi-node batch work queue."""
+
+import time
+
+import pytest
+
+from claude_cli.batch.ledger import (
+    LedgerSession,
+    create_ledger,
+    load_ledger,
+    reset_stale_active,
+)
+from claude_cli.batch.workqueue import (
+    QueueSession,
+    QueueSource,
+    WorkQueue,
+    queue_path_for,
+    read_ledger,
+    sync_ledger,
+)
+
+
+@pytest.fixture
+def batch_dir(tmp_path):
+    bd = tmp_path / ".claude" / "batch" / "q-batch"
+    create_ledger("q-batch", ["a.py", "b.py", "c.py"], "Check $item", {"parallel": 2}, bd)
+    return bd
+
+
+@pytest.fixture
+def work_queue(batch_dir):
+    wq = WorkQueue(queue_path_for(batch_dir), lease_seconds=30.0)
+    yield wq
+    wq.close()
+
+
+class TestWorkQueue:
+    def test_claims_in_seed_order_without_overlap(self, work_queue):
+        work_queue.seed(["b.py", "a.py", "c.py"])
+
+        assert work_queue.claim("w1", limit=2) == ["b.py", "a.py"]
+        assert work_queue.claim("w2", limit=2) == ["c.py"]
+        assert work_queue.claim("w3") == []
+
+    def test_seed_is_idempotent(self, work_queue):
+        work_queue.seed(["a.py", "b.py"])
+        work_queue.claim("w1")
+        work_queue.seed(["a.py", "b.py"])
+
+        assert work_queue.counts() == {"leased": 1, "pending": 1}
+
+    def test_expired_lease_is_reclaimed(self, batch_dir):
+        wq = WorkQueue(queue_path_for(batch_dir), lease_seconds=0.05)
+        try:
+            wq.seed(["a.py"])
+            assert wq.claim("dead") == ["a.py"]
+            assert wq.claim("alive") == []
+            time.sleep(0.1)
+            assert wq.claim("alive") == ["a.py"]
+            # The original worker lost its lease; its late result is dropped
+            assert not wq.record("dead", "a.py", {"status": "done"})
+        finally:
+            wq.close()
+
+    def test_heartbeat_keeps_lease(self, batch_dir):
+        wq = WorkQueue(queue_path_for(batch_dir), lease_seconds=0.2)
+        try:
+            wq.seed(["a.py"])
+            wq.claim("w1")
+            for _ in range(4):
+                time.sleep(0.1)
+                wq.heartbeat("w1")
+            assert wq.claim("w2") == []
+        finally:
+            wq.close()
+
+    def test_record_completes_item(self, work_queue):
+        work_queue.seed(["a.py"])
+        work_queue.claim("w1")
+        assert work_queue.record("w1", "a.py", {"status": "active", "pid": 42})
+        assert work_queue.record("w1", "a.py", {"status": "done", "exit_code": 0})
+
+        assert work_queue.counts() == {"done": 1}
+        assert work_queue.fields_of("a.py") == {"status": "done", "pid": 42, "exit_code": 0}
+        assert not work_queue.has_open_items()
+
+    def test_retry_later_delays_reclaim(self, work_queue):
+        work_queue.seed(["a.py"])
+        work_queue.claim("w1")
+        work_queue.record("w1", "a.py", {"status": "failed"})
+        work_queue.retry_later("a.py", delay=60)
+
+        assert work_queue.has_open_items()
+        assert work_queue.claim("w2") == []
+
+        work_queue.retry_later("a.py", delay=0)  # no-op: no longer failed
+        assert work_queue.claim("w2") == []
+
+    def test_seed_reopens_failed_items(self, batch_dir):
+        wq = WorkQueue(queue_path_for(batch_dir), lease_seconds=0.05)
+        try:
+            wq.seed(["a.py"])
+            wq.claim("w1")
+            wq.record("w1", "a.py", {"status": "failed"})
+            time.sleep(0.1)
+
+            wq.seed(["a.py"])
+            assert wq.claim("w2") == ["a.py"]
+        finally:
+            wq.close()
+
+    def test_seed_keeps_retry_backoff(self, work_queue):
+        work_queue.seed(["a.py"])
+        work_queue.claim("w1")
+        work_queue.record("w1", "a.py", {"status": "failed"})
+        # Another worker seeds before w1 has scheduled its retry
+        work_queue.seed(["a.py"])
+        assert work_queue.claim("w2") == []
+
+        work_queue.retry_later("a.py", delay=60)
+        work_queue.seed(["a.py"])
+        assert work_queue.claim("w2") == []
+
+
+class TestQueueSession:
+    def test_transitions_visible_through_session(self, batch_dir, work_queue):
+        session = QueueSession(batch_dir / "ledger.yaml", work_queue, "w1")
+        work_queue.seed(session.get_resumable_items())
+        work_queue.claim("w1")
+
+        session.update_item_status("a.py", "active", pid=99, attempts=1)
+        item = session.get_item("a.py")
+        assert item["status"] == "active"
+        assert item["worker"] == "w1"
+        assert item["host"]
+
+        session.update_item_status("a.py", "done", result_summary="ok", exit_code=0)
+        assert session.summary["done"] == 1
+        assert session.get_resumable_items() == ["b.py", "c.py"]
+
+    def test_summary_counts_unqueued_items_from_ledger(self, batch_dir, work_queue):
+        ledger_path = batch_dir / "ledger.yaml"
+        with LedgerSession(ledger_path) as ledger_session:
+            ledger_session.update_item_status("c.py", "done", exit_code=0)
+        session = QueueSession(ledger_path, work_queue, "w1")
+        work_queue.seed(session.get_resumable_items())
+        work_queue.claim("w1")
+        session.update_item_status("a.py", "active", pid=99, attempts=1)
+
+        assert session.summary == {"total": 3, "pending": 1, "active": 1, "done": 1, "failed": 0}
+        assert session.get_item("missing.py") is None
+
+    def test_read_ledger_overlays_without_writing(self, batch_dir, work_queue):
+        ledger_path = batch_dir / "ledger.yaml"
+        session = QueueSession(ledger_path, work_queue, "w1")
+        work_queue.seed(session.get_resumable_items())
+        work_queue.claim("w1")
+        session.update_item_status("a.py", "done", result_summary="ok", exit_code=0)
+        session.record_event("concurrency_log", {"from": 0, "to": 2, "reason": "start"})
+        before = ledger_path.read_bytes()
+
+        with work_queue.exclusive():
+            # A worker holds the write lock: readers are not blocked
+            ledger = read_ledger(batch_dir)
+
+        assert ledger["summary"]["done"] == 1
+        assert ledger["items"][0]["summary"] == "ok"
+        assert len(ledger["concurrency_log"]) == 1
+        assert ledger_path.read_bytes() == before
+        assert load_ledger(ledger_path)["summary"]["done"] == 0
+
+    def test_sync_folds_queue_into_ledger(self, batch_dir, work_queue):
+        ledger_path = batch_dir / "ledger.yaml"
+        session = QueueSession(ledger_path, work_queue, "w1")
+        work_queue.seed(session.get_resumable_items())
+        work_queue.claim("w1")
+        session.update_item_status("a.py", "done", result_summary="ok", exit_code=0)
+        session.record_event("concurrency_log", {"from": 0, "to": 2, "reason": "start"})
+
+        sync_ledger(ledger_path, work_queue)
+        summary = sync_ledger(ledger_path, work_queue)
+
+        ledger = load_ledger(ledger_path)
+        assert summary["done"] == 1
+        assert ledger["items"][0]["summary"] == "ok"
+        assert len(ledger["concurrency_log"]) == 1
+        assert ledger["concurrency_log"][0]["worker"] == "w1"
+
+    def test_stale_reset_ignores_other_hosts(self, batch_dir, work_queue):
+        ledger_path = batch_dir / "ledger.yaml"
+        work_queue.seed(["a.py"])
+        work_queue.claim("w1")
+        fields = {"status": "active", "pid": 2**22 + 1, "host": "elsewhere"}
+        work_queue.record("w1", "a.py", fields)
+        sync_ledger(ledger_path, work_queue)
+
+        assert reset_stale_active(ledger_path) == []
+
+
+class TestQueueSource:
+    def test_idle_after_empty_claim(self, work_queue):
+        source = QueueSource(work_queue, "w1", claim_interval=60)
+        source.heartbeat()
+        assert source.take() is None
+
+        work_queue.seed(["a.py"])
+        # Still backing off from the empty claim
+        assert source.take() is None
+        assert 0 < source.wakeup_in() <= 60
+        assert source.has_more()
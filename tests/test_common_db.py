@@ -0,0 +1,125 @@
+"""Tests for shared DuckDB connections and schema versioning."""
+
+import subprocess
+import sys
+import threading
+
+import pytest
+
+from claude_cli.common import db as common_db
+from claude_cli.common.db import close_shared_connections, ensure_schema, shared_cursor
+
+SCHEMA_V1 = "CREATE TABLE IF NOT EXISTS notes (id INTEGER, body VARCHAR);"
+SCHEMA_V2 = SCHEMA_V1 + "ALTER TABLE notes ADD COLUMN IF NOT EXISTS author VARCHAR;"
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    yield tmp_path / "test.duckdb"
+    close_shared_connections()
+
+
+class TestSharedCursor:
+    def test_one_connection_per_file(self, db_path):
+        with shared_cursor(db_path) as outer:
+            outer.execute("CREATE TABLE t (x INTEGER)")
+            with shared_cursor(db_path) as inner:
+                inner.execute("INSERT INTO t VALUES (1)")
+                assert outer.execute("SELECT x FROM t").fetchall() == [(1,)]
+                assert len([k for k in common_db._connections if k.endswith("test.duckdb")]) == 1
+
+    def test_released_after_last_cursor(self, db_path):
+        with shared_cursor(db_path) as cur:
+            cur.execute("CREATE TABLE t (x INTEGER)")
+        assert not [k for k in common_db._connections if k.endswith("test.duckdb")]
+
+    def test_idle_process_does_not_hold_lock(self, db_path):
+        script = (
+            "import sys; from pathlib import Path\n"
+            "from claude_cli.common.db import shared_cursor\n"
+            "with shared_cursor(Path(sys.argv[1])) as cur:\n"
+            "    cur.execute('CREATE TABLE t (x INTEGER)')\n"
+            "print('ready', flush=True)\n"
+            "sys.stdin.readline()\n"
+            "with shared_cursor(Path(sys.argv[1])) as cur:\n"
+            "    print(cur.execute('SELECT x FROM t').fetchall())\n"
+        )
+        other = subprocess.Popen(
+            [sys.executable, "-c", script, str(db_path)],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True,
+        )
+        try:
+            assert other.stdout.readline() == "ready\n"
+            # The other process is still running but between queries
+            with shared_cursor(db_path) as cur:
+                cur.execute("INSERT INTO t VALUES (7)")
+            out, _ = other.communicate("go\n", timeout=30)
+        finally:
+            other.kill()
+            other.wait()
+        assert out == "[(7,)]\n"
+
+    def test_cursors_usable_from_threads(self, db_path):
+        with shared_cursor(db_path) as cur:
+            cur.execute("CREATE TABLE t (x INTEGER)")
+        errors = []
+
+        def insert(n):
+            try:
+                with shared_cursor(db_path) as cur:
+                    for i in range(20):
+                        cur.execute("INSERT INTO t VALUES (?)", [n * 100 + i])
+            except Exception as e:  # pragma: no cover - reported below
+                errors.append(e)
+
+        threads = [threading.Thread(target=insert, args=(n,)) for n in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert errors == []
+        with shared_cursor(db_path) as cur:
+            assert cur.execute("SELECT COUNT(*) FROM t").fetchone()[0] == 80
+
+    def test_close_reopens_on_next_use(self, db_path):
+        with shared_cursor(db_path) as cur:
+            cur.execute("CREATE TABLE t (x INTEGER)")
+        close_shared_connections()
+        with shared_cursor(db_path) as cur:
+            assert cur.execute("SELECT COUNT(*) FROM t").fetchone()[0] == 0
+
+
+class TestEnsureSchema:
+    def test_records_version(self, db_path):
+        ensure_schema(db_path, "notes", 1, SCHEMA_V1)
+
+        with shared_cursor(db_path) as cur:
+            assert cur.execute("SELECT name, version FROM schema_versions").fetchall() == [
+                ("notes", 1)
+            ]
+
+    def test_skips_ddl_when_current(self, db_path):
+        ensure_schema(db_path, "notes", 1, SCHEMA_V1)
+        close_shared_connections()  # forget the in-process check
+
+        # Same version: the (broken) DDL must not run
+        ensure_schema(db_path, "notes", 1, "THIS IS NOT SQL")
+
+    def test_upgrades_older_version(self, db_path):
+        ensure_schema(db_path, "notes", 1, SCHEMA_V1)
+        ensure_schema(db_path, "notes", 2, SCHEMA_V2)
+
+        with shared_cursor(db_path) as cur:
+            columns = [row[0] for row in cur.execute("DESCRIBE notes").fetchall()]
+            version = cur.execute("SELECT version FROM schema_versions").fetchone()[0]
+        assert "author" in columns
+        assert version == 2
+
+    def test_failed_ddl_leaves_version_unset(self, db_path):
+        with pytest.raises(Exception):
+            ensure_schema(db_path, "notes", 1, "CREATE TABLE broken (")
+        ensure_schema(db_path, "notes", 1, SCHEMA_V1)
+
+        with shared_cursor(db_path) as cur:
+            assert cur.execute("SELECT version FROM schema_versions").fetchone()[0] == 1
@@ -4,8 +4,18 @@ import pytest
 from datetime import date
 from pathlib import Path
 
+from claude_cli.common.db import close_shared_connections
+from claude_cli.lessons.cache import QueryCache, clear_memory
 from claude_cli.lessons.models import Lesson, LessonCreate
 from claude_cli.lessons.db import LessonsDB
+from claude_cli.lessons.search import (
+    TITLE_BOOST,
+    index_document,
+    parse_query,
+    phrase_matches,
+    tokenize,
+)
+from claude_cli.lessons.vectors import embed
 
 
 class TestLessonModels:
@@ -53,7 +63,8 @@ class TestLessonsDB:
     def db(self, tmp_path):
         """Create a test database."""
         db_path = tmp_path / "test_lessons.duckdb"
-        return LessonsDB(db_path)
+        yield LessonsDB(db_path)
+        close_shared_connections()
 
     def test_add_lesson(self, db):
         """Test adding a lesson."""
@@ -157,3 +168,480 @@ class TestLessonsDB:
         assert lesson1.number == 1
         assert lesson2.number == 2
         assert lesson3.number == 3
+
+    def test_instances_share_connection(self, db, tmp_path):
+        """Test that a second instance sees the first one's writes."""
+        db.add(LessonCreate(title="Shared", problem="p", solution="s"))
+        other = LessonsDB(tmp_path / "test_lessons.duckdb")
+        assert other.count() == 1
+        assert other.get(1).title == "Shared"
+
+    def test_init_does_not_touch_database(self, tmp_path):
+        """Test that the schema is applied lazily, on first use."""
+        db_path = tmp_path / "lazy.duckdb"
+        LessonsDB(db_path)
+        assert not db_path.exists()
+
+    def test_schema_version_recorded(self, db):
+        """Test that first use records the schema version marker."""
+        from claude_cli.common.db import shared_cursor
+        from claude_cli.lessons.db import SCHEMA_VERSION
+
+        db.count()
+        with shared_cursor(db.db_path) as cur:
+            row = cur.execute(
+                "SELECT version FROM schema_versions WHERE name = 'lessons'"
+            ).fetchone()
+        assert row == (SCHEMA_VERSION,)
+
+
+class TestLessonSearchText:
+    def test_tokenize(self):
+        """Test that tokens are lower-cased words."""
+        assert tokenize("Use ^##+ for Markdown-headings, e.g. H2") == [
+            "use", "for", "markdown", "headings", "e", "g", "h2"
+        ]
+
+    def test_parse_query(self):
+        """Test splitting plain terms from quoted phrases."""
+        query = parse_query('docker "connection pool" "cache" timeout')
+        assert query.terms == ["docker", "timeout", "cache"]
+        assert query.phrases == [["connection", "pool"]]
+        assert query.required_terms == ["connection", "pool"]
+        assert query.scoring_terms == ["docker", "timeout", "cache", "connection", "pool"]
+
+    def test_phrase_does_not_span_fields(self):
+        """Test that a phrase only matches consecutive words within one field."""
+        postings, _ = index_document("Retry budget", ["budget exhausted", None])
+        positions = {term: pos for term, (_, pos) in postings.items()}
+        assert phrase_matches(positions, ["retry", "budget"])
+        assert phrase_matches(positions, ["budget", "exhausted"])
+        assert not phrase_matches(positions, ["budget", "budget"])
+
+    def test_title_terms_boosted(self):
+        """Test that title occurrences weigh more than body occurrences."""
+        postings, length = index_document("Docker", ["docker compose"])
+        assert postings["docker"][0] == 1 + TITLE_BOOST + 1
+        assert length == 1 + TITLE_BOOST + 2
+
+
+class TestRankedSearch:
+    @pytest.fixture
+    def db(self, tmp_path):
+        """Create a test database with a few lessons."""
+        db = LessonsDB(tmp_path / "ranked.duckdb")
+        db.add(LessonCreate(
+            title="Pin Docker base images", problem="Builds broke on a new tag",
+            solution="Pin the digest", tags=["docker"], severity="high",
+        ))
+        db.add(LessonCreate(
+            title="Reuse the connection pool", problem="Each request opened a connection",
+            solution="Keep one pool per process", tags=["database"],
+        ))
+        db.add(LessonCreate(
+            title="Close files", problem="Leaked descriptors",
+            solution="Use a connection manager and close every pool connection",
+            checklist=["Check docker volumes"],
+        ))
+        yield db
+        close_shared_connections()
+
+    def test_ranks_by_relevance(self, db):
+        """Test that the lesson about the query terms ranks first."""
+        results = db.search_ranked("connection pool")
+        assert [lesson.number for lesson, _ in results] == [2, 3]
+        assert results[0][1] > results[1][1] > 0
+
+    def test_phrase_query(self, db):
+        """Test that quoted phrases require consecutive words."""
+        results = db.search_ranked('"connection pool"')
+        assert [lesson.number for lesson, _ in results] == [2]
+
+    def test_checklist_indexed(self, db):
+        """Test that checklist items are searchable."""
+        results = db.search_ranked("volumes")
+        assert [lesson.number for lesson, _ in results] == [3]
+
+    def test_filters_and_limit(self, db):
+        """Test that filters apply to ranked results."""
+        assert [l.number for l, _ in db.search_ranked("docker", severity="high")] == [1]
+        assert len(db.search_ranked("docker connection", limit=1)) == 1
+
+    def test_no_terms(self, db):
+        """Test that a query without words returns nothing."""
+        assert db.search_ranked("!!") == []
+
+    def test_postings_probed_by_term_index(self, db):
+        """Test that ranking looks terms up through idx_lesson_postings_term."""
+        import json
+
+        from claude_cli.common.db import shared_cursor
+        from claude_cli.lessons.db import RANKED_SQL
+
+        def scans(node):
+            info = node.get("extra_info") or {}
+            if "Table" in info:
+                yield info["Table"].rsplit(".", 1)[-1], info.get("Type")
+            for child in node.get("children", []):
+                yield from scans(child)
+
+        sql = RANKED_SQL.format(where_clause="1=1")
+        with shared_cursor(db.db_path) as cur:
+            row = cur.execute(
+                "EXPLAIN (ANALYZE, FORMAT JSON) " + sql, [["docker", "pool"], ["docker"], 1]
+            ).fetchone()
+        postings = [kind for table, kind in scans(json.loads(row[1]))
+                    if table == "lesson_postings"]
+        assert postings == ["Index Scan"]
+
+    def test_reindex_backfills(self, db):
+        """Test that reindex rebuilds the index from the lessons table."""
+        from claude_cli.common.db import shared_cursor
+
+        with shared_cursor(db.db_path) as cur:
+            cur.execute("DELETE FROM lesson_postings")
+        assert db.search_ranked("docker") == []
+        assert db.reindex() == 3
+        assert [l.number for l, _ in db.search_ranked("docker")] == [1, 3]
+
+    def test_upgrade_indexes_existing_lessons(self, tmp_path):
+        """Test that opening a version 1 database indexes its lessons."""
+        import duckdb
+
+        from claude_cli.lessons.db import SCHEMA_SQL
+
+        db_path = tmp_path / "v1.duckdb"
+        with duckdb.connect(str(db_path)) as conn:
+            conn.execute(SCHEMA_SQL.split("CREATE TABLE IF NOT EXISTS lesson_postings")[0])
+            conn.execute("CREATE TABLE schema_versions (name VARCHAR PRIMARY KEY, version INTEGER)")
+            conn.execute("INSERT INTO schema_versions VALUES ('lessons', 1)")
+            conn.execute(
+                "INSERT INTO lessons (number, title, date_learned, problem, solution) "
+                "VALUES (7, 'Old lesson about caching', DATE '2025-01-01', 'p', 's')"
+            )
+
+        db = LessonsDB(db_path)
+        results = db.search_ranked("caching")
+        assert [lesson.number for lesson, _ in results] == [7]
+        # Content hashes are backfilled, so an import of the same lesson is skipped
+        assert db.add_many([LessonCreate(
+            title="Old lesson about  caching", problem="P", solution="s",
+        )]) == []
+
+
+class TestLessonVectors:
+    def test_unit_length(self):
+        """Test that vectors are L2-normalised."""
+        vector = embed("Connection pooling", ["Reuse database connections"])
+        assert sum(w * w for w in vector.values()) == pytest.approx(1.0)
+
+    def test_stopwords_only(self):
+        """Test that text without content words has no vector."""
+        assert embed("the", ["and of it"]) == {}
+
+    def test_word_variants_overlap(self):
+        """Test that inflected forms of a word share trigram features."""
+        def cosine(a, b):
+            return sum(w * b.get(f, 0.0) for f, w in a.items())
+
+        cached = embed(None, ["cached results"])
+        assert cosine(cached, embed(None, ["caching results"])) > 0.5
+        assert cosine(cached, embed(None, ["flaky network"])) < 0.1
+
+
+class TestSimilarLessons:
+    @pytest.fixture
+    def db(self, tmp_path):
+        """Create a test database with a few lessons."""
+        db = LessonsDB(tmp_path / "similar.duckdb")
+        db.add(LessonCreate(
+            title="Cache invalidation after deploys",
+            problem="Stale cached pages were served after deploying",
+            solution="Version the cache keys",
+            tags=["caching"],
+        ))
+        db.add(LessonCreate(
+            title="Retry flaky network calls",
+            problem="Requests to the API failed intermittently",
+            solution="Retry with exponential backoff",
+        ))
+        yield db
+        close_shared_connections()
+
+    def test_differently_worded_query(self, db):
+        """Test that a paraphrase still finds the right lesson."""
+        matches = db.similar("old pages keep being served from caching layer")
+        assert matches[0][0].number == 1
+        assert 0 < matches[0][1] <= 1
+
+    def test_limit_and_threshold(self, db):
+        """Test that limit and min_score bound the results."""
+        assert len(db.similar("retrying intermittent api failures", limit=1)) == 1
+        assert db.similar("retrying intermittent api failures", min_score=0.99) == []
+
+    def test_new_lessons_indexed_on_add(self, db):
+        """Test that a lesson is findable as soon as it is added."""
+        db.add(LessonCreate(
+            title="Pin dependency versions", problem="Upgrades broke builds",
+            solution="Use a lock file",
+        ))
+        assert db.similar("pinning dependencies in a lockfile")[0][0].number == 3
+
+
+SAMPLE_MARKDOWN = """# Development Lessons
+
+## Lesson 1: Pin Docker base images
+
+**Date**: 2026-01-10
+
+### Problem
+
+Builds broke when the base image tag moved.
+
+### Solution
+
+Pin images by digest.
+
+- [ ] Check Dockerfiles for floating tags
+
+## Lesson 2: Reuse connections
+
+### Problem
+
+Each query opened a new database connection.
+
+### Solution
+
+Share one connection per process.
+"""
+
+
+class TestBulkImport:
+    @pytest.fixture
+    def db(self, tmp_path):
+        """Create an empty test database."""
+        yield LessonsDB(tmp_path / "bulk.duckdb")
+        close_shared_connections()
+
+    def test_numbers_after_existing(self, db):
+        """Test that bulk-added lessons are numbered in order after existing ones."""
+        db.add(LessonCreate(title="First", problem="P1", solution="S1"))
+        added = db.add_many([
+            LessonCreate(title="Second", problem="P2", solution="S2"),
+            LessonCreate(title="Third", problem="P3", solution="S3", tags=["x"]),
+        ])
+        assert [lesson.number for lesson in added] == [2, 3]
+        assert db.get(3).tags == ["x"]
+        assert [l.number for l, _ in db.search_ranked("third")] == [3]
+
+    def test_dedupes_by_content(self, db):
+        """Test that duplicates in the batch or the database are skipped."""
+        db.add(LessonCreate(title="Known", problem="Same problem", solution="Same fix"))
+        added = db.add_many([
+            LessonCreate(title="known", problem="Same   problem", solution="Same fix"),
+            LessonCreate(title="New", problem="P", solution="S"),
+            LessonCreate(title="New", problem="P", solution="S", tags=["dup"]),
+        ])
+        assert [lesson.title for lesson in added] == ["New"]
+        assert db.count() == 2
+
+    def test_atomic(self, db, monkeypatch):
+        """Test that a failure part-way through adds nothing."""
+        def fail(*args, **kwargs):
+            raise RuntimeError("index write failed")
+
+        monkeypatch.setattr(LessonsDB, "_index_lessons", staticmethod(fail))
+        with pytest.raises(RuntimeError):
+            db.add_many([LessonCreate(title="A", problem="P", solution="S")])
+        monkeypatch.undo()
+        assert db.count() == 0
+
+    def test_reimport_is_idempotent(self, db, tmp_path):
+        """Test that importing the same markdown twice adds lessons once."""
+        from claude_cli.lessons.importer import import_from_markdown
+
+        path = tmp_path / "devlessons.md"
+        path.write_text(SAMPLE_MARKDOWN)
+
+        first = import_from_markdown(str(path), db=db)
+        assert (first.added, first.updated, first.unchanged) == (2, 0, 0)
+        second = import_from_markdown(str(path), db=db)
+        assert (second.added, second.updated, second.unchanged) == (0, 0, 2)
+        assert db.count() == 2
+        assert db.get(1).checklist == ["Check Dockerfiles for floating tags"]
+
+    def test_reimport_updates_changed_block(self, db, tmp_path):
+        """Test that an edited lesson is updated in place and others are skipped."""
+        from claude_cli.lessons.importer import import_from_markdown
+
+        path = tmp_path / "devlessons.md"
+        path.write_text(SAMPLE_MARKDOWN)
+        import_from_markdown(str(path), db=db)
+
+        path.write_text(SAMPLE_MARKDOWN.replace("Pin images by digest.", "Pin images by sha256 digest."))
+        result = import_from_markdown(str(path), db=db)
+
+        assert (result.added, result.updated, result.unchanged) == (0, 1, 1)
+        assert db.count() == 2
+        assert db.get(1).solution.startswith("Pin images by sha256 digest.")
+        assert [l.number for l, _ in db.search_ranked("sha256")] == [1]
+
+    def test_reimport_adds_new_block(self, db, tmp_path):
+        """Test that a lesson appended to the file is added after the others."""
+        from claude_cli.lessons.importer import import_from_markdown
+
+        path = tmp_path / "devlessons.md"
+        path.write_text(SAMPLE_MARKDOWN)
+        import_from_markdown(str(path), db=db)
+
+        path.write_text(SAMPLE_MARKDOWN + "\n## Lesson 3: Cache queries\n\n### Problem\n\nSlow.\n\n### Solution\n\nCache.\n")
+        result = import_from_markdown(str(path), db=db)
+
+        assert (result.added, result.updated, result.unchanged) == (1, 0, 2)
+        assert db.get(3).title == "Cache queries"
+
+    def test_duplicate_block_does_not_adopt_lesson(self, db, tmp_path):
+        """Test that editing a block that duplicated another source's lesson leaves it alone."""
+        from claude_cli.lessons.importer import import_from_markdown
+
+        original = tmp_path / "devlessons.md"
+        original.write_text(SAMPLE_MARKDOWN)
+        import_from_markdown(str(original), db=db)
+
+        copy = tmp_path / "copy.md"
+        copy.write_text(SAMPLE_MARKDOWN)
+        assert import_from_markdown(str(copy), db=db).added == 0
+
+        copy.write_text(SAMPLE_MARKDOWN.replace("Pin images by digest.", "Pin images by tag."))
+        result = import_from_markdown(str(copy), db=db)
+
+        assert (result.added, result.updated) == (1, 0)
+        assert db.get(1).solution.startswith("Pin images by digest.")
+        assert db.get(3).solution.startswith("Pin images by tag.")
+
+        copy.write_text(SAMPLE_MARKDOWN.replace("Pin images by digest.", "Pin images by label."))
+        result = import_from_markdown(str(copy), db=db)
+        assert (result.added, result.updated) == (0, 1)
+        assert db.get(3).solution.startswith("Pin images by label.")
+        assert db.get(1).solution.startswith("Pin images by digest.")
+
+
+class TestImporterParsing:
+    def test_split_blocks_keys(self):
+        """Test that blocks are keyed by number, else by title, deduplicated."""
+        from claude_cli.lessons.importer import split_blocks
+
+        content = "## Lesson 4: A\nx\n## Lesson: Same Title\ny\n## Lesson: same  title\nz\n"
+        assert [b.key for b in split_blocks(content)] == [
+            "4", "title:same title", "title:same title#2",
+        ]
+
+    def test_block_hash_ignores_other_blocks(self):
+        """Test that editing one block leaves the other blocks' hashes alone."""
+        from claude_cli.lessons.importer import split_blocks
+
+        before = split_blocks(SAMPLE_MARKDOWN)
+        after = split_blocks(SAMPLE_MARKDOWN.replace("new database", "fresh database"))
+        assert before[0].hash == after[0].hash
+        assert before[1].hash != after[1].hash
+
+    def test_extract_tags_overlapping_keywords(self):
+        """Test that keywords inside longer keywords still count."""
+        from claude_cli.lessons.importer import extract_tags
+
+        assert extract_tags("Use pytest with sqlite", "") == ["database", "python", "testing"]
+        assert extract_tags("Dockerfile", "deployment via git") == ["deployment", "docker", "git"]
+        assert extract_tags("Nothing here", "") == []
+
+
+class TestQueryCache:
+    @pytest.fixture
+    def db(self, tmp_path):
+        """Create a test database with two lessons."""
+        db = LessonsDB(tmp_path / "cached.duckdb")
+        db.add(LessonCreate(title="Pin images", problem="P", solution="S", tags=["docker"]))
+        db.add(LessonCreate(title="Reuse connections", problem="P", solution="S", tags=["database"]))
+        yield db
+        close_shared_connections()
+        clear_memory()
+
+    @staticmethod
+    def forbid_queries(monkeypatch):
+        def fail(self):
+            raise AssertionError("query reached DuckDB")
+
+        monkeypatch.setattr(LessonsDB, "_cursor", fail)
+
+    def test_repeat_served_from_cache(self, db, monkeypatch):
+        """Test that repeated lookups do not touch DuckDB."""
+        first = db.search(tags=["docker"])
+        assert db.count() == 2
+        assert db.get_tags() == ["database", "docker"]
+
+        self.forbid_queries(monkeypatch)
+        assert db.search(tags=["docker"]) == first
+        assert db.count() == 2
+        assert db.get_tags() == ["database", "docker"]
+
+    def test_normalised_key(self, db, monkeypatch):
+        """Test that equivalent query parameters share an entry."""
+        db.search(query="Pin", tags=["docker", "docker"])
+        self.forbid_queries(monkeypatch)
+        assert [l.title for l in db.search(query="pin", tags=["docker"])] == ["Pin images"]
+
+    def test_served_from_disk_in_new_process(self, db, monkeypatch):
+        """Test that another process (empty memory) reuses the on-disk cache."""
+        db.get_tags()
+        clear_memory()
+        self.forbid_queries(monkeypatch)
+        assert LessonsDB(db.db_path).get_tags() == ["database", "docker"]
+
+    def test_cache_hit_does_not_import_duckdb(self, db):
+        """Test that a fresh process answers a cached lookup without loading duckdb."""
+        import subprocess
+        import sys
+
+        db.get_tags()
+        script = (
+            "import sys; from claude_cli.lessons.cli import LessonsDB; "
+            f"print(LessonsDB({str(db.db_path)!r}).get_tags(), 'duckdb' in sys.modules)"
+        )
+        result = subprocess.run(
+            [sys.executable, "-c", script], capture_output=True, text=True, check=True
+        )
+        assert result.stdout.strip() == "['database', 'docker'] False"
+
+    def test_write_invalidates(self, db):
+        """Test that adding lessons invalidates cached results."""
+        assert db.count() == 2
+        db.add(LessonCreate(title="Third", problem="P", solution="S", tags=["git"]))
+        assert db.count() == 3
+        db.add_many([LessonCreate(title="Fourth", problem="P", solution="S", tags=["api"])])
+        assert db.get_tags() == ["api", "database", "docker", "git"]
+
+    def test_result_from_old_generation_not_stored(self, tmp_path):
+        """Test that a result computed across a write is not cached."""
+        (tmp_path / "x.duckdb").touch()
+        cache = QueryCache(tmp_path / "x.duckdb")
+        generation = cache.generation()
+        assert generation is not None
+        cache.invalidate()
+        cache.put("key", 1, generation)
+        assert cache.get("key", cache.generation()) is None
+        assert cache.get("key", generation) is None
+
+    def test_recreated_database_not_served(self, tmp_path, monkeypatch):
+        """Test that a database replaced on disk does not serve the old file's results."""
+        db = LessonsDB(tmp_path / "replaced.duckdb")
+        db.add(LessonCreate(title="Old", problem="P", solution="S", tags=["docker"]))
+        assert db.get_tags() == ["docker"]
+        close_shared_connections()
+
+        other = LessonsDB(tmp_path / "other.duckdb")
+        other.add(LessonCreate(title="New", problem="P", solution="S", tags=["git"]))
+        close_shared_connections()
+        db.db_path.unlink()
+        other.db_path.rename(db.db_path)
+
+        assert db.get_tags() == ["git"]
+
@@ -0,0 +1,155 @@
+"""Tests for incremental metrics collection."""
+
+import json
+import os
+
+import pytest
+
+from claude_cli.common.db import close_shared_connections
+from claude_cli.metrics import catalog
+from claude_cli.metrics.catalog import collect_incremental, discover_sources
+from claude_cli.metrics.warehouse import load_catalog, query_report
+
+LEDGER = """\
+agent_type: back
+items:
+  - name: a
+    status: done
+    started_at: "2026-01-01T00:00:00"
+    duration_ms: {duration}
+  - name: b
+    status: failed
+    started_at: "2026-01-01T01:00:00"
+    duration_ms: 200
+"""
+
+
+@pytest.fixture
+def base_dir(tmp_path):
+    """Two projects: one with a batch, one with evidence."""
+    base = tmp_path / "projects"
+    batch_dir = base / "alpha" / ".claude" / "batch" / "batch-001"
+    batch_dir.mkdir(parents=True)
+    (base / "alpha" / ".claude" / "manifest.yaml").write_text("phase: coding\n")
+    (batch_dir / "ledger.yaml").write_text(LEDGER.format(duration=100))
+
+    evidence_dir = base / "beta" / ".claude" / "evidence"
+    evidence_dir.mkdir(parents=True)
+    (base / "beta" / ".claude" / "manifest.yaml").write_text("phase: coding\n")
+    (evidence_dir / "agent_runs.json").write_text(json.dumps([
+        {"agent_type": "qa", "started_at": "2026-01-02T00:00:00", "duration_ms": 50,
+         "status": "completed"},
+    ]))
+    return base
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    yield tmp_path / "metrics.duckdb"
+    close_shared_connections()
+
+
+@pytest.fixture
+def reads(monkeypatch):
+    """Record which sources get parsed."""
+    parsed = []
+    original = catalog.Source.read
+
+    def read(self):
+        parsed.append(self.path.name)
+        return original(self)
+
+    monkeypatch.setattr(catalog.Source, "read", read)
+    return parsed
+
+
+class TestCollectIncremental:
+    def test_first_pass_reads_everything(self, base_dir, db_path, reads):
+        result = collect_incremental(base_dir, db_path)
+        assert (result.sources, result.changed, result.runs) == (2, 2, 3)
+        assert sorted(reads) == ["agent_runs.json", "ledger.yaml"]
+        assert query_report(db_path).total_runs == 3
+        assert len(load_catalog(db_path)) == 2
+
+    def test_unchanged_sources_skipped(self, base_dir, db_path, reads):
+        collect_incremental(base_dir, db_path)
+        reads.clear()
+        result = collect_incremental(base_dir, db_path)
+        assert (result.changed, result.runs) == (0, 0)
+        assert reads == []
+        assert query_report(db_path).total_runs == 3
+
+    def test_touched_source_not_reparsed(self, base_dir, db_path, reads):
+        collect_incremental(base_dir, db_path)
+        ledger = next(base_dir.glob("*/.claude/batch/*/ledger.yaml"))
+        os.utime(ledger, ns=(1, 1))
+        reads.clear()
+
+        assert collect_incremental(base_dir, db_path).changed == 0
+        assert reads == []
+        mtime_ns, _, _ = load_catalog(db_path)[str(ledger.resolve())]
+        assert mtime_ns == 1
+
+    def test_changed_source_replaces_its_runs(self, base_dir, db_path, reads):
+        collect_incremental(base_dir, db_path)
+        ledger = next(base_dir.glob("*/.claude/batch/*/ledger.yaml"))
+        ledger.write_text(LEDGER.format(duration=90000))
+        reads.clear()
+
+        result = collect_incremental(base_dir, db_path)
+        assert (result.changed, result.runs) == (1, 2)
+        assert reads == ["ledger.yaml"]
+        report = query_report(db_path)
+        assert report.total_runs == 3
+        assert report.by_agent["back"].avg_duration_ms == pytest.approx((90000 + 200) / 2)
+
+    def test_index_append_detected(self, base_dir, db_path):
+        from claude_cli.batch.broker import index_result
+
+        collect_incremental(base_dir, db_path)
+        ledger = next(base_dir.glob("*/.claude/batch/*/ledger.yaml"))
+        index_result(ledger.parent / "results", {
+            "item": "a", "file": "a.json", "status": "done", "duration_ms": 5,
+        })
+
+        assert collect_incremental(base_dir, db_path).changed == 1
+        back = query_report(db_path).by_agent["back"]
+        assert back.runs == 2
+        assert back.avg_duration_ms == pytest.approx((5 + 200) / 2)
+
+    def test_full_rereads(self, base_dir, db_path, reads):
+        collect_incremental(base_dir, db_path)
+        reads.clear()
+        assert collect_incremental(base_dir, db_path, full=True).changed == 2
+        assert len(reads) == 2
+        assert query_report(db_path).total_runs == 3
+
+    def test_discover_sources(self, base_dir):
+        kinds = sorted((s.kind, s.project_root.name) for s in discover_sources(base_dir))
+        assert kinds == [("batch", "alpha"), ("evidence", "beta")]
+
+    def test_parallel_matches_sequential(self, base_dir, tmp_path, db_path):
+        for index in range(5):
+            batch_dir = base_dir / "alpha" / ".claude" / "batch" / f"batch-1{index}"
+            batch_dir.mkdir()
+            (batch_dir / "ledger.yaml").write_text(LEDGER.format(duration=index))
+
+        parallel = collect_incremental(base_dir, db_path, jobs=2)
+        sequential = collect_incremental(base_dir, tmp_path / "seq.duckdb", jobs=1)
+        assert parallel == sequential
+        assert query_report(db_path).by_agent == query_report(tmp_path / "seq.duckdb").by_agent
+
+    def test_written_in_batches(self, base_dir, db_path, monkeypatch):
+        from claude_cli.metrics import warehouse
+
+        calls = []
+        original = warehouse.replace_sources
+
+        def record(db, collected, touched):
+            calls.append(len(collected))
+            return original(db, collected, touched)
+
+        monkeypatch.setattr(catalog, "replace_sources", record)
+        monkeypatch.setattr(catalog, "WRITE_BATCH", 1)
+        assert collect_incremental(base_dir, db_path).runs == 3
+        assert calls == [1, 1]
@@ -141,6 +141,41 @@ class TestCollectFromBatchLedgers:
         assert completed.tool_uses == 10
         assert completed.task_ids == ["T-001"]
 
+    def test_results_index_overrides_ledger(self, batch_project):
+        from claude_cli.batch.broker import index_result
+
+        ledger_path = next(batch_project.glob("*/.claude/batch/*/ledger.yaml"))
+        results_dir = ledger_path.parent / "results"
+        index_result(results_dir, {
+            "item": "task-1", "file": "task-1.json", "status": "done",
+            "duration_ms": 1234, "total_tokens": 50, "tool_uses": 2,
+        })
+
+        runs = {r.run_id: r for r in collect_from_batch_ledgers(batch_project)}
+        assert sorted(runs) == ["batch-001/task-1", "batch-001/task-2"]
+        indexed = runs["batch-001/task-1"]
+        assert (indexed.duration_ms, indexed.status) == (1234, "completed")
+        # Agent type and task ids still come from the ledger
+        assert indexed.agent_type == "back"
+        assert indexed.task_ids == ["T-001"]
+        # Finished before the index existed: kept from the ledger
+        assert runs["batch-001/task-2"].duration_ms == 3000
+
+    def test_results_index_without_ledger_item(self, batch_project):
+        from claude_cli.batch.broker import index_result
+
+        ledger_path = next(batch_project.glob("*/.claude/batch/*/ledger.yaml"))
+        results_dir = ledger_path.parent / "results"
+        index_result(results_dir, {"item": "extra", "file": "extra.json", "status": "failed"})
+        index_result(results_dir, {
+            "item": "task-3", "file": "task-3.json", "status": "done", "cache_hit": True,
+        })
+
+        runs = {r.run_id: r for r in collect_from_batch_ledgers(batch_project)}
+        assert runs["batch-001/extra"].agent_type == "back"
+        assert runs["batch-001/extra"].status == "failed"
+        assert "batch-001/task-3" not in runs
+
     def test_empty_directory(self, tmp_path):
         runs = collect_from_batch_ledgers(tmp_path)
         assert runs == []
@@ -208,6 +243,40 @@ class TestAggregateMetrics:
         assert report.by_agent == {}
         assert report.by_project == {}
 
+    def test_percentiles(self, sample_runs):
+        report = aggregate_metrics(sample_runs)
+        back = report.by_agent["back"]
+        assert back.p50_duration_ms == 4000.0
+        assert back.p90_duration_ms == pytest.approx(4800.0)
+        assert back.p99_duration_ms == pytest.approx(4980.0)
+        assert back.p50_tokens == 900.0
+        assert back.p99_tokens == pytest.approx(998.0)
+
+    def test_by_day(self, sample_runs):
+        report = aggregate_metrics(sample_runs)
+        assert [(d.day, d.runs) for d in report.by_day] == [
+            ("2026-01-01", 2), ("2026-01-02", 1), ("2026-01-03", 1),
+        ]
+        first = report.by_day[0]
+        assert first.success_rate == 0.5
+        assert first.total_tokens == 2200
+
+    def test_by_agent_project(self, sample_runs):
+        report = aggregate_metrics(sample_runs)
+        cells = {(c.agent_type, c.project_slug): (c.runs, c.success_rate)
+                 for c in report.by_agent_project}
+        assert cells == {
+            ("back", "project-a"): (2, 1.0),
+            ("front", "project-b"): (1, 0.0),
+            ("qa", "project-a"): (1, 1.0),
+        }
+
+    def test_unparseable_start_left_out_of_days(self, sample_runs):
+        sample_runs[0].started_at = "not a date"
+        report = aggregate_metrics(sample_runs)
+        assert report.total_runs == 4
+        assert sum(d.runs for d in report.by_day) == 3
+
 
 class TestMetricsReportSerialization:
     def test_to_json(self, sample_runs):
@@ -224,6 +293,19 @@ class TestMetricsReportSerialization:
         assert "back" in md
         assert "front" in md
 
+    def test_json_includes_breakdowns(self, sample_runs):
+        data = json.loads(aggregate_metrics(sample_runs).to_json())
+        assert data["by_agent"]["back"]["p99_duration_ms"] > 0
+        assert data["by_day"][0]["day"] == "2026-01-01"
+        assert {"agent_type": "front", "project_slug": "project-b", "runs": 1,
+                "success_rate": 0.0} in data["by_agent_project"]
+
+    def test_markdown_breakdowns(self, sample_runs):
+        md = aggregate_metrics(sample_runs).to_markdown()
+        assert "## By Day" in md
+        assert "| 2026-01-01 | 2 | 50.0% |" in md
+        assert "## Success Rate by Agent and Project" in md
+
     def test_empty_report_markdown(self):
         report = aggregate_metrics([])
         md = report.to_markdown()
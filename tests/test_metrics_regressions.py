@@ -0,0 +1,195 @@
+"""Tests for metrics regression detection."""
+
+from datetime import UTC, datetime, timedelta
+
+import pytest
+
+from claude_cli.common.db import close_shared_connections
+from claude_cli.metrics.collector import AgentRun
+from claude_cli.metrics.regressions import (
+    Regression,
+    detect_regressions,
+    link_changes,
+    mann_whitney_p,
+)
+from claude_cli.metrics.warehouse import store_runs, window_rank_stats
+
+NOW = datetime(2026, 3, 1, 12, 0, tzinfo=UTC)
+
+
+def make_runs(agent, days, durations, tokens=100, status="completed"):
+    return [
+        AgentRun(
+            agent_type=agent,
+            project_slug="project-a",
+            started_at=(NOW - timedelta(days=day, hours=index)).isoformat(),
+            duration_ms=duration,
+            total_tokens=tokens,
+            tool_uses=3,
+            status=status,
+            run_id=f"{agent}/{day}/{index}/{status}",
+        )
+        for day in days
+        for index, duration in enumerate(durations)
+    ]
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    yield tmp_path / "metrics.duckdb"
+    close_shared_connections()
+
+
+class TestDetectRegressions:
+    def test_slower_agent_flagged(self, db_path):
+        store_runs(
+            make_runs("back", range(10, 20), [900, 1000, 1100])
+            + make_runs("back", range(1, 6), [1900, 2000, 2100])
+            + make_runs("qa", range(10, 20), [500, 600])
+            + make_runs("qa", range(1, 6), [500, 600]),
+            db_path,
+        )
+        found = detect_regressions(db_path, now=NOW)
+        assert [(r.agent_type, r.metric) for r in found] == [("back", "duration_ms")]
+        regression = found[0]
+        assert (regression.baseline_median, regression.recent_median) == (1000, 2000)
+        assert (regression.n_baseline, regression.n_recent) == (30, 15)
+        assert regression.change == pytest.approx(1.0)
+        assert regression.p_value < 1e-6
+        assert regression.robust_z > 5
+
+    def test_token_regression(self, db_path):
+        store_runs(
+            make_runs("back", range(10, 20), [1000, 1100], tokens=100)
+            + make_runs("back", range(1, 6), [1000, 1100], tokens=300),
+            db_path,
+        )
+        found = detect_regressions(db_path, now=NOW)
+        assert [r.metric for r in found] == ["total_tokens"]
+        assert found[0].robust_z is None  # constant baseline, no spread
+
+    def test_faster_or_small_change_not_flagged(self, db_path):
+        store_runs(
+            make_runs("back", range(10, 20), [1000, 1100])
+            + make_runs("back", range(1, 6), [1050, 1150])
+            + make_runs("qa", range(10, 20), [1000, 1100])
+            + make_runs("qa", range(1, 6), [500, 600]),
+            db_path,
+        )
+        assert detect_regressions(db_path, now=NOW) == []
+
+    def test_failed_runs_ignored(self, db_path):
+        # Failures record zero duration; pooled in, they would mask the slowdown
+        store_runs(
+            make_runs("back", range(10, 20), [900, 1000, 1100])
+            + make_runs("back", range(1, 6), [1900, 2000, 2100])
+            + make_runs("back", range(1, 6), [0, 0, 0, 0], tokens=0, status="failed"),
+            db_path,
+        )
+        found = detect_regressions(db_path, now=NOW)
+        assert [(r.agent_type, r.metric) for r in found] == [("back", "duration_ms")]
+        assert (found[0].n_baseline, found[0].n_recent) == (30, 15)
+        assert found[0].recent_median == 2000
+
+    def test_min_runs(self, db_path):
+        store_runs(
+            make_runs("back", range(10, 20), [1000]) + make_runs("back", range(1, 4), [5000]),
+            db_path,
+        )
+        assert detect_regressions(db_path, now=NOW) == []
+        assert len(detect_regressions(db_path, now=NOW, min_runs=3)) == 1
+
+    def test_runs_outside_windows_ignored(self, db_path):
+        store_runs(
+            make_runs("back", range(40, 50), [100, 200])
+            + make_runs("back", range(10, 20), [1000, 1100])
+            + make_runs("back", range(1, 6), [1000, 1100]),
+            db_path,
+        )
+        assert detect_regressions(db_path, now=NOW) == []
+        assert len(detect_regressions(db_path, now=NOW, baseline_days=60)) == 1
+
+    def test_missing_database(self, db_path):
+        assert detect_regressions(db_path) == []
+        assert not db_path.exists()
+
+    def test_rank_stats(self, db_path):
+        store_runs(
+            make_runs("back", [10], [1, 2, 2]) + make_runs("back", [1], [2, 3]), db_path
+        )
+        naive = NOW.replace(tzinfo=None)
+        rows = window_rank_stats(
+            db_path, "duration_ms", naive - timedelta(days=30), naive - timedelta(days=7), naive
+        )
+        # Pooled ranks: 1 -> 1, the three 2s -> 3, 3 -> 5; recent holds one 2 and the 3
+        assert rows == [("back", 3, 2, 2.0, 2.5, 0.0, 8.0, 24)]
+
+    def test_unknown_metric(self, db_path):
+        with pytest.raises(ValueError):
+            window_rank_stats(db_path, "status; DROP TABLE agent_runs", NOW, NOW, NOW)
+
+
+class TestMannWhitney:
+    def test_no_difference(self):
+        # Recent ranks 2 and 3 of 1..4: U equals its mean, continuity pushes p above 0.5
+        assert 0.5 < mann_whitney_p(2, 2, 5, 0) < 0.7
+
+    def test_complete_separation(self):
+        # Recent values hold the top 10 ranks of 20
+        assert mann_whitney_p(10, 10, sum(range(11, 21)), 0) < 0.001
+
+    def test_all_tied(self):
+        assert mann_whitney_p(5, 5, 27.5, 10**3 - 10) == 1.0
+
+
+class TestLinkChanges:
+    HISTORY = {"records": [
+        {"component_type": "agent", "component_name": "back", "file_path": "agents/back.md",
+         "version": 3, "valid_from": (NOW - timedelta(days=2)).isoformat(),
+         "change_summary": "Longer checklist"},
+        {"component_type": "prompt", "component_name": "shared", "file_path": "prompts/shared.md",
+         "version": 2, "valid_from": (NOW - timedelta(days=3)).isoformat()},
+        {"component_type": "agent", "component_name": "back", "file_path": "agents/back.md",
+         "version": 2, "valid_from": (NOW - timedelta(days=30)).isoformat()},
+        {"component_type": "agent", "component_name": "qa", "file_path": "agents/qa.md",
+         "version": 1, "valid_from": "not a date"},
+    ]}
+
+    def make_regression(self, agent):
+        return Regression(agent, "duration_ms", 1000, 2000, 30, 15, 1e-6, 10.0)
+
+    def test_related_and_other(self):
+        regressions = [self.make_regression("back"), self.make_regression("qa")]
+        link_changes(regressions, self.HISTORY, recent_days=7, now=NOW)
+
+        back, qa = regressions
+        assert [c["version"] for c in back.related_changes] == [3]
+        assert back.other_changes == 1
+        assert qa.related_changes == []
+        assert qa.other_changes == 2
+
+    def test_empty_history(self):
+        regressions = [self.make_regression("back")]
+        link_changes(regressions, {"records": []}, now=NOW)
+        assert (regressions[0].related_changes, regressions[0].other_changes) == ([], 0)
+
+    def test_whole_token_match(self):
+        def record(name, path):
+            return {"component_name": name, "file_path": path, "version": name,
+                    "valid_from": (NOW - timedelta(days=1)).isoformat()}
+
+        history = {"records": [
+            record("qa", "agents/qa.md"),
+            record("ops", "agents/ops.md"),
+            record("code-review", "agents/code-review.md"),
+            record("checklist", "prompts/qa_checklist.md"),
+            record("quality", "prompts/quality.md"),
+        ]}
+        qa, devops, review = (self.make_regression(a) for a in ("qa", "devops", "code-review"))
+        link_changes([qa, devops, review], history, now=NOW)
+
+        assert [c["version"] for c in qa.related_changes] == ["qa", "checklist"]
+        assert devops.related_changes == []
+        assert devops.other_changes == 5
+        assert [c["version"] for c in review.related_changes] == ["code-review"]
+
@@ -0,0 +1,131 @@
+"""Tests for the per-run metrics warehouse."""
+
+from datetime import UTC, datetime, timedelta
+
+import pytest
+
+from claude_cli.common.db import close_shared_connections, shared_cursor
+from claude_cli.metrics.collector import AgentRun, collect_from_batch_ledgers
+from claude_cli.metrics.warehouse import query_report, run_key, store_runs
+
+
+def make_run(agent="back", project="project-a", days_ago=1, duration=1000, status="completed",
+             run_id="", tokens=100):
+    started = (datetime.now(UTC) - timedelta(days=days_ago)).isoformat()
+    return AgentRun(
+        agent_type=agent,
+        project_slug=project,
+        started_at=started,
+        duration_ms=duration,
+        total_tokens=tokens,
+        tool_uses=3,
+        status=status,
+        run_id=run_id,
+    )
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    yield tmp_path / "metrics.duckdb"
+    close_shared_connections()
+
+
+class TestStoreRuns:
+    def test_one_row_per_run(self, db_path):
+        runs = [make_run(duration=d) for d in (1000, 2000, 3000)]
+        assert store_runs(runs, db_path) == 3
+        with shared_cursor(db_path) as conn:
+            assert conn.execute("SELECT COUNT(*) FROM agent_runs").fetchone()[0] == 3
+
+    def test_recollecting_is_idempotent(self, db_path):
+        runs = [make_run(duration=d) for d in (1000, 2000)]
+        store_runs(runs, db_path)
+        store_runs(runs, db_path)
+        assert query_report(db_path).total_runs == 2
+
+    def test_run_id_supersedes_earlier_attempt(self, db_path):
+        store_runs([make_run(status="failed", run_id="batch-1/a.py")], db_path)
+        store_runs([make_run(status="completed", run_id="batch-1/a.py")], db_path)
+        report = query_report(db_path)
+        assert report.total_runs == 1
+        assert report.by_agent["back"].success_rate == 1.0
+
+    def test_run_key_depends_on_project(self):
+        assert run_key(make_run(run_id="b/x")) != run_key(make_run(project="other", run_id="b/x"))
+
+    def test_timezone_normalised(self, db_path):
+        run = make_run()
+        run.started_at = "2026-01-01T02:00:00+02:00"
+        store_runs([run], db_path)
+        with shared_cursor(db_path) as conn:
+            started = conn.execute("SELECT started_at FROM agent_runs").fetchone()[0]
+        assert started == datetime(2026, 1, 1, 0, 0)
+
+    def test_unparseable_start_kept(self, db_path):
+        run = make_run()
+        run.started_at = ""
+        store_runs([run], db_path)
+        assert query_report(db_path).total_runs == 1
+        assert query_report(db_path, days=7).total_runs == 0
+
+    def test_empty(self, db_path):
+        assert store_runs([], db_path) == 0
+        assert not db_path.exists()
+
+
+class TestQueryReport:
+    def test_aggregates_in_sql(self, db_path):
+        store_runs([
+            make_run(duration=1000, tokens=100),
+            make_run(duration=2000, tokens=300, status="failed"),
+            make_run(duration=3000, tokens=200),
+            make_run(agent="qa", project="project-b", duration=500),
+        ], db_path)
+
+        report = query_report(db_path)
+        back = report.by_agent["back"]
+        assert report.total_runs == 4
+        assert back.runs == 3
+        assert back.avg_duration_ms == 2000.0
+        assert back.avg_tokens == 200.0
+        assert back.success_rate == pytest.approx(2 / 3)
+        assert back.p50_duration_ms == 2000.0
+        assert back.p90_duration_ms == pytest.approx(2800.0)
+        assert report.by_project == {"project-a": 3, "project-b": 1}
+
+    def test_time_window(self, db_path):
+        store_runs([make_run(days_ago=1), make_run(days_ago=40, duration=9000)], db_path)
+        report = query_report(db_path, days=30)
+        assert report.total_runs == 1
+        assert report.window_days == 30
+        assert "last 30 days" in report.to_markdown()
+
+    def test_missing_database(self, db_path):
+        assert query_report(db_path).total_runs == 0
+        assert not db_path.exists()
+
+    def test_collected_ledger_runs(self, tmp_path, db_path):
+        batch_dir = tmp_path / "proj" / ".claude" / "batch" / "batch-001"
+        batch_dir.mkdir(parents=True)
+        (tmp_path / "proj" / ".claude" / "manifest.yaml").write_text("phase: coding\n")
+        (batch_dir / "ledger.yaml").write_text(
+            "agent_type: back\nitems:\n"
+            "  - name: a\n    status: done\n    duration_ms: 100\n"
+            "  - name: b\n    status: done\n    duration_ms: 100\n"
+        )
+        runs = collect_from_batch_ledgers(tmp_path)
+        assert [r.run_id for r in runs] == ["batch-001/a", "batch-001/b"]
+        assert store_runs(runs, db_path) == 2
+
+    def test_matches_in_memory_aggregation(self, db_path):
+        from claude_cli.metrics.collector import aggregate_metrics
+
+        runs = [make_run(agent=a, project=p, days_ago=d, duration=d * 100 + 7, tokens=d,
+                         status="failed" if d % 3 else "completed", run_id=f"{a}{p}{d}")
+                for a in ("back", "qa") for p in ("x", "y") for d in range(1, 6)]
+        store_runs(runs, db_path)
+        stored = query_report(db_path)
+        in_memory = aggregate_metrics(runs)
+        assert stored.by_agent == in_memory.by_agent
+        assert stored.by_day == in_memory.by_day
+        assert stored.by_agent_project == in_memory.by_agent_project